@@ -0,0 +1,261 @@
+"""
+Admission Module
+Caps in-flight OCR requests by estimated pixel cost, with a short bounded wait queue
+"""
+
+import asyncio
+import collections
+import logging
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, Tuple
+
+from pipeline_common import normalization_settings
+from scheduling import FairQueue, Lane
+from uploads import DocumentSource, open_source
+
+logger = logging.getLogger(__name__)
+
+# Completions over this many seconds give the drain rate used for Retry-After
+RATE_WINDOW = 30.0
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can neither start nor wait; retry_after is in seconds"""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(f"OCR service is at capacity ({reason}), retry in {retry_after}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def estimate_pixels(source: DocumentSource, content_type: str) -> int:
+    """
+    Upper bound on the pixels one page of a request decodes, read from headers only.
+
+    Images count at their full size; PDFs at their first page's size at the
+    largest render DPI (capped like the pipeline caps them). Unreadable
+    documents count 0 and fail later in the pipeline.
+    """
+    from PIL import Image
+    from pdf_pages import open_pdf
+
+    try:
+        if content_type == "application/pdf":
+            config = normalization_settings()
+            doc = open_pdf(source)
+            try:
+                if doc.page_count < 1:
+                    return 0
+                rect = doc.load_page(0).rect
+                page_pixels = rect.width * rect.height * (config["pdf_max_dpi"] / 72.0) ** 2
+                return int(min(page_pixels, config["max_pixels"]))
+            finally:
+                doc.close()
+        with Image.open(open_source(source)) as image:
+            return image.size[0] * image.size[1]
+    except Exception as exc:
+        logger.debug(f"Could not estimate document size: {exc}")
+        return 0
+
+
+class AdmissionController:
+    """
+    Counting semaphore over pixels rather than requests.
+
+    A request is admitted while the pixels in flight stay within `capacity`;
+    otherwise it waits for up to `max_wait` seconds in a FairQueue (priority
+    class first, then weighted fair between clients), which holds at most
+    `max_queue` requests per class so bulk traffic cannot fill the waiting
+    room for interactive users. Past either bound it is rejected with a
+    retry hint: the pixels ahead of it divided by the recent drain rate.
+
+    Costs are clamped to [min_cost, capacity], so a tiny image still holds a
+    share of a worker and a huge one can always run on its own. All methods
+    are called from the event loop.
+    """
+
+    def __init__(self, capacity: int, max_queue: int, max_wait: float, min_cost: int = 0,
+                 max_retry_after: int = 60):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.min_cost = min(min_cost, capacity)
+        self.max_retry_after = max_retry_after
+
+        self._in_flight = 0
+        self._active = 0
+        self._waiters = FairQueue()
+        self._drained: Deque[Tuple[float, int]] = collections.deque()
+        self._admitted = 0
+        self._rejected = {"queue_full": 0, "timeout": 0}
+
+    @classmethod
+    def from_env(cls, workers: int) -> "AdmissionController":
+        """
+        OCR_ADMISSION_PIXELS_PER_WORKER: pixel budget per OCR worker (default
+            OCR_MAX_PIXELS, one full-size page); 0 turns admission control off
+        OCR_ADMISSION_QUEUE: requests allowed to wait per priority class
+            (default 2 per worker)
+        OCR_ADMISSION_MAX_WAIT: seconds a request may wait before a 429 (default 10)
+        """
+        per_worker = os.environ.get("OCR_ADMISSION_PIXELS_PER_WORKER")
+        per_worker = int(per_worker) if per_worker else normalization_settings()["max_pixels"]
+        queue = os.environ.get("OCR_ADMISSION_QUEUE")
+        return cls(
+            capacity=workers * per_worker,
+            max_queue=int(queue) if queue else workers * 2,
+            max_wait=float(os.environ.get("OCR_ADMISSION_MAX_WAIT", 10)),
+            # At most two requests per worker, however small
+            min_cost=per_worker // 2,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def cost(self, pixels: int) -> int:
+        return min(max(pixels, self.min_cost), self.capacity)
+
+    async def acquire(self, pixels: int, lane: Lane = Lane(), patient: bool = False) -> int:
+        """
+        Wait until a request of this many pixels may start, queued in its lane.
+
+        A patient caller (a batch item, already held back by its batch's
+        window) is never rejected: it waits past a full queue and max_wait.
+
+        Returns:
+            the cost to hand back to release()
+
+        Raises:
+            AdmissionRejected: the wait queue is full, or max_wait passed (never when patient)
+        """
+        if not self.enabled:
+            return 0
+        cost = self.cost(pixels)
+        if not len(self._waiters) and self._in_flight + cost <= self.capacity:
+            self._grant(cost)
+            return cost
+
+        if not patient and self._waiters.count(lane.priority) >= self.max_queue:
+            self._rejected["queue_full"] += 1
+            raise AdmissionRejected(self.retry_after(cost, lane), "queue full")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = self._waiters.push(lane, cost, future)
+        try:
+            await asyncio.wait_for(future, None if patient else self.max_wait)
+        except BaseException as exc:
+            if future.done() and not future.cancelled():
+                # Admitted just as the wait ended; give the slot back
+                self.release(cost)
+            else:
+                self._waiters.discard(entry)
+                self._wake()
+            if isinstance(exc, asyncio.TimeoutError):
+                self._rejected["timeout"] += 1
+                raise AdmissionRejected(self.retry_after(cost, lane), "timed out waiting")
+            raise
+        return cost
+
+    def release(self, cost: int):
+        """Hand back what acquire() returned, once the request's OCR work is done"""
+        if not cost:
+            return
+        self._in_flight -= cost
+        self._active -= 1
+        self._drained.append((time.monotonic(), cost))
+        self._wake()
+
+    def _grant(self, cost: int):
+        self._in_flight += cost
+        self._active += 1
+        self._admitted += 1
+
+    def _wake(self):
+        # Strictly in queue order: a large request at the head is not starved
+        # by small ones slipping past it
+        while True:
+            entry = self._waiters.peek()
+            if entry is None:
+                return
+            cost, future = entry[3], entry[4]
+            if future.done():
+                self._waiters.discard(entry)
+                continue
+            if self._in_flight + cost > self.capacity:
+                return
+            self._waiters.pop()
+            self._grant(cost)
+            future.set_result(None)
+
+    def drain_rate(self) -> float:
+        """
+        Pixels of requests finished per second over the last RATE_WINDOW
+        seconds, measured from the oldest completion in the window so an idle
+        stretch before a burst does not count as slow draining
+        """
+        now = time.monotonic()
+        while self._drained and self._drained[0][0] < now - RATE_WINDOW:
+            self._drained.popleft()
+        if not self._drained:
+            return 0.0
+        return sum(cost for _, cost in self._drained) / max(now - self._drained[0][0], 1.0)
+
+    def retry_after(self, cost: int, lane: Lane = Lane()) -> int:
+        """Seconds until the work ahead of a request of this cost in this lane should have drained"""
+        ahead = self._in_flight + self._waiters.cost_at_or_above(lane.priority) + cost - self.capacity
+        rate = self.drain_rate()
+        if rate <= 0:
+            # Nothing finished recently to measure against
+            return max(1, min(self.max_retry_after, math.ceil(self.max_wait)))
+        return max(1, min(self.max_retry_after, math.ceil(ahead / rate)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of admission counters"""
+        return {
+            "capacity_pixels": self.capacity,
+            "in_flight_pixels": self._in_flight,
+            "active_requests": self._active,
+            "waiting_requests": len(self._waiters),
+            "waiting_by_priority": self._waiters.counts(),
+            "max_queue": self.max_queue,
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+            "drain_rate_pixels_per_second": round(self.drain_rate()),
+        }
+
+
+class PageAdmission:
+    """
+    Admission for the pages of one multi-page or streamed request.
+
+    The request acquires one page's cost up front (where it may be rejected)
+    and holds it until its response is done; that covers one page running at
+    a time. Pages running beside it each wait for a page's cost of their own,
+    patiently since the request was already admitted, and hand it back as
+    soon as they finish. A long stream therefore never holds more than one
+    page's worth while it is not actually decoding more.
+    """
+
+    def __init__(self, controller: AdmissionController, page_pixels: int, lane: Lane = Lane()):
+        self.controller = controller
+        self.page_pixels = page_pixels
+        self.lane = lane
+        self._held_in_use = False
+
+    async def run(self, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """await fn(*args) under the request's own page cost if it is free, else under a page cost of its own"""
+        if not self._held_in_use:
+            self._held_in_use = True
+            try:
+                return await fn(*args)
+            finally:
+                self._held_in_use = False
+
+        cost = await self.controller.acquire(self.page_pixels, self.lane, patient=True)
+        try:
+            return await fn(*args)
+        finally:
+            self.controller.release(cost)
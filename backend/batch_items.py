@@ -0,0 +1,108 @@
+"""
+Batch Items Module
+Expands a batch upload (many files and/or ZIP archives) into lazily-read items
+"""
+
+import mimetypes
+import os
+import zipfile
+from typing import BinaryIO, Callable, List, NamedTuple, Optional
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed", "application/x-zip"}
+
+
+class BatchError(ValueError):
+    """Raised when a batch upload is malformed or over its limits"""
+
+
+class BatchTooLarge(BatchError):
+    """Raised when the documents of a batch add up to more than the total size limit"""
+
+
+class BatchItem(NamedTuple):
+    index: int
+    filename: str
+    content_type: Optional[str]
+    read: Callable[[], bytes]
+
+
+def is_supported_type(content_type: Optional[str]) -> bool:
+    """Same rule as the single-document endpoints: images and PDFs"""
+    return bool(content_type) and (content_type.startswith("image/") or content_type == "application/pdf")
+
+
+def guess_content_type(filename: str) -> Optional[str]:
+    content_type, _ = mimetypes.guess_type(filename)
+    return content_type
+
+
+def is_zip_upload(filename: Optional[str], content_type: Optional[str]) -> bool:
+    return content_type in ZIP_CONTENT_TYPES or (filename or "").lower().endswith(".zip")
+
+
+def _read_upload(fileobj: BinaryIO) -> Callable[[], bytes]:
+    def read() -> bytes:
+        fileobj.seek(0)
+        return fileobj.read()
+    return read
+
+
+def _upload_size(fileobj: BinaryIO) -> int:
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+def _read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Callable[[], bytes]:
+    return lambda: archive.read(info)
+
+
+def collect_batch_items(uploads, max_items: int, max_item_bytes: int,
+                        max_total_bytes: Optional[int] = None) -> List[BatchItem]:
+    """
+    List the documents in a batch without reading their contents.
+
+    Args:
+        uploads: sequence of (filename, content_type, file object) tuples
+        max_items: maximum number of documents across all uploads
+        max_item_bytes: maximum uncompressed size of one ZIP member
+        max_total_bytes: maximum size of all documents together, ZIP
+            members counted uncompressed (None: no limit)
+
+    Raises:
+        BatchTooLarge: when the documents add up to more than max_total_bytes
+        BatchError: on a corrupt archive or when other limits are exceeded
+    """
+    items: List[BatchItem] = []
+    total = 0
+
+    def add(filename: str, content_type: Optional[str], read: Callable[[], bytes], size: int):
+        nonlocal total
+        if len(items) >= max_items:
+            raise BatchError(f"Batch exceeds the limit of {max_items} documents")
+        total += size
+        if max_total_bytes is not None and total > max_total_bytes:
+            raise BatchTooLarge(f"Batch documents exceed {max_total_bytes} bytes in total")
+        items.append(BatchItem(len(items), filename, content_type, read))
+
+    for filename, content_type, fileobj in uploads:
+        if not is_zip_upload(filename, content_type):
+            add(filename, content_type, _read_upload(fileobj), _upload_size(fileobj))
+            continue
+
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile:
+            raise BatchError(f"'{filename}' is not a valid ZIP archive")
+
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            # Skip directories and OS metadata such as __MACOSX/._foo.png
+            if info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+                continue
+            if info.file_size > max_item_bytes:
+                raise BatchError(f"'{info.filename}' in '{filename}' exceeds {max_item_bytes} bytes")
+            add(info.filename, guess_content_type(name), _read_member(archive, info), info.file_size)
+
+    return items
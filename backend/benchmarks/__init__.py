@@ -0,0 +1,7 @@
+"""
+Benchmarks Package
+Synthetic documents with ground truth, per-stage OCR timings and field accuracy
+
+    cd backend && python -m benchmarks.run --output results.json
+    python -m benchmarks.compare before.json after.json
+"""
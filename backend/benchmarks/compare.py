@@ -0,0 +1,79 @@
+"""
+Benchmark Comparison
+Diffs two benchmark reports stage by stage
+
+    cd backend && python -m benchmarks.compare before.json after.json --fail-above 10
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+
+def _load(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def compare(before: Dict, after: Dict) -> List[Dict]:
+    """Median latency per stage (and the page total) in both reports, with % change"""
+    rows = []
+    stages_before = before["summary"]["stages"]
+    stages_after = after["summary"]["stages"]
+    for stage in sorted(set(stages_before) | set(stages_after)):
+        old = stages_before.get(stage, {}).get("median_ms")
+        new = stages_after.get(stage, {}).get("median_ms")
+        rows.append({"stage": stage, "before_ms": old, "after_ms": new, "change_pct": _change(old, new)})
+
+    old_total = (before["summary"].get("page_total") or {}).get("median_ms")
+    new_total = (after["summary"].get("page_total") or {}).get("median_ms")
+    rows.append({"stage": "page total", "before_ms": old_total, "after_ms": new_total,
+                 "change_pct": _change(old_total, new_total)})
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--fail-above", type=float, default=None,
+                        help="exit 1 if the page total got slower by more than this many percent, "
+                             "or field accuracy dropped")
+    args = parser.parse_args(argv)
+
+    before, after = _load(args.before), _load(args.after)
+    print(f"before: {before['environment'].get('git_revision')}  after: {after['environment'].get('git_revision')}")
+    print(f"{'stage':<28}{'before ms':>12}{'after ms':>12}{'change':>10}")
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-"
+
+    rows = compare(before, after)
+    for row in rows:
+        change = fmt(row["change_pct"], "+.1f") + ("%" if row["change_pct"] is not None else "")
+        print(f"{row['stage']:<28}{fmt(row['before_ms'], '.2f'):>12}{fmt(row['after_ms'], '.2f'):>12}{change:>10}")
+
+    old_accuracy = before["summary"]["field_accuracy"]
+    new_accuracy = after["summary"]["field_accuracy"]
+    print(f"\nfield accuracy: {old_accuracy} -> {new_accuracy}")
+
+    if args.fail_above is not None:
+        total_change = rows[-1]["change_pct"]
+        if total_change is not None and total_change > args.fail_above:
+            print(f"FAIL: page total {total_change:+.1f}% slower", file=sys.stderr)
+            return 1
+        if old_accuracy is not None and new_accuracy is not None and new_accuracy < old_accuracy:
+            print("FAIL: field accuracy dropped", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
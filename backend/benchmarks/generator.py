@@ -0,0 +1,165 @@
+"""
+Synthetic Document Generator
+Renders ID cards, forms and multi-page PDFs with known fields at known resolutions
+"""
+
+import random
+from io import BytesIO
+from typing import Dict, List, NamedTuple, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+import fitz  # PyMuPDF
+
+FIRST_NAMES = ["Aarav", "Priya", "John", "Maria", "Wei", "Fatima", "Liam", "Ananya", "Carlos", "Sofia"]
+LAST_NAMES = ["Sharma", "Doe", "Garcia", "Chen", "Khan", "Smith", "Patel", "Rossi", "Singh", "Kim"]
+COURSES = ["B.Sc Computer Science", "B.A English", "B.Com Honours", "M.Sc Physics", "B.Tech Mechanical"]
+STREETS = ["MG Road", "Park Street", "Main Street", "Lake View Road", "Station Road"]
+CITIES = ["Delhi", "Mumbai", "Pune", "Chennai", "Kolkata"]
+
+
+class SyntheticDocument(NamedTuple):
+    name: str
+    kind: str  # id_card, form or pdf
+    document_type: str  # passed to field extraction
+    content_type: str
+    data: bytes
+    fields: Dict[str, str]  # ground truth, keyed like FieldExtractor output
+    dpi: int
+    pages: int
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def _person(rng: random.Random) -> Dict[str, str]:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "name": f"{first} {last}",
+        "father_name": f"{rng.choice(FIRST_NAMES)} {last}",
+        "roll_no": f"{rng.randint(10, 29)}/{rng.randint(10000, 99999)}",
+        "class": rng.choice(COURSES),
+        "dob": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1990, 2006)}",
+        "phone": f"+91 {rng.randint(70000, 99999)} {rng.randint(10000, 99999)}",
+        "email": f"{first.lower()}.{last.lower()}@example.com",
+        "address": f"{rng.randint(1, 200)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+        "gender": rng.choice(["Male", "Female"]),
+    }
+
+
+def _render_lines(size_px: Tuple[int, int], lines: List[str], font_px: int, top: int, left: int,
+                  header: str = None) -> Image.Image:
+    image = Image.new("RGB", size_px, "white")
+    draw = ImageDraw.Draw(image)
+    y = top
+    if header:
+        draw.text((left, y), header, fill="black", font=_font(int(font_px * 1.4)))
+        y += int(font_px * 2.6)
+    font = _font(font_px)
+    for line in lines:
+        draw.text((left, y), line, fill="black", font=font)
+        y += int(font_px * 1.7)
+    return image
+
+
+def _encode(image: Image.Image, fmt: str, dpi: int) -> bytes:
+    buffer = BytesIO()
+    if fmt == "JPEG":
+        image.save(buffer, fmt, quality=90, dpi=(dpi, dpi))
+    else:
+        image.save(buffer, fmt, dpi=(dpi, dpi))
+    return buffer.getvalue()
+
+
+def render_id_card(rng: random.Random, dpi: int = 300, fmt: str = "PNG") -> SyntheticDocument:
+    """CR80-sized card (3.37in x 2.125in) with labeled lines, 9pt text"""
+    person = _person(rng)
+    fields = {k: person[k] for k in ("name", "roll_no", "class", "dob", "phone")}
+    size = (round(3.37 * dpi), round(2.125 * dpi))
+    font_px = round(9 / 72 * dpi)
+    lines = [
+        f"Name: {fields['name']}",
+        f"Roll No: {fields['roll_no']}",
+        f"Class: {fields['class']}",
+        f"Date of Birth: {fields['dob']}",
+        f"Phone: {fields['phone']}",
+    ]
+    image = _render_lines(size, lines, font_px, top=round(0.12 * dpi), left=round(0.15 * dpi),
+                          header="STUDENT IDENTITY CARD")
+    content_type = "image/jpeg" if fmt == "JPEG" else "image/png"
+    return SyntheticDocument(f"id_card_{dpi}dpi_{fmt.lower()}", "id_card", "id_card", content_type,
+                             _encode(image, fmt, dpi), fields, dpi, 1)
+
+
+def render_form(rng: random.Random, dpi: int = 300, fmt: str = "PNG") -> SyntheticDocument:
+    """US-letter application form with labeled fields, 12pt text"""
+    person = _person(rng)
+    fields = {k: person[k] for k in ("name", "father_name", "dob", "gender", "address", "phone", "email")}
+    size = (round(8.5 * dpi), round(11 * dpi))
+    font_px = round(12 / 72 * dpi)
+    lines = [
+        f"Name: {fields['name']}",
+        f"Father's Name: {fields['father_name']}",
+        f"Date of Birth: {fields['dob']}",
+        f"Gender: {fields['gender']}",
+        f"Address: {fields['address']}",
+        f"Phone: {fields['phone']}",
+        f"Email: {fields['email']}",
+        "",
+        "I declare that the information given above is true to the best of my knowledge.",
+    ]
+    image = _render_lines(size, lines, font_px, top=dpi, left=dpi, header="APPLICATION FORM")
+    content_type = "image/jpeg" if fmt == "JPEG" else "image/png"
+    return SyntheticDocument(f"form_{dpi}dpi_{fmt.lower()}", "form", "form", content_type,
+                             _encode(image, fmt, dpi), fields, dpi, 1)
+
+
+def render_pdf(rng: random.Random, pages: int = 3, scanned: bool = True, dpi: int = 200) -> SyntheticDocument:
+    """
+    Multi-page A4 PDF whose first page is a form.
+
+    scanned=True embeds each page as an image (the OCR path); otherwise the
+    text is real PDF text (the text-layer path). Ground truth is page 1.
+    """
+    doc = fitz.open()
+    fields = {}
+    for page_index in range(pages):
+        form = render_form(rng, dpi=dpi, fmt="JPEG")
+        if page_index == 0:
+            fields = form.fields
+        page = doc.new_page(width=595, height=842)
+        if scanned:
+            page.insert_image(page.rect, stream=form.data)
+        else:
+            y = 72
+            for label, key in (("Name", "name"), ("Father's Name", "father_name"), ("Date of Birth", "dob"),
+                               ("Gender", "gender"), ("Address", "address"), ("Phone", "phone"),
+                               ("Email", "email")):
+                page.insert_text((72, y), f"{label}: {form.fields[key]}", fontsize=12)
+                y += 20
+    data = doc.tobytes()
+    doc.close()
+    kind = "scanned" if scanned else "digital"
+    return SyntheticDocument(f"pdf_{kind}_{pages}p", "pdf", "form", "application/pdf", data, fields, dpi, pages)
+
+
+def generate_corpus(seed: int = 0, quick: bool = False) -> List[SyntheticDocument]:
+    """
+    The standard benchmark set. The same seed always yields the same bytes
+    (for a given Pillow/PyMuPDF version), so runs are comparable.
+    """
+    rng = random.Random(seed)
+    if quick:
+        return [render_id_card(rng, 300), render_form(rng, 150), render_pdf(rng, pages=2)]
+    return [
+        render_id_card(rng, 150),
+        render_id_card(rng, 300),
+        render_id_card(rng, 600, fmt="JPEG"),
+        render_form(rng, 150),
+        render_form(rng, 300, fmt="JPEG"),
+        render_pdf(rng, pages=3, scanned=True),
+        render_pdf(rng, pages=3, scanned=False),
+    ]
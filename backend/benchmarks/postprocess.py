@@ -0,0 +1,113 @@
+"""
+Post-processing Benchmark
+Times the compiled rule engine against the legacy post_process_ocr_text on large texts
+
+    cd backend && python -m benchmarks.postprocess --pages 2000 --repeat 5
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from postprocess import PostProcessor
+
+
+def legacy_post_process(text: str) -> str:
+    """post_process_ocr_text as it was before the rule engine, kept for comparison"""
+    text = re.sub(r'(?<=[.!?\n]\s)\|(?=\s)', 'I', text)
+    text = re.sub(r'^\|(?=\s)', 'I', text, flags=re.MULTILINE)
+    text = re.sub(r'\|\s', 'I ', text)
+    text = re.sub(r'\|\'', 'I\'', text)
+
+    common_fixes = {
+        r'\bcan\'t\b': 'can\'t',
+        r'\bdon\'t\b': 'don\'t',
+        r'\bhave\b': 'have',
+        r'\bwas\b': 'was',
+    }
+    for pattern, replacement in common_fixes.items():
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+
+    text = re.sub(r' {2,}', ' ', text)
+    text = re.sub(r'\s+([.,!?;:])', r'\1', text)
+    text = re.sub(r'([.,!?;:])(?=[A-Za-z])', r'\1 ', text)
+    return text.strip()
+
+
+_WORDS = ("name", "date", "of", "birth", "address", "the", "was", "have", "Can't", "don't", "Roll", "No",
+          "issued", "valid", "until", "Republic", "signature", "holder", "12/05/2001", "24/94076")
+
+
+def synthetic_page(rng: random.Random, lines: int = 40) -> str:
+    """OCR-like page text with the errors the rules target: stray pipes, bad spacing, double spaces"""
+    out = []
+    for _ in range(lines):
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(4, 12))]
+        if rng.random() < 0.15:
+            words.insert(0, "|")
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words)), "|'ve")
+        line = " ".join(words)
+        if rng.random() < 0.3:
+            line = line.replace(" ", "  ", 2)
+        if rng.random() < 0.3:
+            line += rng.choice([" .", " ,", ".Next", " :value", "!"])
+        out.append(line)
+    return "\n".join(out)
+
+
+def _time(fn: Callable[[str], str], text: str, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(pages: int, repeat: int, language: str, seed: int = 0) -> Dict:
+    rng = random.Random(seed)
+    text = "\n\n".join(synthetic_page(rng) for _ in range(pages))
+    processor = PostProcessor(rules_file=None)
+    engine = lambda value: processor.process(value, language)  # noqa: E731
+    engine(text[:1000])  # Build the rule set outside the timed runs
+
+    legacy = statistics.median(_time(legacy_post_process, text, repeat))
+    compiled = statistics.median(_time(engine, text, repeat))
+
+    # The legacy common_fixes lowercased "Have", "WAS", "Can't"...; compare
+    # case-insensitively so only real behaviour differences show up
+    legacy_out, engine_out = legacy_post_process(text), engine(text)
+    same = legacy_out.lower() == engine_out.lower()
+    return {
+        "language": language,
+        "chars": len(text),
+        "legacy_ms": round(legacy * 1000, 2),
+        "engine_ms": round(compiled * 1000, 2),
+        "speedup": round(legacy / compiled, 2) if compiled else None,
+        "same_output_ignoring_case": same,
+        "whitespace_only_differences": same or re.sub(r'\s+', ' ', legacy_out.lower()) == re.sub(
+            r'\s+', ' ', engine_out.lower()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark OCR text post-processing")
+    parser.add_argument("--pages", type=int, default=500, help="synthetic pages of ~40 lines")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--language", action="append", help="language spec(s) to run (default: eng, hin)")
+    args = parser.parse_args(argv)
+
+    for language in args.language or ["eng", "hin"]:
+        result = run(args.pages, args.repeat, language)
+        print(f"{language:<10}{result['chars']:>12,} chars  legacy {result['legacy_ms']:>9.2f} ms  "
+              f"engine {result['engine_ms']:>9.2f} ms  x{result['speedup']}  "
+              f"same output (ignoring case): {result['same_output_ignoring_case']}, "
+              f"(and whitespace): {result['whitespace_only_differences']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Benchmark Runner
+Times every OCR stage on the synthetic corpus and scores extracted fields
+
+    cd backend && python -m benchmarks.run --repeat 5 --output bench.json
+
+Pages go through the same entry points as the API (extract_document_fields,
+or ocr_document with --entry-point ocr), so what is timed is what is served.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import pytesseract
+
+from ocr_pipeline import PIPELINE_VERSION, extract_document_fields, ocr_document
+from pdf_pages import count_pages
+
+from benchmarks.generator import SyntheticDocument, generate_corpus
+
+# Settings that change what is measured; recorded with every run
+CONFIG_ENV = (
+    "OCR_BINARIZATION", "OCR_ORIENTATION", "OCR_TARGET_TEXT_HEIGHT", "OCR_MAX_PIXELS", "OCR_PDF_MAX_DPI",
+)
+
+
+
+def run_page(document: SyntheticDocument, page_number: int, language: str, entry_point: str = "extract") -> Dict:
+    """
+    One pass of a production entry point over one page: extract_document_fields
+    (the field-extraction endpoint) or ocr_document (the OCR endpoint).
+
+    Stage times are the ones the pipeline reports in metadata["timings_ms"];
+    the total is the wall time of the whole call.
+
+    Returns:
+        {"timings": {stage: seconds}, "total": seconds, "fields": {...}, "engine": ..., "pixels": ...}
+    """
+    start = time.perf_counter()
+    if entry_point == "ocr":
+        result = ocr_document(document.data, document.content_type, language, page_number=page_number)
+    else:
+        result = extract_document_fields(document.data, document.content_type, document.document_type, language,
+                                         page_number=page_number)
+    total = time.perf_counter() - start
+
+    metadata = result.get("metadata", {})
+    return {
+        "timings": {stage: ms / 1000 for stage, ms in metadata.get("timings_ms", {}).items()},
+        "total": total,
+        "fields": result.get("fields", {}),
+        "engine": result.get("engine"),
+        "pixels": metadata.get("pixels"),
+    }
+
+
+def _normalize_value(value: str) -> str:
+    return ' '.join(str(value).split()).casefold()
+
+
+def score_fields(expected: Dict[str, str], extracted: Dict[str, str]) -> Dict[str, bool]:
+    """Exact match per ground-truth field, ignoring case and whitespace"""
+    return {
+        field: field in extracted and _normalize_value(extracted[field]) == _normalize_value(value)
+        for field, value in expected.items()
+    }
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+        "n": len(samples),
+    }
+
+
+def benchmark_document(document: SyntheticDocument, language: str, repeat: int, warmup: int,
+                       entry_point: str = "extract") -> Dict:
+    """Median stage timings over `repeat` runs of every page, plus page-1 field accuracy"""
+    page_count = count_pages(document.data) if document.content_type == "application/pdf" else 1
+    pages = []
+    first_page_fields = {}
+    for page_number in range(page_count):
+        for _ in range(warmup):
+            run_page(document, page_number, language, entry_point)
+        runs = [run_page(document, page_number, language, entry_point) for _ in range(repeat)]
+
+        stages = sorted({stage for run in runs for stage in run["timings"]})
+        timings = {stage: statistics.median(run["timings"].get(stage, 0.0) for run in runs) for stage in stages}
+        total = statistics.median(run["total"] for run in runs)
+        pages.append({
+            "page": page_number + 1,
+            "engine": runs[0]["engine"],
+            "pixels": runs[0]["pixels"],
+            "timings_ms": {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()},
+            "total_ms": round(total * 1000, 3),
+        })
+        if page_number == 0:
+            first_page_fields = runs[0]["fields"]
+
+    # ocr_document extracts no fields: only timings are reported
+    matches = score_fields(document.fields, first_page_fields) if entry_point == "extract" else {}
+    return {
+        "name": document.name,
+        "kind": document.kind,
+        "document_type": document.document_type,
+        "bytes": len(document.data),
+        "dpi": document.dpi,
+        "pages": pages,
+        "fields": {
+            "expected": document.fields,
+            "extracted": first_page_fields,
+            "matched": matches,
+            "accuracy": round(sum(matches.values()) / len(matches), 4) if matches else None,
+        },
+    }
+
+
+def summarize(documents: List[Dict]) -> Dict:
+    """Per-stage latency over all pages and field accuracy over all documents"""
+    stage_samples: Dict[str, List[float]] = {}
+    totals = []
+    for document in documents:
+        for page in document["pages"]:
+            totals.append(page["total_ms"] / 1000)
+            for stage, ms in page["timings_ms"].items():
+                stage_samples.setdefault(stage, []).append(ms / 1000)
+
+    per_field: Dict[str, Dict[str, int]] = {}
+    for document in documents:
+        for field, matched in document["fields"]["matched"].items():
+            counts = per_field.setdefault(field, {"correct": 0, "total": 0})
+            counts["total"] += 1
+            counts["correct"] += int(matched)
+    correct = sum(c["correct"] for c in per_field.values())
+    total = sum(c["total"] for c in per_field.values())
+
+    return {
+        "stages": {stage: _summarize(samples) for stage, samples in sorted(stage_samples.items())},
+        "page_total": _summarize(totals) if totals else None,
+        "field_accuracy": round(correct / total, 4) if total else None,
+        "fields": {
+            field: {**counts, "accuracy": round(counts["correct"] / counts["total"], 4)}
+            for field, counts in sorted(per_field.items())
+        },
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return revision + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info(seed: int, language: str, repeat: int, entry_point: str) -> Dict:
+    try:
+        tesseract_version = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract_version = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "pipeline_version": PIPELINE_VERSION,
+        "tesseract_version": tesseract_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "language": language,
+        "repeat": repeat,
+        "entry_point": entry_point,
+        "config": {name: os.environ.get(name) for name in CONFIG_ENV},
+    }
+
+
+def run_benchmark(seed: int = 0, language: str = "eng", repeat: int = 3, warmup: int = 1,
+                  quick: bool = False, only: Optional[str] = None, entry_point: str = "extract") -> Dict:
+    corpus = generate_corpus(seed, quick=quick)
+    if only:
+        corpus = [document for document in corpus if only in document.name]
+    documents = []
+    for document in corpus:
+        print(f"  {document.name} ...", file=sys.stderr, flush=True)
+        documents.append(benchmark_document(document, language, repeat, warmup, entry_point))
+    return {
+        "environment": environment_info(seed, language, repeat, entry_point),
+        "summary": summarize(documents),
+        "documents": documents,
+    }
+
+
+def print_summary(report: Dict):
+    summary = report["summary"]
+    print(f"{'stage':<28}{'median ms':>12}{'p95 ms':>12}{'n':>6}")
+    for stage, stats in summary["stages"].items():
+        print(f"{stage:<28}{stats['median_ms']:>12.2f}{stats['p95_ms']:>12.2f}{stats['n']:>6}")
+    if summary["page_total"]:
+        total = summary["page_total"]
+        print(f"{'page total':<28}{total['median_ms']:>12.2f}{total['p95_ms']:>12.2f}{total['n']:>6}")
+    print(f"\nfield accuracy: {summary['field_accuracy']}")
+    for field, counts in summary["fields"].items():
+        print(f"  {field:<14}{counts['correct']}/{counts['total']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OCR pipeline on synthetic documents")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--language", default="eng")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per page (median is reported)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per page")
+    parser.add_argument("--quick", action="store_true", help="small corpus for a fast smoke run")
+    parser.add_argument("--only", help="only documents whose name contains this")
+    parser.add_argument("--entry-point", choices=("extract", "ocr"), default="extract",
+                        help="extract_document_fields (scores fields) or ocr_document (timings only)")
+    parser.add_argument("--output", help="write the full JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.seed, args.language, args.repeat, args.warmup, args.quick, args.only,
+                           args.entry_point)
+    print_summary(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
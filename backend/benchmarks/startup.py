@@ -0,0 +1,121 @@
+"""
+Startup Benchmark
+Times `import server` and how long a fresh server takes to answer its health checks
+
+    cd backend && python -m benchmarks.startup --repeat 5 --target 2.0
+
+Servers are started without MONGO_URL (unless --keep-env) so only this
+process's own startup is measured. Exits non-zero when the median time to
+the first healthy /api/health/live response is over --target seconds.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def server_env(keep_env: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    if not keep_env:
+        env.pop("MONGO_URL", None)
+        env.pop("DB_NAME", None)
+    return env
+
+
+def time_import(env: Dict[str, str]) -> float:
+    """Seconds for `import server` in a fresh interpreter, as reported by -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rstrip().endswith("| server"):
+            return int(line.split("|")[1]) / 1e6
+    raise RuntimeError("server import not found in -X importtime output")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, deadline: float) -> Optional[float]:
+    """Poll url until it answers 200; the time it did, or None past the deadline"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def time_server(env: Dict[str, str], timeout: float) -> Dict[str, Optional[float]]:
+    """Seconds from spawning uvicorn to the first 200 from /api/health/live and /api/health/ready"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}/api/health"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        live = wait_for(f"{base}/live", deadline)
+        ready = wait_for(f"{base}/ready", deadline) if live is not None else None
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {
+        "live": live - start if live is not None else None,
+        "ready": ready - start if ready is not None else None,
+    }
+
+
+def _median(samples: List[Optional[float]]) -> Optional[float]:
+    measured = [sample for sample in samples if sample is not None]
+    return statistics.median(measured) if len(measured) == len(samples) else None
+
+
+def _format(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:8.0f} ms" if seconds is not None else "   timeout"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark server import and startup time")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--target", type=float, default=2.0,
+                        help="seconds allowed to the first healthy /api/health/live response")
+    parser.add_argument("--timeout", type=float, default=60.0, help="give up on a server after this many seconds")
+    parser.add_argument("--keep-env", action="store_true", help="keep MONGO_URL / DB_NAME for the servers")
+    args = parser.parse_args(argv)
+
+    env = server_env(args.keep_env)
+    imports = [time_import(env) for _ in range(args.repeat)]
+    runs = [time_server(env, args.timeout) for _ in range(args.repeat)]
+    live = _median([run["live"] for run in runs])
+    ready = _median([run["ready"] for run in runs])
+
+    print(f"import server     {_format(statistics.median(imports))}")
+    print(f"first live 200    {_format(live)}")
+    print(f"first ready 200   {_format(ready)}")
+    if live is None or live > args.target:
+        print(f"over target: first healthy response must come within {args.target:.1f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
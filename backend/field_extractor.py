@@ -4,126 +4,184 @@ Extracts structured data from OCR text using pattern matching and NER
 """
 
 import re
-from typing import Dict, Optional, List, Tuple
+import json
+import os
+import tempfile
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Optional, List, Tuple, Mapping, NamedTuple
 from datetime import datetime
-from dateutil import parser as date_parser
 import logging
 
-# Optional phonenumbers import
-try:
-    import phonenumbers
-    PHONENUMBERS_AVAILABLE = True
-except ImportError:
-    PHONENUMBERS_AVAILABLE = False
-    logging.warning("phonenumbers library not installed, phone validation will be limited")
+from keyword_matcher import KeywordIndex
+from validators import default_phone_region, format_phone, is_date, normalize_date
 
 logger = logging.getLogger(__name__)
 
 
+# Common patterns for field detection
+FIELD_PATTERNS = {
+    'email': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    'phone': re.compile(r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'),
+    'date': re.compile(r'\b(?:\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{4}[-/]\d{1,2}[-/]\d{1,2})\b'),
+    'id_number': re.compile(r'\b[A-Z0-9]{6,15}\b'),
+    'postal_code': re.compile(r'\b\d{5,6}\b'),
+    'number': re.compile(r'\b\d+\b'),
+}
+
+# Default Field keywords (read-only; custom patterns are merged into copies)
+DEFAULT_KEYWORDS = {
+    'name': [
+        'name', 'full name', 'nombre', 'apellido', 'student name', 'name of student', 
+        'candidate name', 'name of candidate', 'holder name', 'name of holder', 
+        'first name', 'given name', 'surname', 'last name',
+        'applicant', 'signed by', 'attn', 'to the attention of', 'in the matter of'
+    ],
+    'role': [
+        'job title', 'position', 'role', 'designated as', 'the parties herein'
+    ],
+    'organization': [
+        'company', 'firm name', 'organization', 'on behalf of', 'represented by'
+    ],
+    'father_name': [
+        'father', 'father name', 'fathers name', 'father\'s name', 's/o', 'son of', 
+        'guardian', 'guardian name', 'parent'
+    ],
+    'mother_name': [
+        'mother', 'mother name', 'mothers name', 'mother\'s name', 'd/o', 'daughter of'
+    ],
+    'roll_no': [
+        'roll no', 'roll number', 'roll', 'enrollment', 'enrollment no', 'enrolment no',
+        'reg no', 'register no', 'registration no', 'registration number', 'reg. no',
+        'scholar no', 'scholar number', 'admission no', 'admn no', 'serial no', 
+        'unique id', 'uid', 'student id', 'id no', 'matricule', 'hall ticket no'
+    ],
+    'id_number': [
+        'id', 'identification', 'document number', 'license', 'license no', 'dl no',
+        'passport', 'passport no', 'card no', 'identity card no', 'aadhaar', 'pan',
+        'case number', 'reference no', 'policy id', 'file', 'acct', 'account'
+    ],
+    'class': [
+        'class', 'course', 'programme', 'prog', 'stream', 'branch', 'standard', 'std',
+        'year', 'semester', 'sem', 'degree', 'qualification'
+    ],
+    'admission_year': [
+        'admn y', 'admission year', 'year of admission', 'admn year', 'date of admission',
+        'joining date', 'session', 'batch'
+    ],
+    'dob': [
+        'date of birth', 'dob', 'birth date', 'born', 'born on', 'fecha de nacimiento', 
+        'd.o.b', 'd.o.birth', 'birth'
+    ],
+    'effective_date': [
+        'dated', 'effective', 'commencement date', 'this agreement is made on', 'as of', 'signed this'
+    ],
+    'expiry_date': [
+        'expires on', 'termination date', 'valid until', 'date due', 'date of payment', 'expiry', 'expiration'
+    ],
+    'document_date': [
+        'date', 'submitted on', 'issued'
+    ],
+    'address': [
+        'address', 'street', 'city', 'state', 'dirección', 'residence', 'residential address',
+        'permanent address', 'correspondence address', 'place of residence', 'domicile',
+        'location', 'premises', 'to', 'zip code', 'postal code'
+    ],
+    'phone': [
+        'phone', 'telephone', 'mobile', 'cell', 'teléfono', 'contact', 'contact no', 'mob', 'tel', 'fax'
+    ],
+    'email': [
+        'email', 'e-mail', 'correo', 'mail', 'email id'
+    ],
+    'amount': [
+        'total', 'amount due', 'balance', 'sum of', 'consideration', 'total contract value'
+    ],
+    'currency': [
+        'usd', 'gbp', 'eur', 'currency'
+    ],
+    'payment_terms': [
+        'payment', 'terms', 'due within', 'net 30'
+    ],
+    'gender': [
+        'gender', 'sex', 'sexo'
+    ],
+    'blood_group': [
+        'blood group', 'bg', 'b.g.', 'blood'
+    ]
+}
+
+
+# How often (seconds) an extractor checks custom_patterns.json for changes
+# made by another process
+PATTERN_CHECK_INTERVAL = 2.0
+
+
+class PatternState(NamedTuple):
+    """Immutable keyword state; replaced wholesale, never modified in place"""
+    version: int
+    field_keywords: Mapping[str, Tuple[str, ...]]
+    index: KeywordIndex
+    source_mtime: Optional[float]
+
+
 class FieldExtractor:
-    """Extract structured fields from OCR text"""
+    """
+    Extract structured fields from OCR text.
+
+    Keyword state (defaults merged with custom_patterns.json, plus the
+    compiled keyword index) is an immutable PatternState. Training a pattern
+    builds a new state and swaps it in atomically; changes written by other
+    processes are picked up by watching the file's mtime. Use
+    get_field_extractor() for the shared per-process instance.
+    """
     
     def __init__(self, custom_patterns_path: str = "custom_patterns.json"):
-        # Common patterns for field detection
-        self.patterns = {
-            'email': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
-            'phone': re.compile(r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'),
-            'date': re.compile(r'\b(?:\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{4}[-/]\d{1,2}[-/]\d{1,2})\b'),
-            'id_number': re.compile(r'\b[A-Z0-9]{6,15}\b'),
-            'postal_code': re.compile(r'\b\d{5,6}\b'),
-            'number': re.compile(r'\b\d+\b'),
-        }
-        
-        # Default Field keywords
-        self.default_keywords = {
-            'name': [
-                'name', 'full name', 'nombre', 'apellido', 'student name', 'name of student', 
-                'candidate name', 'name of candidate', 'holder name', 'name of holder', 
-                'first name', 'given name', 'surname', 'last name',
-                'applicant', 'signed by', 'attn', 'to the attention of', 'in the matter of'
-            ],
-            'role': [
-                'job title', 'position', 'role', 'designated as', 'the parties herein'
-            ],
-            'organization': [
-                'company', 'firm name', 'organization', 'on behalf of', 'represented by'
-            ],
-            'father_name': [
-                'father', 'father name', 'fathers name', 'father\'s name', 's/o', 'son of', 
-                'guardian', 'guardian name', 'parent'
-            ],
-            'mother_name': [
-                'mother', 'mother name', 'mothers name', 'mother\'s name', 'd/o', 'daughter of'
-            ],
-            'roll_no': [
-                'roll no', 'roll number', 'roll', 'enrollment', 'enrollment no', 'enrolment no',
-                'reg no', 'register no', 'registration no', 'registration number', 'reg. no',
-                'scholar no', 'scholar number', 'admission no', 'admn no', 'serial no', 
-                'unique id', 'uid', 'student id', 'id no', 'matricule', 'hall ticket no'
-            ],
-            'id_number': [
-                'id', 'identification', 'document number', 'license', 'license no', 'dl no',
-                'passport', 'passport no', 'card no', 'identity card no', 'aadhaar', 'pan',
-                'case number', 'reference no', 'policy id', 'file', 'acct', 'account'
-            ],
-            'class': [
-                'class', 'course', 'programme', 'prog', 'stream', 'branch', 'standard', 'std',
-                'year', 'semester', 'sem', 'degree', 'qualification'
-            ],
-            'admission_year': [
-                'admn y', 'admission year', 'year of admission', 'admn year', 'date of admission',
-                'joining date', 'session', 'batch'
-            ],
-            'dob': [
-                'date of birth', 'dob', 'birth date', 'born', 'born on', 'fecha de nacimiento', 
-                'd.o.b', 'd.o.birth', 'birth'
-            ],
-            'effective_date': [
-                'dated', 'effective', 'commencement date', 'this agreement is made on', 'as of', 'signed this'
-            ],
-            'expiry_date': [
-                'expires on', 'termination date', 'valid until', 'date due', 'date of payment', 'expiry', 'expiration'
-            ],
-            'document_date': [
-                'date', 'submitted on', 'issued'
-            ],
-            'address': [
-                'address', 'street', 'city', 'state', 'dirección', 'residence', 'residential address',
-                'permanent address', 'correspondence address', 'place of residence', 'domicile',
-                'location', 'premises', 'to', 'zip code', 'postal code'
-            ],
-            'phone': [
-                'phone', 'telephone', 'mobile', 'cell', 'teléfono', 'contact', 'contact no', 'mob', 'tel', 'fax'
-            ],
-            'email': [
-                'email', 'e-mail', 'correo', 'mail', 'email id'
-            ],
-            'amount': [
-                'total', 'amount due', 'balance', 'sum of', 'consideration', 'total contract value'
-            ],
-            'currency': [
-                'usd', 'gbp', 'eur', 'currency'
-            ],
-            'payment_terms': [
-                'payment', 'terms', 'due within', 'net 30'
-            ],
-            'gender': [
-                'gender', 'sex', 'sexo'
-            ],
-            'blood_group': [
-                'blood group', 'bg', 'b.g.', 'blood'
-            ]
-        }
-        
+        self.patterns = FIELD_PATTERNS
+        self.default_keywords = DEFAULT_KEYWORDS
         self.custom_patterns_path = custom_patterns_path
-        self.field_keywords = self._load_patterns()
+
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._state = self._build_state(version=1)
+
+    @property
+    def version(self) -> int:
+        """Pattern-set version, incremented whenever the keywords change"""
+        return self._current_state().version
+
+    @property
+    def field_keywords(self) -> Dict[str, List[str]]:
+        """Current keywords per field (a copy; edit via save_custom_pattern)"""
+        return {field: list(kws) for field, kws in self._current_state().field_keywords.items()}
+
+    def _source_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.custom_patterns_path).st_mtime
+        except OSError:
+            return None
+
+    def _build_state(self, version: int) -> PatternState:
+        mtime = self._source_mtime()
+        keywords = {field: tuple(kws) for field, kws in self._load_patterns().items()}
+        return PatternState(version, MappingProxyType(keywords), KeywordIndex(keywords), mtime)
+
+    def _current_state(self) -> PatternState:
+        """State for this call, reloading first if another process changed the file"""
+        now = time.monotonic()
+        if now - self._last_check >= PATTERN_CHECK_INTERVAL:
+            self._last_check = now
+            if self._source_mtime() != self._state.source_mtime:
+                with self._lock:
+                    if self._source_mtime() != self._state.source_mtime:
+                        self._state = self._build_state(self._state.version + 1)
+                        logger.info(f"Reloaded custom patterns (version {self._state.version})")
+        return self._state
 
     def _load_patterns(self) -> Dict[str, List[str]]:
         """Load patterns merging defaults with custom ones"""
-        import json
-        import os
-        
-        keywords = self.default_keywords.copy()
+        # Fresh lists so merging never touches DEFAULT_KEYWORDS
+        keywords = {field: list(kws) for field, kws in self.default_keywords.items()}
         
         if os.path.exists(self.custom_patterns_path):
             try:
@@ -135,7 +193,7 @@ class FieldExtractor:
                             # Add unique new keywords
                             keywords[field].extend([k for k in kws if k not in keywords[field]])
                         else:
-                            keywords[field] = kws
+                            keywords[field] = list(kws)
                 logging.info(f"Loaded custom patterns from {self.custom_patterns_path}")
             except Exception as e:
                 logging.error(f"Failed to load custom patterns: {e}")
@@ -143,40 +201,39 @@ class FieldExtractor:
         return keywords
 
     def save_custom_pattern(self, field: str, keyword: str) -> bool:
-        """Add a new keyword to a field and save it"""
-        import json
-        import os
-        
+        """Add a new keyword to a field, save it and swap in the new state"""
         field = field.lower()
         keyword = keyword.lower()
         
-        # Update in-memory
-        if field not in self.field_keywords:
-            self.field_keywords[field] = []
-        
-        if keyword not in self.field_keywords[field]:
-            self.field_keywords[field].append(keyword)
-        
-        # Save to file
-        try:
-            current_custom = {}
-            if os.path.exists(self.custom_patterns_path):
-                with open(self.custom_patterns_path, 'r') as f:
-                    current_custom = json.load(f)
-            
-            if field not in current_custom:
-                current_custom[field] = []
-            
-            if keyword not in current_custom[field]:
-                current_custom[field].append(keyword)
+        with self._lock:
+            # Save to file
+            try:
+                current_custom = {}
+                if os.path.exists(self.custom_patterns_path):
+                    with open(self.custom_patterns_path, 'r') as f:
+                        current_custom = json.load(f)
                 
-            with open(self.custom_patterns_path, 'w') as f:
-                json.dump(current_custom, f, indent=2)
+                if field not in current_custom:
+                    current_custom[field] = []
+                
+                if keyword not in current_custom[field]:
+                    current_custom[field].append(keyword)
+                
+                # Write to a temp file and rename, so other processes never
+                # read a half-written file
+                directory = os.path.dirname(os.path.abspath(self.custom_patterns_path))
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(current_custom, f, indent=2)
+                os.replace(tmp_path, self.custom_patterns_path)
+            except Exception as e:
+                logging.error(f"Failed to save custom pattern: {e}")
+                return False
             
-            return True
-        except Exception as e:
-            logging.error(f"Failed to save custom pattern: {e}")
-            return False
+            # Update in-memory
+            self._state = self._build_state(self._state.version + 1)
+        
+        return True
     
     def extract_all_fields(self, text: str, document_type: str = "general") -> Dict:
         """
@@ -189,12 +246,13 @@ class FieldExtractor:
         Returns:
             Dictionary with extracted fields and confidence scores
         """
+        state = self._current_state()
         fields = {}
         confidence = {}
         
         # 1. Always try dynamic extraction for ALL known fields
         # This ensures we catch things like "Total Amount" even in an ID card if present
-        dynamic_fields = self._extract_general_key_value_pairs(text)
+        dynamic_fields = self._extract_general_key_value_pairs(text, state)
         fields.update(dynamic_fields)
 
         # 2. Apply specific logic based on document type (can override or augment)
@@ -205,12 +263,12 @@ class FieldExtractor:
             pass_fields = self._extract_passport_fields(text)
             fields.update(pass_fields)
         elif document_type == "form":
-            form_fields = self._extract_form_fields(text)
+            form_fields = self._extract_form_fields(text, state)
             fields.update(form_fields)
         
         # 3. General Auto-Recognition (Fall back to finding ANY "Key: Value" pattern)
         # This helps catch sections that are not in the predefined keywords list
-        general_kv = self._extract_general_key_value_pairs(text)
+        general_kv = self._extract_general_key_value_pairs(text, state)
         for k, v in general_kv.items():
             if k not in fields:
                 fields[k] = v
@@ -225,31 +283,9 @@ class FieldExtractor:
         # Calculate confidence for each field
         for field_name, field_value in fields.items():
             confidence[field_name] = self._calculate_field_confidence(field_name, field_value)
-        fields = {}
-        lines = text.split('\n')
-        
-        for field_name, keywords in self.field_keywords.items():
-            # Skip fields that need special handling (like generic 'date' or 'email' regexes)
-            # unless we want to look for labeled ones too (e.g. "Email: foo@bar.com")
-            
-            for keyword in keywords:
-                # Create a pattern to find "Keyword[:\s]+Value"
-                # Escape keyword for regex safety
-                escaped_kw = re.escape(keyword)
-                
-                # Pattern 1: Keyword at start of line
-                # e.g. "Total: 500"
-                pattern = re.compile(r'(?:^|\n)\s*' + escaped_kw + r'[:\.\-]?\s+(.+)', re.IGNORECASE)
-                match = pattern.search(text)
-                
-                if match:
-                    value = match.group(1).strip()
-                    # Clean up value (remove trailing noise)
-                    if len(value) > 0:
-                        fields[field_name] = value
-                        break # Found a value for this field, stop looking at other keywords
-        
-        return fields
+        # Labeled fields ("Keyword: Value" at a line start) for every known
+        # field, found in one pass by the shared keyword index
+        return state.index.labeled_values(text)
     
     def _extract_id_card_fields(self, text: str) -> Dict:
         """Extract fields specific to ID cards"""
@@ -402,7 +438,7 @@ class FieldExtractor:
         
         return fields
     
-    def _extract_form_fields(self, text: str) -> Dict:
+    def _extract_form_fields(self, text: str, state: PatternState) -> Dict:
         """Extract labeled fields from forms"""
         fields = {}
         lines = text.split('\n')
@@ -417,7 +453,7 @@ class FieldExtractor:
                     field_value = parts[1].strip()
                     
                     # Map to standard field names
-                    standard_name = self._map_field_name(field_name)
+                    standard_name = self._map_field_name(field_name, state)
                     if standard_name and field_value:
                         fields[standard_name] = field_value
         
@@ -534,18 +570,11 @@ class FieldExtractor:
         """Extract and validate phone number"""
         phone_matches = self.patterns['phone'].findall(text)
         
-        if PHONENUMBERS_AVAILABLE:
-            for phone in phone_matches:
-                try:
-                    # Try to parse and validate
-                    parsed = phonenumbers.parse(phone, None)
-                    if phonenumbers.is_valid_number(parsed):
-                        return phonenumbers.format_number(
-                            parsed, 
-                            phonenumbers.PhoneNumberFormat.INTERNATIONAL
-                        )
-                except:
-                    continue
+        region = default_phone_region()
+        for phone in phone_matches:
+            formatted = format_phone(phone, region)
+            if formatted:
+                return formatted
         
         # Return raw match if validation fails or library not available
         if phone_matches:
@@ -555,24 +584,20 @@ class FieldExtractor:
     
     def _parse_date(self, date_str: str) -> Optional[str]:
         """Parse date string to standard format YYYY-MM-DD"""
-        try:
-            parsed_date = date_parser.parse(date_str, fuzzy=True)
-            return parsed_date.strftime('%Y-%m-%d')
-        except:
-            return date_str  # Return original if parsing fails
+        return normalize_date(date_str) or date_str  # Return original if parsing fails
     
-    def _map_field_name(self, field_name: str) -> Optional[str]:
-        """Map various field names to standard names"""
+    def _map_field_name(self, field_name: str, state: PatternState) -> Optional[str]:
+        """Map various field names to standard names, with the extraction's pattern state"""
         field_name = field_name.lower()
         
-        for standard_name, keywords in self.field_keywords.items():
-            if any(keyword in field_name for keyword in keywords):
-                return standard_name
+        standard_name = state.index.map_field_name(field_name)
+        if standard_name:
+            return standard_name
         
         # Return as-is if no mapping found
         return field_name.replace(' ', '_')
     
-    def _extract_general_key_value_pairs(self, text: str) -> Dict:
+    def _extract_general_key_value_pairs(self, text: str, state: PatternState) -> Dict:
         """
         Dynamically find "Key: Value" pairs in text
         This is a fallback/general catch-all for fields we haven't explicitly defined patterns for
@@ -602,7 +627,7 @@ class FieldExtractor:
                 continue
             
             # Map known keys to standard names, or use slugified key
-            standard_name = self._map_field_name(key)
+            standard_name = self._map_field_name(key, state)
             fields[standard_name] = value
             
         return fields
@@ -622,14 +647,25 @@ class FieldExtractor:
             confidence += 0.15
         
         if 'date' in field_name:
-            try:
-                date_parser.parse(field_value)
+            if isinstance(field_value, str) and is_date(field_value):
                 confidence += 0.2
-            except:
-                pass
         
         # Length-based confidence
         if len(field_value) > 2:
             confidence += 0.1
         
         return min(confidence, 1.0)  # Cap at 1.0
+
+
+_shared_extractor: Optional[FieldExtractor] = None
+_shared_lock = threading.Lock()
+
+
+def get_field_extractor() -> FieldExtractor:
+    """The process-wide FieldExtractor, created on first use"""
+    global _shared_extractor
+    if _shared_extractor is None:
+        with _shared_lock:
+            if _shared_extractor is None:
+                _shared_extractor = FieldExtractor()
+    return _shared_extractor
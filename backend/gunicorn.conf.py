@@ -0,0 +1,65 @@
+"""
+Gunicorn Configuration
+Production serving: preforked uvicorn workers sized from the cores and the OCR pool
+
+    cd backend && gunicorn -c gunicorn.conf.py server:app
+
+Each worker process runs its own OCR pool of OCR_WORKERS threads (default
+2 here), so the number of worker processes defaults to cores / OCR_WORKERS
+to keep OCR work about one thread per core. WEB_CONCURRENCY overrides it.
+When a single worker is forced (see below), OCR_WORKERS defaults to the
+number of cores instead.
+
+Workers are not preloaded: each opens its own MongoDB client and pool
+after the fork, then warms up (see warmup.py) before /api/health/ready
+answers 200. Per-process state (in-memory job store and caches) is not
+shared between workers; use OCR_CACHE_BACKEND=mongo (or disk) when running
+more than one. The in-memory job store (JOB_STORE=memory, the default
+without MONGO_URL) would answer GET /api/jobs/{id} from one worker only,
+so it forces a single worker.
+
+Metrics are per process too: each GET /metrics scrape is answered by
+whichever worker accepts it and shows only that worker's counters, so
+with several workers the series jump between processes. Scrape each
+worker separately (e.g. one gunicorn per container or port, each with
+WEB_CONCURRENCY=1) when accurate totals matter.
+"""
+
+import os
+
+cores = os.cpu_count() or 1
+
+# Resolved the way jobs.job_store_from_env() does: memory unless MongoDB is set up
+job_store = os.environ.get("JOB_STORE", "mongo" if os.environ.get("MONGO_URL") else "memory").lower()
+
+# Inherited by every worker, whose OCRWorkerPool.from_env() reads it. A
+# single worker gets a thread per core to use the whole machine
+ocr_workers = int(os.environ.get("OCR_WORKERS") or (cores if job_store == "memory" else min(2, cores)))
+os.environ["OCR_WORKERS"] = str(ocr_workers)
+
+workers = int(os.environ.get("WEB_CONCURRENCY") or max(1, cores // ocr_workers))
+requested_workers = workers
+if job_store == "memory":
+    workers = 1
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Startup plus warm-up can take a few seconds; long OCR requests do not
+# block the event loop, so the heartbeat timeout can stay moderate
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+# Recycle workers after this many requests (0 = never), bounding the
+# growth of fragmented image-decoding memory
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+
+
+def on_starting(server):
+    server.log.info(f"{workers} workers x {ocr_workers} OCR threads on {cores} cores")
+    if workers < requested_workers:
+        server.log.warning(f"JOB_STORE=memory keeps jobs in one process: running 1 worker instead of "
+                           f"{requested_workers} (set MONGO_URL and DB_NAME, or JOB_STORE=mongo, to scale out)")
@@ -0,0 +1,214 @@
+"""
+Job Worker Module
+Claims queued OCR jobs and runs them; start several processes to scale out
+
+    cd backend && python job_worker.py --concurrency 2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from jobs import DEAD, FAILED, SUCCEEDED, MongoJobStore, retry_delay
+from ocr_pool import OCRWorkerPool
+from page_stream import iter_page_results
+from pipeline_common import EmptyDocumentError, UnreadableDocumentError
+from scheduling import JOBS_LANE
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Another worker took over the job (our lease expired)"""
+
+
+class JobWorker:
+    """
+    Poll a job store and run claimed jobs on an OCR pool.
+
+    Up to `concurrency` jobs run at once; pages of a multi-page job share the
+    pool like the synchronous endpoints do, in the bulk class so they only
+    take workers interactive requests leave free. Pages wait for space in a
+    full pool queue rather than fail, so a busy pool never costs a job an
+    attempt or leaves "busy" errors among its pages. The lease is renewed
+    every third of its length, so a job is only handed to another worker
+    when this one stops heartbeating (crash, hang, lost connection).
+    """
+
+    def __init__(self, store, pool: OCRWorkerPool, worker_id: Optional[str] = None, concurrency: int = 1,
+                 lease_seconds: float = 60.0, poll_interval: float = 1.0, retry_base_seconds: float = 5.0):
+        self.store = store
+        self.pool = pool
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_base_seconds = retry_base_seconds
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, store, pool: OCRWorkerPool, **overrides) -> "JobWorker":
+        """Build from JOB_CONCURRENCY, JOB_LEASE_SECONDS, JOB_POLL_INTERVAL and JOB_RETRY_DELAY"""
+        settings = {
+            "concurrency": int(os.environ.get("JOB_CONCURRENCY", 1)),
+            "lease_seconds": float(os.environ.get("JOB_LEASE_SECONDS", 60)),
+            "poll_interval": float(os.environ.get("JOB_POLL_INTERVAL", 1.0)),
+            "retry_base_seconds": float(os.environ.get("JOB_RETRY_DELAY", 5.0)),
+        }
+        settings.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(store, pool, **settings)
+
+    def stop(self):
+        """Finish the jobs in hand, then return from run()"""
+        self._stopping.set()
+
+    async def run(self):
+        logger.info(f"Job worker {self.worker_id} started ({self.concurrency} slots, store {self.store.name})")
+        await asyncio.gather(*(self._slot() for _ in range(self.concurrency)))
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    async def _slot(self):
+        while not self._stopping.is_set():
+            try:
+                job = await self.store.claim(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.process(job)
+
+    async def process(self, job: Dict):
+        """Run one claimed job to a final state, a retry, or a lost lease"""
+        if job["attempts"] > job["max_attempts"]:
+            # Reclaimed after its lease expired once too often: the job itself
+            # is probably what keeps killing workers
+            await self.store.finish(job, self.worker_id, DEAD,
+                                    error=job.get("error") or "Worker lost the job too many times")
+            logger.error(f"Job {job['_id']} is dead after {job['max_attempts']} attempts")
+            return
+
+        work = asyncio.ensure_future(self._execute(job))
+        heartbeat = asyncio.ensure_future(self._heartbeat(job["_id"], work))
+        try:
+            result = await work
+        except LeaseLost:
+            logger.warning(f"Lost the lease on job {job['_id']}; another worker will pick it up")
+        except asyncio.CancelledError:
+            if not heartbeat.done():
+                raise
+            logger.warning(f"Lost the lease on job {job['_id']}; another worker will pick it up")
+        except (EmptyDocumentError, UnreadableDocumentError, ValueError) as exc:
+            # Bad input (including a corrupt upload): retrying won't help
+            await self.store.finish(job, self.worker_id, FAILED, error=str(exc))
+            logger.info(f"Job {job['_id']} failed: {exc}")
+        except Exception as exc:
+            error = str(exc) or exc.__class__.__name__
+            if job["attempts"] >= job["max_attempts"]:
+                await self.store.finish(job, self.worker_id, DEAD, error=error)
+                logger.exception(f"Job {job['_id']} is dead after {job['attempts']} attempts")
+            else:
+                delay = retry_delay(job["attempts"], self.retry_base_seconds)
+                await self.store.requeue(job, self.worker_id, error, delay)
+                logger.warning(f"Job {job['_id']} attempt {job['attempts']} failed ({error}); retrying in {delay:.0f}s")
+        else:
+            if not await self.store.finish(job, self.worker_id, SUCCEEDED, result=result):
+                logger.warning(f"Job {job['_id']} finished after its lease expired; result discarded")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str, work: asyncio.Future):
+        while not work.done():
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                owned = await self.store.heartbeat(job_id, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+                continue
+            if not owned:
+                work.cancel()
+                return
+
+    async def _execute(self, job: Dict) -> Dict:
+        # The OCR stack is loaded on the first job, not when the server imports this module
+        from ocr_pipeline import extract_document_fields, ocr_document
+
+        params = job["params"]
+        file_bytes = await self.store.read_file(job)
+
+        async def run_page(page_number: int) -> Dict:
+            if job["kind"] == "ocr":
+                return await self.pool.submit(ocr_document, file_bytes, params["content_type"], params["language"],
+                                              params["force_ocr"], page_number=page_number, lane=JOBS_LANE,
+                                              wait_for_space=True)
+            return await self.pool.submit(extract_document_fields, file_bytes, params["content_type"],
+                                          params["document_type"], params["language"], params["force_ocr"],
+                                          page_number=page_number, lane=JOBS_LANE, wait_for_space=True)
+
+        async def report_progress(done: int, total: int):
+            progress = {"done": done, "total": total}
+            if not await self.store.heartbeat(job["_id"], self.worker_id, self.lease_seconds, progress):
+                raise LeaseLost(job["_id"])
+
+        page_numbers = params.get("page_numbers")
+        if page_numbers is None:
+            result = await run_page(0)
+            await report_progress(1, 1)
+            return result
+
+        results = []
+        async for record in iter_page_results(run_page, page_numbers, window=self.pool.max_workers):
+            results.append(record)
+            await report_progress(len(results), len(page_numbers))
+        results.sort(key=lambda record: record["page"])
+        return {"page_count": params["page_count"], "pages": results}
+
+
+async def main(concurrency: Optional[int] = None):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    store = MongoJobStore(client[os.environ['DB_NAME']])
+    await store.setup()
+
+    pool = OCRWorkerPool.from_env()
+    pool.start()
+    worker = JobWorker.from_env(store, pool, concurrency=concurrency)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+
+    try:
+        await worker.run()
+    finally:
+        pool.shutdown()
+        client.close()
+
+
+if __name__ == "__main__":
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Run OCR jobs queued through POST /api/jobs")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="jobs to run at once (default: JOB_CONCURRENCY or 1)")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
@@ -0,0 +1,316 @@
+"""
+Jobs Module
+Durable queue of asynchronous OCR jobs with atomic claims, leases and retries
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from uploads import DocumentSource
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("ocr", "extract_fields")
+
+# queued -> running -> succeeded
+#                   -> queued again (retryable error or expired lease)
+#                   -> failed (bad input, retrying won't help)
+#                   -> dead (out of attempts)
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+DEAD = "dead"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _read_path(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    """Mongo hands back naive UTC datetimes unless the client is tz_aware"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def new_job(kind: str, params: Dict, max_attempts: int) -> Dict:
+    """A queued job document (without its file)"""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    now = _now()
+    return {
+        "_id": uuid.uuid4().hex,
+        "kind": kind,
+        "params": params,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "available_at": now,
+        "lease_expires_at": None,
+        "worker_id": None,
+        "progress": {"done": 0, "total": len(params.get("page_numbers") or [0])},
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+    }
+
+
+def public_view(job: Dict) -> Dict:
+    """What GET /api/jobs/{id} returns: no file handles or lease bookkeeping"""
+    def iso(value):
+        value = _aware(value)
+        return value.isoformat() if value is not None else None
+
+    return {
+        "job_id": job["_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": iso(job["created_at"]),
+        "updated_at": iso(job["updated_at"]),
+        "finished_at": iso(job["finished_at"]),
+    }
+
+
+def retry_delay(attempts: int, base_seconds: float) -> float:
+    """Exponential backoff after the given number of attempts"""
+    return base_seconds * (2 ** max(attempts - 1, 0))
+
+
+class MongoJobStore:
+    """
+    Jobs in a MongoDB collection, uploads in GridFS.
+
+    A claim is one find_one_and_update, so any number of worker processes can
+    poll the same collection without ever running a job twice concurrently.
+    A running job whose lease has expired (its worker died) is claimable again.
+    """
+
+    name = "mongo"
+
+    def __init__(self, db, collection: str = "ocr_jobs", bucket: str = "ocr_job_files"):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        self.collection = db[collection]
+        self.files = AsyncIOMotorGridFSBucket(db, bucket_name=bucket)
+
+    async def setup(self):
+        await self.collection.create_index([("status", 1), ("available_at", 1)])
+        await self.collection.create_index([("status", 1), ("lease_expires_at", 1)])
+
+    async def enqueue(self, job: Dict, document: DocumentSource) -> str:
+        if isinstance(document, str):
+            # Streamed into GridFS chunk by chunk from the spooled upload
+            with open(document, 'rb') as f:
+                job["file_id"] = await self.files.upload_from_stream(job["_id"], f)
+        else:
+            job["file_id"] = await self.files.upload_from_stream(job["_id"], document)
+        await self.collection.insert_one(job)
+        return job["_id"]
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.collection.find_one({"_id": job_id})
+
+    async def read_file(self, job: Dict) -> bytes:
+        stream = await self.files.open_download_stream(job["file_id"])
+        return await stream.read()
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        from pymongo import ReturnDocument
+
+        now = _now()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "available_at": {"$lte": now}},
+                {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _update_owned(self, job_id: str, worker_id: str, update: Dict) -> bool:
+        """Apply update only while worker_id still holds the job's lease"""
+        update.setdefault("$set", {})["updated_at"] = _now()
+        result = await self.collection.update_one(
+            {"_id": job_id, "status": RUNNING, "worker_id": worker_id}, update
+        )
+        return result.matched_count == 1
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float,
+                        progress: Optional[Dict] = None) -> bool:
+        fields = {"lease_expires_at": _now() + timedelta(seconds=lease_seconds)}
+        if progress is not None:
+            fields["progress"] = progress
+        return await self._update_owned(job_id, worker_id, {"$set": fields})
+
+    async def finish(self, job: Dict, worker_id: str, status: str, result: Optional[Dict] = None,
+                     error: Optional[str] = None) -> bool:
+        owned = await self._update_owned(job["_id"], worker_id, {"$set": {
+            "status": status, "result": result, "error": error,
+            "lease_expires_at": None, "finished_at": _now(),
+        }})
+        if owned and job.get("file_id") is not None:
+            try:
+                await self.files.delete(job["file_id"])
+            except Exception as e:
+                logger.warning(f"Could not delete upload of job {job['_id']}: {e}")
+        return owned
+
+    async def requeue(self, job: Dict, worker_id: str, error: str, delay_seconds: float) -> bool:
+        return await self._update_owned(job["_id"], worker_id, {"$set": {
+            "status": QUEUED, "error": error, "lease_expires_at": None, "worker_id": None,
+            "available_at": _now() + timedelta(seconds=delay_seconds),
+        }})
+
+    async def counts(self) -> Dict[str, int]:
+        pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        return {doc["_id"]: doc["count"] async for doc in self.collection.aggregate(pipeline)}
+
+
+class InMemoryJobStore:
+    """
+    Same contract as MongoJobStore, held in this process only.
+
+    Meant for tests and single-process development, with the worker embedded
+    in the API server. Every method completes without awaiting anything, so
+    claims are atomic on the event loop. Finished jobs (and their results)
+    are dropped after ttl_seconds, oldest first once there are more than
+    max_finished of them.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl_seconds: float = 24 * 3600, max_finished: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Dict] = {}
+        self._files: Dict[str, bytes] = {}
+        # Finished job ids in the order they finished
+        self._finished: Dict[str, datetime] = {}
+
+    def _purge(self):
+        cutoff = _now() - timedelta(seconds=self.ttl_seconds)
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at >= cutoff and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    async def setup(self):
+        pass
+
+    async def enqueue(self, job: Dict, document: DocumentSource) -> str:
+        if isinstance(document, str):
+            document = await asyncio.to_thread(_read_path, document)
+        self._purge()
+        self._files[job["_id"]] = document
+        self._jobs[job["_id"]] = job
+        return job["_id"]
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        self._purge()
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def read_file(self, job: Dict) -> bytes:
+        return self._files[job["_id"]]
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        now = _now()
+        candidates: List[Dict] = [
+            job for job in self._jobs.values()
+            if (job["status"] == QUEUED and job["available_at"] <= now)
+            or (job["status"] == RUNNING and job["lease_expires_at"] < now)
+        ]
+        if not candidates:
+            return None
+        job = min(candidates, key=lambda j: j["created_at"])
+        job.update(status=RUNNING, worker_id=worker_id, updated_at=now,
+                   lease_expires_at=now + timedelta(seconds=lease_seconds), attempts=job["attempts"] + 1)
+        return dict(job)
+
+    def _owned(self, job_id: str, worker_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != RUNNING or job["worker_id"] != worker_id:
+            return None
+        job["updated_at"] = _now()
+        return job
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float,
+                        progress: Optional[Dict] = None) -> bool:
+        job = self._owned(job_id, worker_id)
+        if job is None:
+            return False
+        job["lease_expires_at"] = _now() + timedelta(seconds=lease_seconds)
+        if progress is not None:
+            job["progress"] = progress
+        return True
+
+    async def finish(self, job: Dict, worker_id: str, status: str, result: Optional[Dict] = None,
+                     error: Optional[str] = None) -> bool:
+        owned = self._owned(job["_id"], worker_id)
+        if owned is None:
+            return False
+        owned.update(status=status, result=result, error=error, lease_expires_at=None, finished_at=_now())
+        self._files.pop(job["_id"], None)
+        self._finished[job["_id"]] = owned["finished_at"]
+        self._purge()
+        return True
+
+    async def requeue(self, job: Dict, worker_id: str, error: str, delay_seconds: float) -> bool:
+        owned = self._owned(job["_id"], worker_id)
+        if owned is None:
+            return False
+        owned.update(status=QUEUED, error=error, lease_expires_at=None, worker_id=None,
+                     available_at=_now() + timedelta(seconds=delay_seconds))
+        return True
+
+    async def counts(self) -> Dict[str, int]:
+        self._purge()
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+
+def job_store_from_env(db=None):
+    """
+    JOB_STORE=mongo (default when a database is configured) or memory, which
+    keeps finished jobs for JOB_MEMORY_TTL seconds and at most
+    JOB_MEMORY_MAX_FINISHED of them
+    """
+    backend = os.environ.get("JOB_STORE", "mongo" if db is not None else "memory").lower()
+    if backend == "mongo":
+        if db is None:
+            raise RuntimeError("JOB_STORE=mongo needs MONGO_URL and DB_NAME")
+        return MongoJobStore(db)
+    if backend == "memory":
+        return InMemoryJobStore(float(os.environ.get("JOB_MEMORY_TTL", 24 * 3600)),
+                                int(os.environ.get("JOB_MEMORY_MAX_FINISHED", 10000)))
+    raise ValueError(f"Unknown JOB_STORE: {backend}")
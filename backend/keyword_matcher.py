@@ -0,0 +1,131 @@
+"""
+Keyword Matcher Module
+Aho-Corasick index over field keywords for labeled-field extraction
+"""
+
+import re
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# What may follow a label: optional ':', '.' or '-', whitespace, then the value
+_VALUE_PATTERN = re.compile(r'[:\.\-]?\s+(.+)')
+_LEADING_SPACE = re.compile(r'\s*')
+
+
+def _lower_aligned(text: str) -> str:
+    """Lowercase text while keeping one output character per input character"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. 'İ') lowercase to two code points; keep the first
+    return ''.join(c.lower()[0] for c in text)
+
+
+class KeywordIndex:
+    """
+    Case-insensitive index of every keyword of every field.
+
+    Keyword priority follows the input order: fields in dict order, keywords
+    in list order. labeled_values() reproduces the old per-keyword regex loop
+    ("first keyword with a match wins, per field") in a single pass over the
+    line starts, and map_field_name() replaces the linear substring scan.
+    """
+
+    def __init__(self, field_keywords: Dict[str, Sequence[str]]):
+        self.fields: List[str] = list(field_keywords)
+
+        # Trie: goto transitions, keywords ending exactly at a node, and
+        # (after build) all keywords ending at a node via failure links
+        self._goto: List[Dict[str, int]] = [{}]
+        self._terminal: List[List[Tuple[int, int]]] = [[]]
+        for field_index, field in enumerate(self.fields):
+            for keyword_index, keyword in enumerate(field_keywords[field]):
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                node = 0
+                for char in keyword:
+                    next_node = self._goto[node].get(char)
+                    if next_node is None:
+                        next_node = len(self._goto)
+                        self._goto[node][char] = next_node
+                        self._goto.append({})
+                        self._terminal.append([])
+                    node = next_node
+                self._terminal[node].append((field_index, keyword_index))
+
+        self._fail = [0] * len(self._goto)
+        self._matches: List[List[Tuple[int, int]]] = [list(t) for t in self._terminal]
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._matches[child].extend(self._matches[self._fail[child]])
+
+    def _line_starts(self, text: str) -> List[int]:
+        """Positions after leading whitespace at the text start and after each newline"""
+        starts = []
+        seen = set()
+        position = 0
+        while True:
+            start = _LEADING_SPACE.match(text, position).end()
+            if start not in seen:
+                seen.add(start)
+                starts.append(start)
+            position = text.find('\n', position) + 1
+            if position == 0:
+                return starts
+
+    def labeled_values(self, text: str) -> Dict[str, str]:
+        """
+        Find "keyword[:.-] value" at line starts for every field.
+
+        For each field the first of its keywords (in priority order) whose
+        first labeled occurrence has a non-empty value wins.
+        """
+        lowered = _lower_aligned(text)
+        first_match: Dict[Tuple[int, int], str] = {}
+
+        for start in self._line_starts(text):
+            node = 0
+            for position in range(start, len(lowered)):
+                node = self._goto[node].get(lowered[position])
+                if node is None:
+                    break
+                for key in self._terminal[node]:
+                    if key in first_match:
+                        continue
+                    match = _VALUE_PATTERN.match(text, position + 1)
+                    if match:
+                        first_match[key] = match.group(1).strip()
+
+        fields = {}
+        for key in sorted(first_match):
+            field = self.fields[key[0]]
+            if field not in fields and first_match[key]:
+                fields[field] = first_match[key]
+        return fields
+
+    def map_field_name(self, name: str) -> Optional[str]:
+        """First field (in priority order) with any keyword contained in name"""
+        best = None
+        node = 0
+        for char in _lower_aligned(name):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for field_index, _ in self._matches[node]:
+                if best is None or field_index < best:
+                    best = field_index
+                    if best == 0:
+                        return self.fields[0]
+        return self.fields[best] if best is not None else None
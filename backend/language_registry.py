@@ -0,0 +1,135 @@
+"""
+Language Registry Module
+In-memory list of installed Tesseract languages, refreshed when tessdata changes
+"""
+
+import logging
+import os
+import re
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Header printed by `tesseract --list-langs`, e.g.
+# List of available languages in "/usr/share/tesseract-ocr/5/tessdata/" (3):
+_HEADER_PATTERN = re.compile(r'"(?P<dir>[^"]+)"')
+
+
+class LanguageRegistry:
+    """
+    Cached view of the installed .traineddata files.
+
+    The list is loaded once (normally during warm-up) and then served from memory.
+    Lookups only ever read the last snapshot: they never run Tesseract, so
+    they are safe to call on the event loop. Until the first load they find
+    nothing installed and pass language specs through unchanged.
+
+    refresh_if_changed() stats the tessdata directory and reloads when its
+    mtime changed, so dropping a new language file in place is picked up
+    without a restart; it blocks, so call it off the event loop, every
+    `check_interval` seconds.
+    """
+
+    def __init__(self, default_language: str = "eng", check_interval: float = 5.0):
+        self.default_language = default_language
+        self.check_interval = check_interval
+
+        self._languages: Tuple[str, ...] = ()
+        self._tessdata_dir: Optional[str] = None
+        self._tessdata_mtime: Optional[float] = None
+        self._loaded = False
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Run `tesseract --list-langs` once and cache the result"""
+        import pytesseract
+
+        with self._lock:
+            try:
+                result = subprocess.run(
+                    [pytesseract.pytesseract.tesseract_cmd, '--list-langs'],
+                    capture_output=True,
+                    text=True,
+                    timeout=5
+                )
+                lines = result.stdout.strip().split('\n')
+                header = _HEADER_PATTERN.search(lines[0]) if lines else None
+                self._languages = tuple(line.strip() for line in lines[1:] if line.strip())  # Skip header
+                self._tessdata_dir = header.group('dir') if header else os.environ.get('TESSDATA_PREFIX')
+                self._tessdata_mtime = self._dir_mtime()
+                self._error = None
+                logger.info(f"Loaded {len(self._languages)} Tesseract languages from {self._tessdata_dir}")
+            except Exception as e:
+                self._error = str(e)
+                logger.warning(f"Could not check available languages: {e}")
+            self._loaded = True
+
+    def _dir_mtime(self) -> Optional[float]:
+        if not self._tessdata_dir:
+            return None
+        try:
+            return os.stat(self._tessdata_dir).st_mtime
+        except OSError:
+            return None
+
+    def refresh_if_changed(self) -> bool:
+        """Load if never loaded, or reload if tessdata changed; returns whether it (re)loaded"""
+        if self._loaded and self._dir_mtime() == self._tessdata_mtime:
+            return False
+        if self._loaded:
+            logger.info("Tessdata directory changed, reloading languages")
+        self.load()
+        return True
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def error(self) -> Optional[str]:
+        """Error from the last load attempt, if any"""
+        return self._error
+
+    def available(self) -> List[str]:
+        """Installed language codes"""
+        return list(self._languages)
+
+    def is_installed(self, language: str) -> bool:
+        return language in self._languages
+
+    def split_spec(self, spec: str) -> Tuple[List[str], List[str]]:
+        """Split a spec such as 'eng+hin' into (installed, missing) codes"""
+        installed, missing = [], []
+        for code in (part.strip() for part in spec.split('+')):
+            if not code:
+                continue
+            (installed if code in self._languages else missing).append(code)
+        return installed, missing
+
+    def resolve(self, spec: str) -> Tuple[str, List[str]]:
+        """
+        Validate a language spec, dropping languages that are not installed.
+
+        Returns:
+            (spec to pass to Tesseract, list of dropped codes). Falls back to
+            the default language if nothing in the spec is installed. If the
+            language list is not loaded yet or could not be loaded at all,
+            the spec is passed through unchanged.
+        """
+        if not self._languages:
+            return spec, []
+        installed, missing = self.split_spec(spec)
+        if not installed:
+            return self.default_language, missing
+        return '+'.join(installed), missing
+
+    def stats(self) -> Dict:
+        return {
+            "languages": list(self._languages),
+            "tessdata_dir": self._tessdata_dir,
+            "loaded": self._loaded,
+            "error": self._error,
+        }
@@ -0,0 +1,220 @@
+"""
+Layout Template Module
+Zone templates for fixed document layouts and zonal OCR over them
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from PIL import Image
+
+from ocr_result import run_tesseract
+from preprocessing import preprocess
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE_DIR = Path(__file__).parent / "layout_templates"
+
+# Crops shorter than this are upscaled before OCR; Tesseract does poorly
+# below roughly 20px of x-height
+MIN_ZONE_HEIGHT = 64
+
+
+class Zone(NamedTuple):
+    field: str
+    box: Tuple[float, float, float, float]  # x0, y0, x1, y1 as fractions of the page
+    psm: int = 7
+    whitelist: Optional[str] = None
+    pattern: Optional["re.Pattern"] = None
+
+
+class LayoutTemplate(NamedTuple):
+    name: str
+    document_type: str
+    zones: Tuple[Zone, ...]
+    key: str  # name plus content hash, part of OCR cache keys
+
+
+def parse_template(raw: bytes, source: str = "<template>") -> LayoutTemplate:
+    """
+    Parse and validate a template file.
+
+    Format:
+        {"name": "school_id_v1", "document_type": "id_card",
+         "zones": [{"field": "roll_no", "box": [0.30, 0.42, 0.70, 0.50],
+                    "psm": 7, "whitelist": "0123456789/", "pattern": "\\\\d{2}/\\\\d{5}"}]}
+
+    Raises:
+        ValueError: if the file is not a valid template
+    """
+    try:
+        spec = json.loads(raw)
+        name = spec.get("name") or Path(source).stem
+        document_type = spec["document_type"]
+        zone_specs = spec["zones"]
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:
+        raise ValueError(f"{source}: not a layout template ({exc})")
+    if not zone_specs:
+        raise ValueError(f"{source}: template has no zones")
+
+    zones = []
+    for i, zone in enumerate(zone_specs):
+        try:
+            x0, y0, x1, y1 = (float(v) for v in zone["box"])
+            field = zone["field"]
+            psm = int(zone.get("psm", 7))
+            pattern = re.compile(zone["pattern"]) if zone.get("pattern") else None
+        except (ValueError, KeyError, TypeError, re.error) as exc:
+            raise ValueError(f"{source}: zone {i} is invalid ({exc})")
+        if not (0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1):
+            raise ValueError(f"{source}: zone '{field}' box must be fractions with x0 < x1 and y0 < y1")
+        zones.append(Zone(field, (x0, y0, x1, y1), psm, zone.get("whitelist"), pattern))
+
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    return LayoutTemplate(name, document_type, tuple(zones), f"{name}:{digest}")
+
+
+class TemplateRegistry:
+    """
+    Templates from *.json files in one directory, keyed by document type.
+
+    Files are re-read only when the directory listing or a file's mtime
+    changes, checked at most every `check_interval` seconds. Subdirectories
+    (such as examples/) are not loaded.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_TEMPLATE_DIR, check_interval: float = 5.0):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._templates: Dict[str, LayoutTemplate] = {}
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+
+    def _scan(self) -> Tuple:
+        try:
+            return tuple(sorted(
+                (entry.name, entry.stat().st_mtime_ns)
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(".json")
+            ))
+        except OSError:
+            return ()
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = self._scan()
+            if signature == self._signature:
+                return
+
+            templates = {}
+            for name, _ in signature:
+                path = self.directory / name
+                try:
+                    template = parse_template(path.read_bytes(), str(path))
+                except (OSError, ValueError) as exc:
+                    logger.warning(f"Skipping layout template: {exc}")
+                    continue
+                if template.document_type in templates:
+                    logger.warning(f"{path}: another template already covers '{template.document_type}'")
+                    continue
+                templates[template.document_type] = template
+
+            self._templates = templates
+            self._signature = signature
+            if templates:
+                logger.info(f"Loaded layout templates for {sorted(templates)} from {self.directory}")
+
+    def get(self, document_type: str) -> Optional[LayoutTemplate]:
+        self._ensure_fresh()
+        return self._templates.get(document_type)
+
+    def available(self) -> Dict[str, str]:
+        """document_type -> template name"""
+        self._ensure_fresh()
+        return {doc_type: template.name for doc_type, template in self._templates.items()}
+
+
+_registry: Optional[TemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Process-wide registry for LAYOUT_TEMPLATES_DIR (default backend/layout_templates)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TemplateRegistry(Path(os.environ.get("LAYOUT_TEMPLATES_DIR", DEFAULT_TEMPLATE_DIR)))
+    return _registry
+
+
+def crop_zone(image: Image.Image, zone: Zone) -> Image.Image:
+    """Cut a zone out of the page, upscaling it if it is too short for Tesseract"""
+    width, height = image.size
+    x0, y0, x1, y1 = zone.box
+    crop = image.crop((round(x0 * width), round(y0 * height), round(x1 * width), round(y1 * height)))
+    if 0 < crop.height < MIN_ZONE_HEIGHT:
+        scale = MIN_ZONE_HEIGHT / crop.height
+        crop = crop.resize((max(1, round(crop.width * scale)), MIN_ZONE_HEIGHT), Image.Resampling.BICUBIC)
+    return crop
+
+
+def ocr_zone(image: Image.Image, zone: Zone, language: str) -> Dict:
+    """OCR one zone with its own page segmentation mode and whitelist"""
+    binary, _ = preprocess(crop_zone(image, zone))
+    config = f'--oem 1 --psm {zone.psm}'
+    if zone.whitelist:
+        config += f' -c tessedit_char_whitelist={shlex.quote(zone.whitelist)}'
+    result = run_tesseract(binary, language, config)
+
+    text = ' '.join(result["text"].split())
+    value = text
+    if zone.pattern is not None:
+        match = zone.pattern.search(text)
+        value = (match.group(1) if match.groups() else match.group(0)) if match else ''
+    return {"field": zone.field, "text": text, "value": value, "confidence": round(result["confidence"], 2)}
+
+
+def ocr_zones(image: Image.Image, template: LayoutTemplate, language: str, max_threads: int = 4) -> Dict:
+    """
+    OCR every zone of a template on a decoded page.
+
+    Zones run concurrently on threads: Tesseract runs as a subprocess, so
+    they overlap even under the GIL. One call still occupies one OCR pool
+    slot, keeping pool admission per document rather than per zone.
+
+    Returns:
+        {"fields": {field: value}, "raw_text": "field: value" lines,
+         "confidence": mean zone confidence, "median_confidence": ...,
+         "engine": "template", "template": name, "zones": [...]}
+    """
+    threads = max(1, min(len(template.zones), max_threads))
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="zone") as executor:
+        zones: List[Dict] = list(executor.map(lambda zone: ocr_zone(image, zone, language), template.zones))
+
+    found = [zone for zone in zones if zone["value"]]
+    confidences = [zone["confidence"] for zone in found]
+    return {
+        "fields": {zone["field"]: zone["value"] for zone in found},
+        "raw_text": '\n'.join(f'{zone["field"]}: {zone["value"]}' for zone in found),
+        "confidence": round(statistics.fmean(confidences), 2) if confidences else 0.0,
+        "median_confidence": round(statistics.median(confidences), 2) if confidences else 0.0,
+        "engine": "template",
+        "template": template.name,
+        "zones": zones,
+    }
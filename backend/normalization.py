@@ -0,0 +1,215 @@
+"""
+Normalization Module
+Rescales upright pages so text reaches Tesseract at its preferred height, and picks PDF render DPI
+"""
+
+import logging
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+import fitz  # PyMuPDF
+
+from orientation import apply_orientation
+from pipeline_common import normalization_settings as settings
+from preprocessing import otsu_threshold
+
+logger = logging.getLogger(__name__)
+
+# Rotation, skew and text height are measured on a copy whose longer side
+# is at most this many pixels (PDF pages are rendered at that size)
+ANALYSIS_MAX_SIDE = 1600
+
+# Scales this close to 1 are not worth a resample
+SCALE_TOLERANCE = 0.15
+MIN_SCALE = 0.2
+MAX_SCALE = 4.0
+
+# Used when the text height cannot be measured (blank pages, photos, a
+# single word): upscale like before, but only when both sides are short
+FALLBACK_MIN_DIMENSION = 1024
+
+MIN_PDF_DPI = 72
+
+
+def estimate_text_height(gray: np.ndarray, strips: int = 4, min_lines: int = 3) -> Optional[float]:
+    """
+    Median height in pixels of text lines in a grayscale page.
+
+    The page is cut into vertical strips (so columns and slight skew don't
+    merge lines) and each strip's row ink profile is split into runs of inked
+    rows. Runs of 1-2 px are noise or rules; runs taller than a quarter of the
+    page are pictures. Returns None when fewer than min_lines lines are found.
+    """
+    height, width = gray.shape
+    if height < 8 or width < 8:
+        return None
+
+    ink = gray < otsu_threshold(gray)
+    if ink.mean() > 0.5:
+        ink = ~ink  # Light text on a dark background
+
+    line_heights = []
+    for strip in np.array_split(ink, strips, axis=1):
+        min_ink = max(1, int(strip.shape[1] * 0.005))
+        inked_rows = (strip.sum(axis=1) >= min_ink).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], inked_rows, [0])))
+        runs = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        line_heights.extend(runs[(runs >= 3) & (runs <= height // 4)])
+
+    if len(line_heights) < min_lines:
+        return None
+    return float(np.median(line_heights))
+
+
+def analysis_copy(image: Image.Image) -> Tuple[Image.Image, int]:
+    """Box-downsampled copy at most ANALYSIS_MAX_SIDE pixels long, and the factor it was reduced by"""
+    factor = max(1, math.ceil(max(image.size) / ANALYSIS_MAX_SIDE))
+    return (image.reduce(factor) if factor > 1 else image), factor
+
+
+def upright_text_height(small: Image.Image, orientation: Dict) -> Optional[float]:
+    """
+    estimate_text_height of an analysis copy once rotated and deskewed, in
+    the copy's pixels.
+
+    Measured sideways, a rotated page's "lines" are columns of characters and
+    the text comes out far too short.
+    """
+    return estimate_text_height(np.asarray(apply_orientation(small, orientation).convert('L')))
+
+
+def choose_scale(width: int, height: int, text_height: Optional[float], target_text_height: float,
+                 max_pixels: int) -> float:
+    """Resize factor bringing text to the target height, within the pixel cap"""
+    if text_height is not None:
+        scale = min(max(target_text_height / text_height, MIN_SCALE), MAX_SCALE)
+        if abs(scale - 1.0) < SCALE_TOLERANCE:
+            scale = 1.0
+    elif width < FALLBACK_MIN_DIMENSION and height < FALLBACK_MIN_DIMENSION:
+        scale = max(FALLBACK_MIN_DIMENSION / width, FALLBACK_MIN_DIMENSION / height)
+    else:
+        scale = 1.0
+
+    pixel_limit = math.sqrt(max_pixels / (width * height))
+    return min(scale, pixel_limit)
+
+
+def _scaled_size(width: int, height: int, scale: float) -> Tuple[int, int]:
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _resample(image: Image.Image, new_size: Tuple[int, int]) -> Image.Image:
+    if new_size[0] < image.size[0]:
+        # Box-reduce by the integer part of the factor first: Lanczos over
+        # the full-size image is ~3x slower on a 48MP photo
+        factor = int(image.size[0] / new_size[0])
+        if factor >= 2:
+            image = image.reduce(factor)
+        return image.resize(new_size, Image.Resampling.LANCZOS)
+    return image.resize(new_size, Image.Resampling.BICUBIC)
+
+
+def normalized_scale(width: int, height: int, text_height: Optional[float]) -> float:
+    """choose_scale with the configured target text height and pixel cap"""
+    config = settings()
+    return choose_scale(width, height, text_height, config["target_text_height"], config["max_pixels"])
+
+
+def _resample_by(image: Image.Image, scale: float) -> Image.Image:
+    new_size = _scaled_size(image.size[0], image.size[1], scale)
+    return _resample(image, new_size) if new_size != image.size else image
+
+
+def rescale_upright(image: Image.Image, scale: float, orientation: Dict) -> Image.Image:
+    """
+    Resample a decoded page by scale and rotate/deskew it as described by
+    orientation.
+
+    Shrinking is done before the rotation and enlarging after it, so the
+    rotation always works on the smaller image.
+    """
+    width, height = image.size
+    if scale < 1.0:
+        image = apply_orientation(_resample_by(image, scale), orientation)
+    else:
+        image = _resample_by(apply_orientation(image, orientation), scale)
+    if _scaled_size(width, height, scale) != (width, height):
+        logger.info(f"Rescaled image from {width}x{height} by {scale:.3f} to {image.size[0]}x{image.size[1]}")
+    return image
+
+
+def decode_gray(image: Image.Image) -> Image.Image:
+    """
+    Finish decoding as grayscale (L images and L drafts are used as they
+    are), turned as the EXIF Orientation tag says: phone photos are stored
+    sideways and only tagged, and need no OSD to stand upright.
+    """
+    if image.mode != 'L':
+        image = image.convert('L')
+    else:
+        image.load()
+    ImageOps.exif_transpose(image, in_place=True)
+    return image
+
+
+def jpeg_analysis_draft(image: Image.Image) -> Tuple[Image.Image, float]:
+    """
+    Decode a freshly opened JPEG as a grayscale draft near the analysis size.
+
+    libjpeg can decode at 1/2, 1/4 or 1/8 scale in the DCT domain (PIL draft
+    mode) for a fraction of the time and memory of a full decode.
+
+    Returns:
+        (draft, factor from draft to full-resolution pixels)
+    """
+    width, height = image.size
+    factor = max(1.0, max(width, height) / ANALYSIS_MAX_SIDE)
+    image.draft('L', (math.ceil(width / factor), math.ceil(height / factor)))
+    draft = decode_gray(image)
+    return draft, max(width, height) / max(draft.size)
+
+
+def decode_jpeg_scaled(image: Image.Image, scale: float) -> Tuple[Image.Image, float]:
+    """
+    Decode a freshly opened JPEG as grayscale at the smallest DCT scale that
+    still covers width and height times scale.
+
+    Returns:
+        (image, the part of scale still to be applied to it)
+    """
+    width, height = image.size
+    image.draft('L', _scaled_size(width, height, scale) if scale < 1.0 else (width, height))
+    image = decode_gray(image)
+    return image, scale * max(width, height) / max(image.size)
+
+
+def pdf_analysis_dpi(page: "fitz.Page") -> int:
+    """Resolution at which a PDF page renders at most ANALYSIS_MAX_SIDE pixels long"""
+    return max(1, int(ANALYSIS_MAX_SIDE * 72.0 / max(page.rect.width, page.rect.height, 1.0)))
+
+
+def render_pdf_page(page: "fitz.Page", dpi: int) -> Image.Image:
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples, "raw", "L", pix.stride)
+
+
+def choose_pdf_dpi(page: "fitz.Page", text_height: Optional[float]) -> int:
+    """
+    Render resolution for one PDF page, given its text line height in points
+    (None when it could not be measured).
+
+    The DPI is set so lines come out at the target height; the page size
+    bounds it so the render stays within OCR_MAX_PIXELS.
+    """
+    config = settings()
+    width_in = page.rect.width / 72.0
+    height_in = page.rect.height / 72.0
+    budget_dpi = math.sqrt(config["max_pixels"] / max(width_in * height_in, 1e-6))
+    max_dpi = max(MIN_PDF_DPI, min(config["pdf_max_dpi"], budget_dpi))
+
+    if text_height is None:
+        return int(max_dpi)
+    dpi = 72.0 * config["target_text_height"] / text_height
+    return int(min(max(dpi, MIN_PDF_DPI), max_dpi))
@@ -0,0 +1,274 @@
+"""
+OCR Cache Module
+Content-addressed cache of OCR results: in-process LRU plus an optional persistent tier
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def hash_bytes(data: bytes) -> str:
+    """Content hash used as the base of every cache key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def cacheable_result(result: Dict) -> bool:
+    """
+    Whether a fresh pipeline result may be cached: degraded results (Tesseract
+    fell back to the raw image, an error was reported, or OCR found no
+    confident word at all) are served once and recomputed next time rather
+    than pinned for the whole TTL.
+    """
+    if result.get("error") or (result.get("metadata") or {}).get("tesseract_fallback"):
+        return False
+    return result.get("engine") != "tesseract" or result.get("confidence", 0) > 0
+
+
+class LRUCache:
+    """LRU bounded by total (approximate) byte size and item count; event-loop use only"""
+
+    def __init__(self, max_bytes: int, max_items: int = 10000):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: str, value: Any, size: int):
+        if size > self.max_bytes:
+            return  # Larger than the whole cache, not worth keeping
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= old[1]
+        self._entries[key] = (value, size)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes or len(self._entries) > self.max_items:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheStore:
+    """One JSON file per key in a local directory; entries expire by file mtime"""
+
+    name = "disk"
+
+    def __init__(self, directory: str, ttl_seconds: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _get(self, key: str) -> Tuple[Optional[Any], bool]:
+        path = self._path(key)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl_seconds:
+                os.remove(path)
+                return None, True
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f), False
+        except (OSError, ValueError):
+            return None, False
+
+    def _set(self, key: str, payload: str):
+        # Write then rename so readers never see a half-written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(key))
+
+    def sweep(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    async def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, payload: str):
+        await asyncio.to_thread(self._set, key, payload)
+
+    async def setup(self):
+        removed = await asyncio.to_thread(self.sweep)
+        if removed:
+            logger.info(f"Removed {removed} expired OCR cache entries from {self.directory}")
+
+
+class MongoCacheStore:
+    """Entries in a MongoDB collection, expired by a TTL index on expires_at"""
+
+    name = "mongo"
+
+    def __init__(self, collection, ttl_seconds: int):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def setup(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        doc = await self.collection.find_one({"_id": key})
+        if doc is None:
+            return None, False
+        # The TTL monitor only runs once a minute, so check expiry ourselves too
+        expires_at = doc["expires_at"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at < datetime.now(timezone.utc):
+            return None, True
+        return json.loads(doc["value"]), False
+
+    async def set(self, key: str, payload: str):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        await self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "value": payload, "expires_at": expires_at},
+            upsert=True
+        )
+
+
+class OCRResultCache:
+    """
+    Two-tier cache for OCR results.
+
+    Keys combine the content hash of the upload with everything that changes
+    the output: job kind, language, page, OCR options and the preprocessing
+    pipeline version. Values must be JSON-serializable.
+    """
+
+    def __init__(self, pipeline_version: str, max_bytes: int = 64 * 1024 * 1024, store=None,
+                 enabled: bool = True):
+        self.pipeline_version = pipeline_version
+        self.enabled = enabled
+        self.memory = LRUCache(max_bytes)
+        self.store = store
+
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls, pipeline_version: str, db=None) -> "OCRResultCache":
+        """
+        Build from OCR_CACHE_MAX_BYTES, OCR_CACHE_BACKEND (none, disk, mongo),
+        OCR_CACHE_DIR and OCR_CACHE_TTL (seconds). OCR_CACHE_MAX_BYTES=0
+        disables caching entirely.
+        """
+        max_bytes = int(os.environ.get("OCR_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        ttl = int(os.environ.get("OCR_CACHE_TTL", 7 * 24 * 3600))
+        backend = os.environ.get("OCR_CACHE_BACKEND", "none").lower()
+
+        store = None
+        if backend == "disk":
+            directory = os.environ.get("OCR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ocr-cache"))
+            store = DiskCacheStore(directory, ttl)
+        elif backend == "mongo":
+            if db is None:
+                logger.warning("OCR_CACHE_BACKEND=mongo but no database is configured; using memory only")
+            else:
+                store = MongoCacheStore(db.ocr_cache, ttl)
+        elif backend != "none":
+            logger.warning(f"Unknown OCR_CACHE_BACKEND '{backend}', using memory only")
+
+        return cls(pipeline_version, max_bytes=max_bytes, store=store, enabled=max_bytes > 0)
+
+    async def setup(self):
+        """Prepare the persistent tier (indexes, expired-entry sweep)"""
+        if self.store is not None:
+            try:
+                await self.store.setup()
+            except Exception as e:
+                logger.warning(f"OCR cache {self.store.name} tier unavailable: {e}")
+
+    def make_key(self, file_hash: str, kind: str, page: int = 0, **options) -> str:
+        material = json.dumps([file_hash, kind, page, self.pipeline_version, sorted(options.items())])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return dict(value)  # Callers may add keys; keep the cached copy intact
+
+        if self.store is not None:
+            try:
+                value, expired = await self.store.get(key)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"OCR cache read failed: {e}")
+                value, expired = None, False
+            if expired:
+                self.expired += 1
+            if value is not None:
+                self.persistent_hits += 1
+                self.memory.set(key, value, len(json.dumps(value)))
+                return dict(value)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict):
+        if not self.enabled:
+            return
+        payload = json.dumps(value)
+        self.memory.set(key, dict(value), len(payload))
+        if self.store is not None:
+            try:
+                await self.store.set(key, payload)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"OCR cache write failed: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "persistent_tier": self.store.name if self.store is not None else None,
+            "entries": len(self.memory),
+            "size_bytes": self.memory.size_bytes,
+            "max_bytes": self.memory.max_bytes,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "evictions": self.memory.evictions,
+            "expired": self.expired,
+            "errors": self.errors,
+        }
@@ -0,0 +1,328 @@
+"""
+OCR Pipeline Module
+Synchronous decode -> preprocess -> Tesseract steps, run on OCR pool workers
+"""
+
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from PIL import Image
+import pytesseract
+
+from field_extractor import get_field_extractor
+from layout_template import get_template_registry, ocr_zones
+from normalization import (analysis_copy, choose_pdf_dpi, decode_gray, decode_jpeg_scaled, jpeg_analysis_draft,
+                           normalized_scale, pdf_analysis_dpi, render_pdf_page, rescale_upright,
+                           upright_text_height)
+from ocr_result import run_tesseract
+from orientation import apply_orientation, detect_orientation
+from pdf_pages import open_pdf
+from pipeline_common import PIPELINE_VERSION, EmptyDocumentError, UnreadableDocumentError  # noqa: F401 (re-exported)
+from postprocess import get_post_processor
+from preprocessing import preprocess
+from text_layer import read_text_layer
+from uploads import DocumentSource, open_source
+
+logger = logging.getLogger(__name__)
+
+# Try to find tesseract executable
+# (done here rather than in server.py so process-pool workers see it too)
+if not shutil.which('tesseract'):
+    # Common paths on Windows
+    tesseract_paths = [
+        r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+        r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+    ]
+    for path in tesseract_paths:
+        if os.path.exists(path):
+            pytesseract.pytesseract.tesseract_cmd = path
+            break
+
+
+def _upright_analysis(small: Image.Image, orientation: Optional[Dict], timings: Dict) -> Tuple[Dict, Optional[float]]:
+    """Orientation (detected unless given) and upright text height of an analysis copy"""
+    start = time.perf_counter()
+    if orientation is None:
+        orientation = detect_orientation(small)
+    timings["orientation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    text_height = upright_text_height(small, orientation)
+    timings["normalize"] = time.perf_counter() - start
+    return orientation, text_height
+
+
+@contextmanager
+def _decoding() -> Iterator[None]:
+    """Turn PIL's errors for a corrupt or unsupported image into UnreadableDocumentError"""
+    try:
+        yield
+    except (OSError, SyntaxError) as exc:  # UnidentifiedImageError, truncated data
+        raise UnreadableDocumentError() from exc
+
+
+def load_upright_image(source: DocumentSource, content_type: str, page_number: int = 0,
+                       orientation: Optional[Dict] = None) -> Tuple[Image.Image, Dict]:
+    """
+    Decode an uploaded image, or rasterize one page (0-based) of a PDF, as
+    grayscale (all later stages only use luminance), rotated upright, deskewed
+    and normalized so text lands at Tesseract's preferred height.
+
+    The document is given as bytes or as the path of a spooled upload; from a
+    path only the requested PDF page is read.
+
+    Rotation, skew and text height all come from an analysis-size copy (a
+    JPEG DCT draft, a box-reduced image or a small render of the PDF page),
+    text height only once that copy is upright. The page is then decoded at
+    its normalized size: PDF pages rendered at a per-page DPI, JPEGs at a
+    reduced DCT scale when they will be shrunk anyway, other images rescaled
+    up or down. Images are first turned as their EXIF Orientation tag says.
+
+    Pass a previously detected orientation to skip detection; the one used
+    is reported as metadata["orientation"].
+
+    Returns:
+        (image, metadata) where metadata holds sizes, pixel count, scale, the
+        PDF render DPI, the orientation and per-stage timings in seconds
+    """
+    timings = {}
+    if content_type == "application/pdf":
+        # Convert PDF to Image
+        doc = open_pdf(source)
+        try:
+            if doc.page_count < 1:
+                raise EmptyDocumentError("PDF is empty")
+            page = doc.load_page(page_number)
+            start = time.perf_counter()
+            analysis_dpi = pdf_analysis_dpi(page)
+            small = render_pdf_page(page, analysis_dpi)
+            timings["render"] = time.perf_counter() - start
+
+            orientation, text_height = _upright_analysis(small, orientation, timings)
+            if text_height is not None:
+                text_height *= 72.0 / analysis_dpi  # In points
+            start = time.perf_counter()
+            dpi = choose_pdf_dpi(page, text_height)
+            timings["choose_dpi"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            original_image = render_pdf_page(page, dpi)
+            timings["render"] += time.perf_counter() - start
+        finally:
+            doc.close()
+        original_size = list(original_image.size)
+
+        start = time.perf_counter()
+        original_image = apply_orientation(original_image, orientation)
+        timings["orientation"] += time.perf_counter() - start
+        scale = dpi / 72.0
+        text_height = text_height * scale if text_height is not None else None
+    else:
+        # Open image with PIL (lazily: only the header is read here). Closed
+        # explicitly: PIL leaves multi-frame files and undecoded probes open
+        start = time.perf_counter()
+        with _decoding(), Image.open(open_source(source)) as opened:
+            original_size = list(opened.size)
+            is_jpeg = opened.format == "JPEG"
+            if is_jpeg:
+                small, factor = jpeg_analysis_draft(opened)
+            else:
+                original_image = decode_gray(opened)
+                small, factor = analysis_copy(original_image)
+        timings["decode"] = time.perf_counter() - start
+
+        orientation, text_height = _upright_analysis(small, orientation, timings)
+        if text_height is not None:
+            text_height *= factor
+        scale = normalized_scale(original_size[0], original_size[1], text_height)
+
+        remaining_scale = scale
+        if is_jpeg:
+            start = time.perf_counter()
+            with _decoding(), Image.open(open_source(source)) as opened:
+                original_image, remaining_scale = decode_jpeg_scaled(opened, scale)
+            timings["decode"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        original_image = rescale_upright(original_image, remaining_scale, orientation)
+        timings["normalize"] += time.perf_counter() - start
+        dpi = None
+
+    if orientation["rotate"] or orientation["skew"]:
+        logger.info(f"Corrected orientation: rotate {orientation['rotate']}, deskew {orientation['skew']}")
+    metadata = {
+        "dpi": dpi,
+        "original_size": original_size,
+        "size": list(original_image.size),
+        "pixels": original_image.size[0] * original_image.size[1],
+        "scale": round(scale, 4),
+        "text_height": round(text_height, 1) if text_height is not None else None,
+        "orientation": orientation,
+        "timings": timings,
+    }
+    return original_image, metadata
+
+
+def _finish_metadata(metadata: Dict, stage_seconds: Dict[str, float]) -> Dict:
+    """Merge the remaining stage timings in, reported in milliseconds"""
+    timings = {**metadata.pop("timings", {}), **stage_seconds}
+    metadata["timings_ms"] = {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+    return metadata
+
+
+def ocr_document(source: DocumentSource, content_type: str, language: str, force_ocr: bool = False,
+                 page_number: int = 0, orientation: Optional[Dict] = None) -> Dict:
+    """
+    Full OCR of an uploaded document (one page, the first by default, for PDFs).
+
+    PDF pages with a usable text layer are returned directly without OCR
+    unless force_ocr is set; "engine" says which path produced the text.
+    Rotated or skewed pages are straightened first (see load_upright_image).
+
+    Returns:
+        {"text": post-processed text, "confidence": mean word confidence,
+         "median_confidence": ..., "line_confidences": [...], "engine": "tesseract",
+         "metadata": {"size": ..., "pixels": ..., "scale": ..., "dpi": ..., "timings_ms": {...}}}
+        or, for the text-layer path,
+        {"text": ..., "words": [...], "confidence": 100.0, "engine": "text_layer",
+         "metadata": {"timings_ms": {...}}}
+    """
+    timings = {}
+    if content_type == "application/pdf" and not force_ocr:
+        start = time.perf_counter()
+        text_layer = read_text_layer(source, page_number)
+        timings["text_layer"] = time.perf_counter() - start
+        if text_layer:
+            return {**text_layer, "confidence": 100.0, "engine": "text_layer",
+                    "metadata": _finish_metadata({}, timings)}
+
+    original_image, metadata = load_upright_image(source, content_type, page_number, orientation)
+
+    # Grayscale, contrast stretch and Otsu/Sauvola binarization (vectorized)
+    binary_image, preprocess_timings = preprocess(original_image)
+    timings.update(preprocess_timings)
+
+    # Optimize: Run only one robust mode (PSM 3 - Fully Automatic) for speed
+    # A single image_to_data pass yields both the text and the confidences
+    custom_config = '--oem 1 --psm 3'
+    start = time.perf_counter()
+    try:
+        result = run_tesseract(binary_image, language, custom_config)
+    except pytesseract.TesseractNotFoundError:
+        raise
+    except Exception as e:
+        logger.error(f"OCR failed: {str(e)}")
+        # Fallback to raw image if processing failed
+        result = run_tesseract(original_image.convert('L'), language, custom_config)
+        result["confidence"] = 0
+        metadata["tesseract_fallback"] = True
+    timings["tesseract"] = time.perf_counter() - start
+
+    logger.info(f"OCR completed with confidence: {result['confidence']:.2f}%")
+
+    # Apply post-processing to fix common OCR errors
+    start = time.perf_counter()
+    text = post_process_ocr_text(result["text"], language)
+    timings["post_process"] = time.perf_counter() - start
+
+    return {
+        "text": text,
+        "confidence": round(result["confidence"], 2),
+        "median_confidence": round(result["median_confidence"], 2),
+        "line_confidences": result["line_confidences"],
+        "engine": "tesseract",
+        "metadata": _finish_metadata(metadata, timings),
+    }
+
+
+def extract_document_fields(source: DocumentSource, content_type: str, document_type: str, language: str,
+                            force_ocr: bool = False, page_number: int = 0,
+                            orientation: Optional[Dict] = None) -> Dict:
+    """
+    OCR an uploaded document (one page for PDFs) and extract structured fields from the text.
+
+    Like ocr_document, PDF pages with a usable text layer skip OCR. When a
+    layout template exists for document_type only its zones are OCR'd and
+    mapped straight to fields ("engine": "template"); if no zone yields a
+    value the full page is OCR'd as usual.
+
+    Returns:
+        {"fields": extracted fields, "raw_text": post-processed text,
+         "confidence": mean word confidence, "median_confidence": ..., "engine": ...,
+         "metadata": {...}}
+    """
+    timings = {}
+    text_layer = None
+    if content_type == "application/pdf" and not force_ocr:
+        start = time.perf_counter()
+        text_layer = read_text_layer(source, page_number)
+        timings["text_layer"] = time.perf_counter() - start
+
+    metadata = {}
+    if text_layer:
+        processed_text = text_layer["text"]
+        result = {"confidence": 100.0, "median_confidence": 100.0}
+        engine = "text_layer"
+    else:
+        original_image, metadata = load_upright_image(source, content_type, page_number, orientation)
+
+        template = get_template_registry().get(document_type)
+        if template is not None:
+            start = time.perf_counter()
+            zonal = ocr_zones(original_image, template, language,
+                              max_threads=int(os.environ.get("ZONAL_OCR_THREADS", 4)))
+            timings["zones"] = time.perf_counter() - start
+            if zonal["fields"]:
+                logger.info(f"Extracted {len(zonal['fields'])} fields from {document_type} zones ({template.name})")
+                zonal["metadata"] = _finish_metadata(metadata, timings)
+                return zonal
+            logger.info(f"Template {template.name} found no values, falling back to full-page OCR")
+
+        # Same preprocessing as the OCR endpoint
+        binary_image, preprocess_timings = preprocess(original_image)
+        timings.update(preprocess_timings)
+
+        # Perform OCR with specified language
+        custom_config = r'--oem 1 --psm 6'
+        start = time.perf_counter()
+        result = run_tesseract(binary_image, language, custom_config)
+        timings["tesseract"] = time.perf_counter() - start
+
+        # Post-process text
+        start = time.perf_counter()
+        processed_text = post_process_ocr_text(result["text"], language)
+        timings["post_process"] = time.perf_counter() - start
+        engine = "tesseract"
+
+    start = time.perf_counter()
+    fields = extract_fields_from_text(processed_text, document_type)
+    timings["extract_fields"] = time.perf_counter() - start
+
+    return {
+        "fields": fields,
+        "raw_text": processed_text,
+        "confidence": round(result["confidence"], 2),
+        "median_confidence": round(result["median_confidence"], 2),
+        "engine": engine,
+        "metadata": _finish_metadata(metadata, timings),
+    }
+
+
+def extract_fields_from_text(text: str, document_type: str) -> Dict:
+    """Extract structured fields from already OCR'd text"""
+    fields = get_field_extractor().extract_all_fields(text, document_type)
+
+    logger.info(f"Extracted {len(fields)} fields from {document_type}")
+    return fields
+
+
+def post_process_ocr_text(text: str, language: str = "eng") -> str:
+    """
+    Post-process OCR text to fix common recognition errors, with the rules
+    for the given Tesseract language spec (see postprocess.py).
+    """
+    return get_post_processor().process(text, language)
@@ -0,0 +1,193 @@
+"""
+OCR Worker Pool Module
+Runs blocking OCR work (decode, preprocessing, Tesseract) off the event loop
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from scheduling import FairQueue, Lane
+
+logger = logging.getLogger(__name__)
+
+
+class OCRPoolFull(Exception):
+    """Raised when the pool's wait queue is already at capacity"""
+
+
+class OCRWorkerPool:
+    """
+    Bounded executor for OCR jobs.
+
+    At most `max_workers` jobs run at once; up to `max_queue` more per
+    priority class wait for a free worker. Anything beyond that is rejected
+    with OCRPoolFull so callers can answer quickly instead of piling work onto
+    an overloaded box.
+
+    Waiting jobs get free workers in FairQueue order: interactive before
+    bulk, and fairly between the clients of a class. Set `on_wait` to a
+    callable(lane, seconds) to observe how long each job waited.
+
+    Callers that must not fail on a full queue (batch items) pass
+    wait_for_space=True and wait for a place in the queue instead.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None, kind: str = "thread"):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue if max_queue is not None else self.max_workers * 4
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown OCR pool kind: {kind}")
+        self.kind = kind
+
+        self._executor: Optional[Executor] = None
+        self._waiting = FairQueue()
+        self._space_waiters: List[asyncio.Future] = []
+        self._busy = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self.on_wait: Optional[Callable[[Lane, float], None]] = None
+
+    @classmethod
+    def from_env(cls) -> "OCRWorkerPool":
+        """Build a pool from OCR_WORKERS, OCR_QUEUE_SIZE and OCR_POOL_KIND"""
+        workers = os.environ.get("OCR_WORKERS")
+        queue = os.environ.get("OCR_QUEUE_SIZE")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_queue=int(queue) if queue else None,
+            kind=os.environ.get("OCR_POOL_KIND", "thread"),
+        )
+
+    def start(self):
+        """Create the underlying executor (idempotent)"""
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ocr")
+        logger.info(f"OCR pool started: {self.max_workers} {self.kind} workers, queue size {self.max_queue}")
+
+    async def submit(self, fn: Callable, *args, lane: Lane = Lane(), wait_for_space: bool = False,
+                     **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on a pool worker and return its result; if
+        every worker is busy, wait in the given lane. When the lane's queue
+        is full this raises OCRPoolFull, or with wait_for_space waits until
+        a place frees up.
+
+        In process mode fn and its arguments must be picklable, so pass
+        module-level functions rather than closures.
+        """
+        if self._executor is None:
+            self.start()
+
+        start = time.perf_counter()
+        while True:
+            if self._busy < self.max_workers and not len(self._waiting):
+                self._busy += 1
+                break
+            if self._waiting.count(lane.priority) < self.max_queue:
+                await self._wait_for_worker(lane)
+                break
+            if not wait_for_space:
+                self._rejected += 1
+                raise OCRPoolFull(f"OCR queue is full ({self._waiting.count(lane.priority)} {lane.priority} waiting)")
+            await self._wait_for_space()
+        if self.on_wait is not None:
+            self.on_wait(lane, time.perf_counter() - start)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        # Free the slot only when the worker is actually done, even if the
+        # awaiting request is cancelled (e.g. the client disconnected)
+        future.add_done_callback(self._on_done)
+        return await asyncio.shield(future)
+
+    async def _wait_for_worker(self, lane: Lane):
+        future = asyncio.get_running_loop().create_future()
+        entry = self._waiting.push(lane, 1, future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Handed a worker just as the caller went away
+                self._busy -= 1
+                self._hand_over()
+            else:
+                self._waiting.discard(entry)
+                self._wake_space_waiters()
+            raise
+
+    async def _wait_for_space(self):
+        future = asyncio.get_running_loop().create_future()
+        self._space_waiters.append(future)
+        try:
+            await future
+        finally:
+            if future in self._space_waiters:
+                self._space_waiters.remove(future)
+
+    def _wake_space_waiters(self):
+        """Let callers waiting for queue space re-check (each retries in submit)"""
+        waiters, self._space_waiters = self._space_waiters, []
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    def _hand_over(self):
+        """Give free workers to the next waiting jobs"""
+        while self._busy < self.max_workers:
+            entry = self._waiting.pop()
+            if entry is None:
+                break
+            future = entry[4]
+            if not future.done():
+                self._busy += 1
+                future.set_result(None)
+        if self._space_waiters:
+            self._wake_space_waiters()
+
+    def _on_done(self, future: asyncio.Future):
+        self._busy -= 1
+        if future.cancelled() or future.exception() is not None:
+            self._failed += 1
+        else:
+            self._completed += 1
+        self._hand_over()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def busy_workers(self) -> int:
+        return self._busy
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool counters"""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "busy_workers": self._busy,
+            "queue_depth": len(self._waiting),
+            "queue_depth_by_priority": self._waiting.counts(),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and tear down the executor"""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+        logger.info("OCR pool shut down")
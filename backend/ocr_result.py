@@ -0,0 +1,84 @@
+"""
+OCR Result Module
+Builds text and confidence statistics from a single Tesseract TSV run
+"""
+
+import statistics
+from typing import Dict, List
+
+import pytesseract
+
+
+def run_tesseract(image, language: str, config: str) -> Dict:
+    """
+    Run Tesseract once (image_to_data) and derive text plus confidences.
+
+    Returns:
+        {
+            "text": text rebuilt with block/paragraph/line structure,
+            "confidence": mean word confidence,
+            "median_confidence": median word confidence,
+            "line_confidences": [{"text": ..., "confidence": ...}, ...]
+        }
+    """
+    data = pytesseract.image_to_data(image, lang=language, config=config, output_type=pytesseract.Output.DICT)
+    return build_ocr_result(data)
+
+
+def build_ocr_result(data: Dict[str, List]) -> Dict:
+    """Assemble an OCR result from pytesseract's image_to_data DICT output"""
+    paragraphs: List[List[str]] = []
+    line_confidences = []
+    word_confidences: List[float] = []
+
+    current_par = None
+    current_line = None
+    line_words: List[str] = []
+    line_confs: List[float] = []
+
+    def flush_line():
+        if not line_words:
+            return
+        line_text = ' '.join(line_words)
+        paragraphs[-1].append(line_text)
+        line_confidences.append({
+            "text": line_text,
+            "confidence": round(sum(line_confs) / len(line_confs), 2) if line_confs else 0,
+        })
+
+    for i, word in enumerate(data['text']):
+        # Only word-level rows (level 5) carry text
+        if int(data['level'][i]) != 5:
+            continue
+        word = (word or '').strip()
+        if not word:
+            continue
+
+        par_key = (data['page_num'][i], data['block_num'][i], data['par_num'][i])
+        line_key = par_key + (data['line_num'][i],)
+
+        if line_key != current_line:
+            flush_line()
+            line_words, line_confs = [], []
+            current_line = line_key
+        if par_key != current_par:
+            paragraphs.append([])
+            current_par = par_key
+
+        line_words.append(word)
+        conf = float(data['conf'][i])
+        if conf >= 0:
+            line_confs.append(conf)
+            word_confidences.append(conf)
+
+    flush_line()
+
+    # Like image_to_string: lines joined by newlines, a blank line between paragraphs
+    text = '\n\n'.join('\n'.join(lines) for lines in paragraphs if lines)
+
+    return {
+        "text": text,
+        "confidence": sum(word_confidences) / len(word_confidences) if word_confidences else 0,
+        "median_confidence": statistics.median(word_confidences) if word_confidences else 0,
+        "line_confidences": line_confidences,
+    }
@@ -0,0 +1,144 @@
+"""
+Orientation Module
+Detects page rotation (Tesseract OSD) and skew (projection profile) before OCR
+"""
+
+import logging
+import math
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+import pytesseract
+
+from preprocessing import otsu_threshold
+
+logger = logging.getLogger(__name__)
+
+ORIENTATION_MODES = ("osd", "projection", "off")
+
+# OSD runs on a copy whose longer side is at most this many pixels; the
+# skew search on an even smaller one
+OSD_MAX_SIDE = 1600
+SKEW_MAX_SIDE = 800
+
+# OSD guesses below this confidence are ignored (Tesseract's own docs use ~2)
+OSD_MIN_CONFIDENCE = 2.0
+
+# Skew search range and the smallest correction worth a resample, in degrees
+MAX_SKEW = 5.0
+MIN_SKEW = 0.5
+
+# Clockwise rotation reported by OSD -> PIL transpose that applies it
+_TRANSPOSE = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
+
+def _downsample_gray(image: Image.Image, max_side: int) -> Image.Image:
+    factor = max(1, math.ceil(max(image.size) / max_side))
+    small = image.reduce(factor) if factor > 1 else image
+    return small.convert('L')
+
+
+def detect_rotation(image: Image.Image) -> Tuple[int, Optional[float]]:
+    """
+    Clockwise rotation (0/90/180/270) that makes the page upright, via Tesseract OSD.
+
+    Returns:
+        (rotation, OSD confidence); (0, None) when OSD is unavailable, finds
+        too little text, or is not confident enough
+    """
+    small = _downsample_gray(image, OSD_MAX_SIDE)
+    try:
+        osd = pytesseract.image_to_osd(small, config='--psm 0 -c min_characters_to_try=5',
+                                       output_type=pytesseract.Output.DICT)
+    except pytesseract.TesseractNotFoundError:
+        raise
+    except pytesseract.TesseractError as e:
+        # Missing osd.traineddata or too few characters on the page
+        logger.debug(f"OSD failed: {e}")
+        return 0, None
+
+    confidence = float(osd.get("orientation_conf", 0.0))
+    rotation = int(osd.get("rotate", 0)) % 360
+    if confidence < OSD_MIN_CONFIDENCE or rotation not in _TRANSPOSE:
+        return 0, confidence
+    return rotation, confidence
+
+
+def _row_profile_score(ink: Image.Image, angle: float) -> float:
+    """Sharpness of the row ink profile after rotating by angle (degrees, counter-clockwise)"""
+    rotated = np.asarray(ink.rotate(angle, resample=Image.Resampling.NEAREST, expand=True), dtype=np.float64)
+    rows = rotated.sum(axis=1)
+    return float(np.square(np.diff(rows)).sum())
+
+
+def estimate_skew(image: Image.Image) -> float:
+    """
+    Counter-clockwise correction in degrees that levels the text lines.
+
+    Text lines give the sharpest row projection profile when horizontal, so
+    the angle maximizing it is searched coarsely (0.5 deg) within +-MAX_SKEW
+    and then refined (0.1 deg) around the best coarse angle.
+    """
+    gray = np.asarray(_downsample_gray(image, SKEW_MAX_SIDE))
+    ink = gray < otsu_threshold(gray)
+    if ink.mean() > 0.5:
+        ink = ~ink
+    if not ink.any():
+        return 0.0
+    ink_image = Image.fromarray(ink.astype(np.uint8))
+
+    def best(angles):
+        return max(angles, key=lambda angle: _row_profile_score(ink_image, angle))
+
+    coarse = best(np.arange(-MAX_SKEW, MAX_SKEW + 0.01, 0.5))
+    fine = best(np.arange(coarse - 0.4, coarse + 0.41, 0.1))
+    return round(float(fine), 2)
+
+
+def detect_orientation(image: Image.Image, mode: str = None) -> Dict:
+    """
+    Rotation and skew of a page.
+
+    Args:
+        image: decoded page, or an analysis-size copy of one (both are
+               downsampled further here)
+        mode: osd (OSD rotation plus skew), projection (skew only) or off;
+              defaults to OCR_ORIENTATION (osd)
+
+    Returns:
+        {"rotate": clockwise degrees, "skew": counter-clockwise degrees,
+         "osd_confidence": ... or None}
+    """
+    mode = mode or os.environ.get("OCR_ORIENTATION", "osd")
+    if mode not in ORIENTATION_MODES:
+        raise ValueError(f"Unknown orientation mode: {mode}")
+
+    orientation = {"rotate": 0, "skew": 0.0, "osd_confidence": None}
+    if mode == "off":
+        return orientation
+
+    if mode == "osd":
+        orientation["rotate"], orientation["osd_confidence"] = detect_rotation(image)
+        if orientation["rotate"]:
+            image = image.transpose(_TRANSPOSE[orientation["rotate"]])
+
+    skew = estimate_skew(image)
+    if abs(skew) >= MIN_SKEW:
+        orientation["skew"] = skew
+    return orientation
+
+
+def apply_orientation(image: Image.Image, orientation: Dict) -> Image.Image:
+    """Rotate and deskew a page as described by detect_orientation"""
+    if orientation.get("rotate"):
+        image = image.transpose(_TRANSPOSE[orientation["rotate"]])
+    if orientation.get("skew"):
+        fill = 255 if image.mode == 'L' else (255,) * len(image.getbands())
+        image = image.rotate(orientation["skew"], resample=Image.Resampling.BICUBIC, expand=True, fillcolor=fill)
+    return image
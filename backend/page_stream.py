@@ -0,0 +1,118 @@
+"""
+Page Stream Module
+Runs per-page OCR jobs concurrently and streams results as they finish
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, TypeVar
+
+from ocr_pool import OCRPoolFull
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+_DONE = object()
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def error_message(exc: Exception) -> str:
+    """
+    Client-facing message for a failed page or batch item.
+
+    Only bad-input errors (ValueError, e.g. an unreadable or empty document)
+    are passed on; anything else is logged by the caller and reported as a
+    plain failure, since its text can name internal paths.
+    """
+    if isinstance(exc, OCRPoolFull):
+        return "OCR service is busy, please retry"
+    if isinstance(exc, ValueError):
+        return str(exc)
+    return "Processing failed"
+
+
+async def _run_page(run_page: Callable[[int], Awaitable[Dict]], page_number: int) -> Dict:
+    """Run one page job, turning failures into an error record for that page"""
+    try:
+        result = await run_page(page_number)
+    except Exception as exc:
+        if not isinstance(exc, OCRPoolFull):
+            logger.exception(f"Error processing page {page_number + 1}")
+        return {"page": page_number + 1, "error": error_message(exc)}
+    return {"page": page_number + 1, **result}
+
+
+async def iter_completed(run_item: Callable[[T], Awaitable[Dict]], items: Iterable[T],
+                         window: int) -> AsyncIterator[Dict]:
+    """
+    Run run_item over items concurrently and yield results in completion order.
+
+    At most `window` items are in flight at once and items are pulled from
+    the iterable lazily, so memory stays bounded by the window rather than
+    the number of items. run_item should handle its own errors.
+    """
+    remaining = iter(items)
+    order = itertools.count()
+    pending = {}  # task -> launch order, to yield simultaneous completions in order
+
+    def launch_next() -> bool:
+        item = next(remaining, _DONE)
+        if item is _DONE:
+            return False
+        pending[asyncio.ensure_future(run_item(item))] = next(order)
+        return True
+
+    for _ in range(window):
+        if not launch_next():
+            break
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=pending.get):
+                del pending[task]
+                launch_next()
+                yield task.result()
+    finally:
+        # Client went away: don't start anything new for this request
+        for task in pending:
+            task.cancel()
+
+
+def iter_page_results(run_page: Callable[[int], Awaitable[Dict]], page_numbers: List[int],
+                      window: int) -> AsyncIterator[Dict]:
+    """
+    Yield one result per page in completion order.
+
+    run_page(page_number) produces the result for one 0-based page; failures
+    become {"page": n, "error": ...} records instead of ending the stream.
+    """
+    return iter_completed(lambda page_number: _run_page(run_page, page_number), page_numbers, window)
+
+
+async def encode_stream(records: AsyncIterator[Dict], output: str, requested: int,
+                        unit: str = "pages") -> AsyncIterator[str]:
+    """Encode records as NDJSON lines or Server-Sent Events, ending with a summary"""
+    processed = 0
+    failed = 0
+    async for record in records:
+        processed += 1
+        if "error" in record:
+            failed += 1
+        yield _encode(record, output, "page" if unit == "pages" else "item")
+
+    summary = {"done": True, f"{unit}_requested": requested, f"{unit}_processed": processed, f"{unit}_failed": failed}
+    yield _encode(summary, output, "done")
+
+
+def _encode(record: Dict, output: str, event: str) -> str:
+    payload = json.dumps(record, ensure_ascii=False)
+    if output == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return payload + "\n"
@@ -0,0 +1,72 @@
+"""
+PDF Pages Module
+Opening, page-range parsing and page counting for multi-page OCR
+"""
+
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+from pipeline_common import UnreadableDocumentError
+from uploads import DocumentSource
+
+
+def open_pdf(source: DocumentSource) -> "fitz.Document":
+    """
+    Open a PDF from bytes or from a file path (read lazily, page by page)
+
+    Raises:
+        UnreadableDocumentError: if the file is empty or not a readable PDF
+    """
+    try:
+        if isinstance(source, str):
+            return fitz.open(source, filetype="pdf")
+        return fitz.open(stream=source, filetype="pdf")
+    except RuntimeError as exc:  # fitz.FileDataError, EmptyFileError
+        raise UnreadableDocumentError("The file could not be read as a PDF") from exc
+
+
+def count_pages(source: DocumentSource) -> int:
+    """Number of pages in a PDF"""
+    doc = open_pdf(source)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def parse_page_spec(spec: Optional[str], page_count: int) -> List[int]:
+    """
+    Turn a 1-based page spec into sorted 0-based page indexes.
+
+    Accepts comma-separated pages and ranges, with open ends allowed:
+    "1-5,8", "10-", "-3", "all". None or "all" selects every page.
+
+    Raises:
+        ValueError: if the spec is malformed or selects no valid page
+    """
+    if spec is None or spec.strip().lower() in ("", "all"):
+        return list(range(page_count))
+
+    selected = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start_text, end_text = part.split('-', 1)
+                start = int(start_text) if start_text.strip() else 1
+                end = int(end_text) if end_text.strip() else page_count
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid page range: '{part}'")
+
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range: '{part}'")
+        selected.update(range(start - 1, min(end, page_count)))
+
+    if not selected:
+        raise ValueError(f"Page range '{spec}' is outside the document (1-{page_count})")
+    return sorted(selected)
@@ -0,0 +1,36 @@
+"""
+Pipeline Common Module
+OCR pipeline constants, settings and errors the web process needs without loading the OCR stack
+"""
+
+import os
+from typing import Dict
+
+# Bump whenever a change to decoding, preprocessing or OCR settings can change
+# the output; it is part of every OCR cache key
+PIPELINE_VERSION = "8"
+
+
+class EmptyDocumentError(ValueError):
+    """Raised when an uploaded PDF has no pages"""
+
+
+class UnreadableDocumentError(ValueError):
+    """Raised when an upload cannot be decoded as the image or PDF it claims to be"""
+
+    def __init__(self, message: str = "The file could not be read as an image or PDF"):
+        super().__init__(message)
+
+
+def normalization_settings() -> Dict[str, float]:
+    """
+    OCR_TARGET_TEXT_HEIGHT: wanted height of a text line (ascender to
+        descender) in pixels, ~10-12pt text at 300 DPI
+    OCR_MAX_PIXELS: hard cap on the pixels handed to Tesseract
+    OCR_PDF_MAX_DPI: highest render resolution for PDF pages
+    """
+    return {
+        "target_text_height": float(os.environ.get("OCR_TARGET_TEXT_HEIGHT", 40)),
+        "max_pixels": int(os.environ.get("OCR_MAX_PIXELS", 12_000_000)),
+        "pdf_max_dpi": int(os.environ.get("OCR_PDF_MAX_DPI", 300)),
+    }
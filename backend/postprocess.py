@@ -0,0 +1,211 @@
+"""
+Post-processing Module
+OCR text clean-up rules, compiled once per language into as few regex passes as possible
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_FILE = Path(__file__).parent / "postprocess_rules.json"
+
+# Tesseract languages written in Latin script: the only ones where a stray
+# "|" is a misread capital I
+LATIN_SCRIPT_LANGUAGES = {
+    "afr", "aze", "bos", "cat", "ces", "cym", "dan", "deu", "eng", "enm", "epo", "est", "eus", "fil", "fin",
+    "fra", "frm", "gle", "glg", "hat", "hrv", "hun", "ind", "isl", "ita", "lat", "lav", "lit", "ltz", "mlt",
+    "msa", "nld", "nor", "oci", "pol", "por", "ron", "slk", "slv", "spa", "sqi", "swa", "swe", "tgl", "tur",
+    "uzb", "vie", "yor",
+}
+
+PUNCTUATION = ".,!?;:"
+
+# Pass 1 (Latin-script languages): "|" followed by whitespace or an
+# apostrophe ("| saw", "|'ve") is a capital I
+PIPE_AS_I = re.compile(r"\|(?=[\s'])")
+
+# Pass 2 (all languages), one alternation so the text is scanned once:
+#   whitespace before punctuation is dropped ("word ." -> "word."), a space
+#   is added after punctuation run into a letter ("a.b" -> "a. b"), and runs
+#   of spaces collapse to one. The first alternative covers both fixes at once.
+#   The leading lookahead lets the regex engine skip ahead to whitespace or
+#   punctuation instead of trying every alternative at every character.
+SPACING = re.compile(
+    rf"(?=[\s{PUNCTUATION}])(?:"
+    rf"\s+([{PUNCTUATION}])(?=[A-Za-z])"
+    rf"|\s+([{PUNCTUATION}])"
+    rf"|([{PUNCTUATION}])(?=[A-Za-z])"
+    r"| {2,})"
+)
+
+
+def _fix_spacing(match: "re.Match") -> str:
+    index = match.lastindex
+    if index == 1 or index == 3:
+        return match.group(index) + " "
+    if index == 2:
+        return match.group(2)
+    return " "
+
+
+class Rule(NamedTuple):
+    """A custom substitution; languages=None applies it to every language"""
+    pattern: "re.Pattern"
+    replacement: str
+    languages: Optional[frozenset]
+
+
+def parse_rules(data: bytes, source: str = "<rules>") -> List[Rule]:
+    """
+    Parse and compile a custom rule file (patterns use multi-line mode, so
+    ^ and $ match at line ends):
+
+        {"rules": [{"pattern": "\\\\b0(?=[A-Z])", "replacement": "O",
+                    "languages": ["eng"], "ignore_case": false}]}
+
+    Raises:
+        ValueError: on malformed JSON, a missing field or a bad pattern
+    """
+    try:
+        spec = json.loads(data)
+    except ValueError as exc:
+        raise ValueError(f"{source}: invalid JSON ({exc})")
+
+    rules = []
+    for index, entry in enumerate(spec.get("rules", []) if isinstance(spec, dict) else []):
+        try:
+            flags = re.IGNORECASE if entry.get("ignore_case") else 0
+            pattern = re.compile(entry["pattern"], flags | re.MULTILINE)
+            languages = entry.get("languages")
+            rules.append(Rule(pattern, str(entry.get("replacement", "")),
+                              frozenset(languages) if languages else None))
+        except (KeyError, TypeError, AttributeError, re.error) as exc:
+            raise ValueError(f"{source}: rule {index} is invalid ({exc})")
+    return rules
+
+
+class RuleSet:
+    """The passes for one language spec, applied in order"""
+
+    def __init__(self, passes: List[Callable[[str], str]]):
+        self.passes = passes
+
+    def apply(self, text: str) -> str:
+        for apply_pass in self.passes:
+            text = apply_pass(text)
+        return text.strip()
+
+
+def _languages(language: str) -> frozenset:
+    return frozenset(part for part in language.split('+') if part)
+
+
+def build_rule_set(language: str, custom_rules: List[Rule]) -> RuleSet:
+    """
+    Compile the passes for a language spec such as "eng" or "hin+eng":
+    the pipe fix when any of its languages is Latin-script, the spacing
+    fixes, then each matching custom rule (one pass each, in file order).
+    """
+    languages = _languages(language)
+    passes = []
+    if languages & LATIN_SCRIPT_LANGUAGES:
+        passes.append(lambda text: PIPE_AS_I.sub("I", text))
+    passes.append(lambda text: SPACING.sub(_fix_spacing, text))
+    for rule in custom_rules:
+        if rule.languages is None or languages & rule.languages:
+            passes.append(lambda text, rule=rule: rule.pattern.sub(rule.replacement, text))
+    return RuleSet(passes)
+
+
+class PostProcessor:
+    """
+    Rule sets keyed by language spec, built on first use.
+
+    Custom rules come from a JSON file (see parse_rules), re-read when its
+    mtime changes, checked at most every `check_interval` seconds; a broken
+    file is logged and the previous rules are kept.
+    """
+
+    def __init__(self, rules_file: Optional[Path] = DEFAULT_RULES_FILE, check_interval: float = 5.0):
+        self.rules_file = Path(rules_file) if rules_file else None
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._custom_rules: List[Rule] = []
+        self._rule_sets: Dict[str, RuleSet] = {}
+        self._version = ""
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+
+    def _scan(self) -> Tuple:
+        if self.rules_file is None:
+            return ()
+        try:
+            return (self.rules_file.stat().st_mtime_ns,)
+        except OSError:
+            return ()
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = self._scan()
+            if signature == self._signature:
+                return
+
+            custom_rules = []
+            version = ""
+            if signature:
+                try:
+                    data = self.rules_file.read_bytes()
+                    custom_rules = parse_rules(data, str(self.rules_file))
+                except (OSError, ValueError) as exc:
+                    logger.warning(f"Keeping previous post-processing rules: {exc}")
+                    self._signature = signature
+                    return
+                logger.info(f"Loaded {len(custom_rules)} custom post-processing rules from {self.rules_file}")
+                version = hashlib.sha256(data).hexdigest()[:12] if custom_rules else ""
+
+            self._custom_rules = custom_rules
+            self._version = version
+            self._rule_sets = {}
+            self._signature = signature
+
+    @property
+    def version(self) -> str:
+        """Hash of the custom rules in effect ("" when there are none), for cache keys"""
+        self._ensure_fresh()
+        return self._version
+
+    def rule_set(self, language: str) -> RuleSet:
+        self._ensure_fresh()
+        rule_set = self._rule_sets.get(language)
+        if rule_set is None:
+            rule_set = self._rule_sets[language] = build_rule_set(language, self._custom_rules)
+        return rule_set
+
+    def process(self, text: str, language: str = "eng") -> str:
+        return self.rule_set(language).apply(text)
+
+
+_processor: Optional[PostProcessor] = None
+_processor_lock = threading.Lock()
+
+
+def get_post_processor() -> PostProcessor:
+    """Process-wide processor for POSTPROCESS_RULES_FILE (default backend/postprocess_rules.json)"""
+    global _processor
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None:
+                _processor = PostProcessor(Path(os.environ.get("POSTPROCESS_RULES_FILE", DEFAULT_RULES_FILE)))
+    return _processor
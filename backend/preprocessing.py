@@ -0,0 +1,192 @@
+"""
+Preprocessing Module
+Vectorized grayscale, contrast stretching and binarization on uint8 NumPy arrays
+"""
+
+import logging
+import os
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+BINARIZATION_METHODS = ("otsu", "sauvola", "niblack", "none")
+
+
+def to_grayscale(image: Image.Image) -> np.ndarray:
+    """
+    Writable uint8 luminance array of an image.
+
+    PIL's C conversion (ITU-R 601 weights) does the per-pixel work; grayscale
+    inputs are copied without any conversion.
+    """
+    if image.mode != 'L':
+        image = image.convert('L')
+    return np.array(image, dtype=np.uint8)
+
+
+def _histogram(gray: np.ndarray) -> np.ndarray:
+    return np.bincount(gray.ravel(), minlength=256)
+
+
+def stretch_contrast(gray: np.ndarray, low_percent: float = 1.0, high_percent: float = 99.0) -> np.ndarray:
+    """
+    Linearly stretch intensities so the given percentiles map to 0 and 255.
+
+    Percentiles come from the histogram and the mapping is applied through a
+    256-entry lookup table, in place.
+    """
+    cdf = np.cumsum(_histogram(gray))
+    total = cdf[-1]
+    low = int(np.searchsorted(cdf, total * low_percent / 100.0))
+    high = int(np.searchsorted(cdf, total * high_percent / 100.0))
+    if high <= low:
+        return gray  # Flat image, nothing to stretch
+
+    levels = np.arange(256, dtype=np.float32)
+    lut = np.clip((levels - low) * (255.0 / (high - low)), 0, 255).astype(np.uint8)
+    np.take(lut, gray, out=gray)
+    return gray
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Global threshold maximizing between-class variance of the histogram"""
+    hist = _histogram(gray).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+
+    levels = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = np.divide(sum_bg, weight_bg, out=np.zeros(256), where=weight_bg > 0)
+    mean_fg = np.divide(sum_bg[-1] - sum_bg, weight_fg, out=np.zeros(256), where=weight_fg > 0)
+
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    if between.max() == 0:
+        return 0  # A single gray level: no ink to separate, keep the page white
+    # Well-separated histograms give a plateau of equally good thresholds;
+    # take its middle rather than the edge nearest the dark class
+    best = np.flatnonzero(between >= between.max() * (1 - 1e-9))
+    # Pixels <= t are the dark class; a pixel is "white" when > t
+    return int(round(best.mean())) + 1
+
+
+def _padded_integral(values: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Integral image I of values, edge-padded by radius on every side, so that
+    padded[k] = I[clip(k - radius, 0, height)] (and the same along columns).
+
+    Overwrites values with its column-wise cumulative sum.
+    """
+    height, width = values.shape
+    table = np.zeros((height + 2 * radius + 1, width + 2 * radius + 1), dtype=np.float64)
+    np.cumsum(values, axis=0, out=values)
+    np.cumsum(values, axis=1, out=table[radius + 1:radius + 1 + height, radius + 1:radius + 1 + width])
+    table[radius + 1 + height:, :] = table[radius + height]
+    table[:, radius + 1 + width:] = table[:, radius + width, None]
+    return table
+
+
+def _window_sum(table: np.ndarray, shape: Tuple[int, int], radius: int) -> np.ndarray:
+    """Sums over each pixel's window, clipped at the edges, from shifted slices of the padded table"""
+    height, width = shape
+    far = 2 * radius + 1
+    total = table[far:far + height, far:far + width].copy()
+    total -= table[:height, far:far + width]
+    total -= table[far:far + height, :width]
+    total += table[:height, :width]
+    return total
+
+
+def _window_mean_std(gray: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Local mean and standard deviation over a square window, via integral images"""
+    height, width = gray.shape
+    radius = window // 2
+
+    # Window heights and widths, clipped at the image edges
+    rows = (np.minimum(np.arange(height) + radius + 1, height) - np.maximum(np.arange(height) - radius, 0))
+    cols = (np.minimum(np.arange(width) + radius + 1, width) - np.maximum(np.arange(width) - radius, 0))
+    rows = rows.astype(np.float64)[:, None]
+    cols = cols.astype(np.float64)[None, :]
+
+    values = gray.astype(np.float64)
+    mean = _window_sum(_padded_integral(values, radius), gray.shape, radius)
+    mean /= rows
+    mean /= cols
+
+    np.square(gray, out=values, dtype=np.float64)
+    variance = _window_sum(_padded_integral(values, radius), gray.shape, radius)
+    del values
+    variance /= rows
+    variance /= cols
+    variance -= np.square(mean)
+    np.maximum(variance, 0, out=variance)
+    return mean, np.sqrt(variance, out=variance)
+
+
+def sauvola_threshold(gray: np.ndarray, window: int = 25, k: float = 0.2, dynamic_range: float = 128.0) -> np.ndarray:
+    """Per-pixel Sauvola threshold: mean * (1 + k * (std / R - 1))"""
+    mean, std = _window_mean_std(gray, window)
+    return mean * (1.0 + k * (std / dynamic_range - 1.0))
+
+
+def niblack_threshold(gray: np.ndarray, window: int = 25, k: float = -0.2) -> np.ndarray:
+    """Per-pixel Niblack threshold: mean + k * std"""
+    mean, std = _window_mean_std(gray, window)
+    return mean + k * std
+
+
+def binarize(gray: np.ndarray, method: str = "otsu", window: int = 25) -> np.ndarray:
+    """Threshold in place to 0 (ink) / 255 (paper)"""
+    if method == "otsu":
+        threshold = otsu_threshold(gray)
+    elif method == "sauvola":
+        threshold = sauvola_threshold(gray, window)
+    elif method == "niblack":
+        threshold = niblack_threshold(gray, window)
+    else:
+        raise ValueError(f"Unknown binarization method: {method}")
+
+    mask = gray >= threshold
+    gray.fill(0)
+    gray[mask] = 255
+    return gray
+
+
+def preprocess(image: Image.Image, method: str = None) -> Tuple[Image.Image, Dict[str, float]]:
+    """
+    Grayscale -> contrast stretch -> binarization, shared by both OCR endpoints.
+
+    Args:
+        image: decoded input image (any mode)
+        method: otsu, sauvola, niblack or none; defaults to OCR_BINARIZATION (otsu)
+
+    Returns:
+        (8-bit grayscale PIL image ready for Tesseract, {stage: seconds})
+    """
+    method = method or os.environ.get("OCR_BINARIZATION", "otsu")
+    if method not in BINARIZATION_METHODS:
+        raise ValueError(f"Unknown binarization method: {method}")
+
+    timings = {}
+
+    start = time.perf_counter()
+    gray = to_grayscale(image)
+    timings["grayscale"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stretch_contrast(gray)
+    timings["contrast"] = time.perf_counter() - start
+
+    if method != "none":
+        start = time.perf_counter()
+        binarize(gray, method)
+        timings["binarize"] = time.perf_counter() - start
+
+    logger.debug(f"Preprocessing ({method}) timings: {timings}")
+    return Image.fromarray(gray), timings
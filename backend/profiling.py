@@ -0,0 +1,64 @@
+"""
+Profiling Module
+Opt-in cProfile capture of a single OCR run, written where the work actually runs
+"""
+
+import cProfile
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def debug_allowed(admin_token_header: Optional[str]) -> bool:
+    """
+    Whether a request may ask for timings and profiles.
+
+    OCR_DEBUG=1 opens debug mode to everyone (development boxes); otherwise
+    the request must carry the configured ADMIN_TOKEN. Unlike the admin
+    endpoints, an unset ADMIN_TOKEN does not open it up, since profiles are
+    written to local disk.
+    """
+    if os.environ.get("OCR_DEBUG") == "1":
+        return True
+    admin_token = os.environ.get("ADMIN_TOKEN")
+    return bool(admin_token) and admin_token_header == admin_token
+
+
+def profile_dir() -> str:
+    """OCR_PROFILE_DIR, or ocr-profiles under the system temp directory"""
+    return os.environ.get("OCR_PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "ocr-profiles")
+
+
+def _profile_path(directory: str, label: str) -> str:
+    safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label)[:60] or "run"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"{stamp}-{safe_label}-{uuid.uuid4().hex[:8]}.prof")
+
+
+def run_profiled(directory: str, label: str, fn: Callable, *args, **kwargs) -> Dict:
+    """
+    Call fn(*args, **kwargs) under cProfile and dump the stats to directory.
+
+    Module-level so it can be submitted to a process pool: the profile then
+    covers the worker that did the work, not the event loop that waited.
+    The dump path is returned under "profile"; read it with
+    `python -m pstats <path>` or snakeviz.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+
+    os.makedirs(directory, exist_ok=True)
+    path = _profile_path(directory, label)
+    profiler.dump_stats(path)
+    logger.info(f"Profile of {label} written to {path}")
+    return {**result, "profile": path}
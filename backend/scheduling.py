@@ -0,0 +1,172 @@
+"""
+Scheduling Module
+Priority classes and per-client weighted fair queuing for waiting OCR work
+"""
+
+import hashlib
+import heapq
+import itertools
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Highest priority first: a waiting interactive request always goes before
+# any bulk one, and bulk work only gets capacity nobody interactive wants
+PRIORITY_CLASSES = (INTERACTIVE, BULK)
+
+
+class Lane(NamedTuple):
+    """Who is asking: a priority class, a client within it and the client's weight"""
+    priority: str = INTERACTIVE
+    client: str = "anonymous"
+    weight: float = 1.0
+
+
+# Background work (async jobs) that has no request to take a lane from
+JOBS_LANE = Lane(BULK, "jobs")
+
+
+def parse_api_keys(spec: str) -> Dict[str, Tuple[str, float]]:
+    """
+    Parse OCR_API_KEYS, comma-separated key=class[:weight] entries:
+
+        OCR_API_KEYS="k3y-intake=bulk,k3y-portal=interactive:2"
+
+    Raises:
+        ValueError: on an unknown class or a bad weight
+    """
+    keys = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        key, _, lane = entry.partition('=')
+        priority, _, weight = lane.partition(':')
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"OCR_API_KEYS: unknown priority class {priority!r} (expected one of {PRIORITY_CLASSES})")
+        try:
+            keys[key.strip()] = (priority, float(weight) if weight else 1.0)
+        except ValueError:
+            raise ValueError(f"OCR_API_KEYS: bad weight {weight!r} for a {priority} key")
+    return keys
+
+
+class LaneResolver:
+    """
+    Picks a request's lane from its X-Priority header and X-API-Key.
+
+    A configured API key fixes the class (X-Priority may lower it to bulk,
+    never raise it), its weight and the client identity. Without one the
+    header picks the class and the client is the remote address.
+    """
+
+    def __init__(self, api_keys: Optional[Dict[str, Tuple[str, float]]] = None):
+        self.api_keys = api_keys or {}
+
+    @classmethod
+    def from_env(cls) -> "LaneResolver":
+        return cls(parse_api_keys(os.environ.get("OCR_API_KEYS", "")))
+
+    def resolve(self, priority: Optional[str], api_key: Optional[str], remote: Optional[str],
+                default: str = INTERACTIVE) -> Lane:
+        """
+        Raises:
+            ValueError: priority is not one of PRIORITY_CLASSES
+        """
+        if priority is not None:
+            priority = priority.strip().lower()
+            if priority not in PRIORITY_CLASSES:
+                raise ValueError(f"X-Priority must be one of {', '.join(PRIORITY_CLASSES)}")
+
+        known = self.api_keys.get(api_key) if api_key else None
+        if known is not None:
+            key_priority, weight = known
+            if priority is not None and PRIORITY_CLASSES.index(priority) > PRIORITY_CLASSES.index(key_priority):
+                key_priority = priority
+            # Keys are identified by a hash so they never show up in stats or logs
+            return Lane(key_priority, "key-" + hashlib.sha256(api_key.encode()).hexdigest()[:12], weight)
+        return Lane(priority or default, remote or "anonymous")
+
+
+class FairQueue:
+    """
+    Waiting items ordered by priority class, then by weighted fair queuing
+    between the clients of a class.
+
+    Each item gets a virtual finish tag: its client's previous tag (or the
+    class's virtual clock, whichever is later) plus cost / weight. Serving the
+    smallest tag first gives every waiting client a share of the class in
+    proportion to its weight, so one client's thousand-item backlog only
+    delays another client by about one item per round.
+
+    Removal is lazy: discard() marks an entry and pop/peek skip it.
+    """
+
+    def __init__(self):
+        self._heaps: Dict[str, List[list]] = {priority: [] for priority in PRIORITY_CLASSES}
+        self._clock: Dict[str, float] = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._last_tag: Dict[Tuple[str, str], float] = {}
+        self._waiting: Dict[Tuple[str, str], int] = {}
+        self._counts: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._costs: Dict[str, float] = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._sequence = itertools.count()
+
+    def push(self, lane: Lane, cost: float, item: Any) -> list:
+        """Queue an item; the returned entry can be passed to discard()"""
+        client = (lane.priority, lane.client)
+        start = max(self._clock[lane.priority], self._last_tag.get(client, 0.0))
+        tag = start + cost / max(lane.weight, 1e-6)
+        self._last_tag[client] = tag
+        self._waiting[client] = self._waiting.get(client, 0) + 1
+        self._counts[lane.priority] += 1
+        self._costs[lane.priority] += cost
+        entry = [tag, next(self._sequence), lane, cost, item, True]
+        heapq.heappush(self._heaps[lane.priority], entry)
+        return entry
+
+    def _forget(self, entry: list):
+        entry[5] = False
+        lane, cost = entry[2], entry[3]
+        client = (lane.priority, lane.client)
+        self._counts[lane.priority] -= 1
+        self._costs[lane.priority] -= cost
+        self._waiting[client] -= 1
+        if not self._waiting[client]:
+            # An idle client starts again from the class clock
+            del self._waiting[client]
+            del self._last_tag[client]
+
+    def discard(self, entry: list):
+        if entry[5]:
+            self._forget(entry)
+
+    def peek(self) -> Optional[list]:
+        """The next entry to serve, as [tag, seq, lane, cost, item, alive], or None"""
+        for priority in PRIORITY_CLASSES:
+            heap = self._heaps[priority]
+            while heap and not heap[0][5]:
+                heapq.heappop(heap)
+            if heap:
+                return heap[0]
+        return None
+
+    def pop(self) -> Optional[list]:
+        entry = self.peek()
+        if entry is not None:
+            heapq.heappop(self._heaps[entry[2].priority])
+            self._clock[entry[2].priority] = entry[0]
+            self._forget(entry)
+        return entry
+
+    def __len__(self) -> int:
+        return sum(self._counts.values())
+
+    def count(self, priority: str) -> int:
+        return self._counts[priority]
+
+    def cost_at_or_above(self, priority: str) -> float:
+        """Cost waiting in this class and the classes ahead of it"""
+        rank = PRIORITY_CLASSES.index(priority)
+        return sum(self._costs[p] for p in PRIORITY_CLASSES[:rank + 1])
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._counts)
@@ -1,23 +1,40 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException
+from fastapi import FastAPI, APIRouter, UploadFile, File, Form, HTTPException, Header, Depends, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
+from starlette.background import BackgroundTask
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+import importlib
 import os
 import logging
+import sys
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import time
 import uuid
 from datetime import datetime, timezone
-from io import BytesIO
 
-from PIL import Image
-import pytesseract
-import fitz # PyMuPDF
-
-from field_extractor import FieldExtractor
+from field_extractor import get_field_extractor
+from postprocess import get_post_processor
+from language_registry import LanguageRegistry
+from ocr_pool import OCRWorkerPool, OCRPoolFull
+from admission import AdmissionController, AdmissionRejected, PageAdmission, estimate_pixels
+from scheduling import BULK, INTERACTIVE, Lane, LaneResolver
+from ocr_cache import OCRResultCache, cacheable_result, hash_bytes
+from pipeline_common import PIPELINE_VERSION, EmptyDocumentError, UnreadableDocumentError
+from page_stream import STREAM_MEDIA_TYPES, error_message, iter_completed, iter_page_results, encode_stream
+from batch_items import BatchError, BatchItem, BatchTooLarge, collect_batch_items, is_supported_type
+from jobs import JOB_KINDS, job_store_from_env, new_job, public_view
+from uploads import (
+    OCTET_STREAM, DocumentSource, MultipartError, SpooledUpload, UploadLimitMiddleware, UploadTooLarge,
+    max_upload_bytes, spool_chunks, spool_multipart
+)
+from profiling import debug_allowed, profile_dir, run_profiled
+from metrics import CONTENT_TYPE, PIXEL_BUCKETS, MetricsMiddleware, MetricsRegistry
 
 
 ROOT_DIR = Path(__file__).parent
@@ -32,14 +49,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# MongoDB connection, made in the lifespan hook when MONGO_URL is set (see
+# connect_database). Without one the status routes answer 503 and jobs and
+# OCR caches stay in this process.
+client = None
+db = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_services()
+    try:
+        yield
+    finally:
+        await stop_services()
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -63,6 +90,7 @@ async def root():
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
+    require_database()
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
     
@@ -75,6 +103,7 @@ async def create_status_check(input: StatusCheckCreate):
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
+    require_database()
     # Exclude MongoDB's _id field from the query results
     status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
     
@@ -88,214 +117,596 @@ async def get_status_checks():
 
 # We'll use pytesseract which is more accurate for documents
 # Note: Tesseract binary needs to be installed separately
-import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
-
-# Try to find tesseract executable
-import shutil
-if not shutil.which('tesseract'):
-    # Common paths on Windows
-    tesseract_paths = [
-        r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-        r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-    ]
-    for path in tesseract_paths:
-        if os.path.exists(path):
-            pytesseract.pytesseract.tesseract_cmd = path
-            break
+
+# Blocking OCR work runs here so the event loop keeps serving other routes
+ocr_pool = OCRWorkerPool.from_env()
+
+# Upload endpoints wait here, by estimated pixel cost, before any decoding
+# starts; past a short queue they are turned away with 429 + Retry-After
+admission = AdmissionController.from_env(ocr_pool.max_workers)
+
+# Priority class (interactive / bulk) and client of each request, from the
+# X-Priority and X-API-Key headers (see scheduling.py)
+lane_resolver = LaneResolver.from_env()
+
+# Results keyed by upload content hash, so re-uploads skip OCR entirely.
+# Built in start_services, once the database (if any) is known.
+result_cache: Optional[OCRResultCache] = None
+
+# Detected page rotation/skew by content hash: a document re-run with other
+# options (language, document type) skips orientation detection
+orientation_cache: Optional[OCRResultCache] = None
+
+# Installed languages are listed once (during warm-up) and then served from
+# memory; watch_languages reloads them off the event loop when tessdata changes
+language_registry = LanguageRegistry()
+language_watch_task: Optional[asyncio.Task] = None
+
+# Asynchronous jobs: queued here, run by job_worker.py processes (or an
+# embedded worker when the store only lives in this process)
+job_store = None
+embedded_job_worker = None
+embedded_job_task: Optional[asyncio.Task] = None
+
+# Flipped once the startup warm-up has run; GET /api/health/ready answers
+# 503 until then (and again while shutting down) so the load balancer only
+# routes to warm workers
+readiness: Dict[str, Any] = {"ready": False, "state": "starting"}
+warmup_task: Optional[asyncio.Task] = None
+
+# Prometheus metrics, scraped from GET /metrics. Stage timings come from the
+# "timings_ms" the pipeline already reports, so nothing extra runs per page.
+# The registry belongs to this process: under gunicorn a scrape sees one
+# worker only (see gunicorn.conf.py).
+metrics = MetricsRegistry()
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+http_latency = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"))
+stage_latency = metrics.histogram(
+    "ocr_stage_duration_seconds", "Time spent in each OCR pipeline stage", ("stage",))
+input_pixels = metrics.histogram(
+    "ocr_input_pixels", "Page size in pixels as decoded and as handed to Tesseract", ("phase",),
+    buckets=PIXEL_BUCKETS)
+language_fallbacks = metrics.counter(
+    "ocr_language_fallbacks_total", "Requests that asked for a language that is not installed")
+tesseract_failures = metrics.counter(
+    "ocr_tesseract_failures_total", "Tesseract runs that failed or fell back to the raw image", ("reason",))
+metrics.gauge("ocr_pool_busy_workers", "OCR jobs running right now",
+              callback=lambda: [({}, ocr_pool.stats()["busy_workers"])])
+metrics.gauge("ocr_pool_queue_depth", "OCR jobs waiting for a worker",
+              callback=lambda: [({}, ocr_pool.stats()["queue_depth"])])
+metrics.counter("ocr_pool_jobs_total", "OCR pool jobs by outcome", ("outcome",),
+                callback=lambda: [({"outcome": outcome}, ocr_pool.stats()[outcome])
+                                  for outcome in ("completed", "failed", "rejected")])
+metrics.gauge("ocr_admission_in_flight_pixels", "Estimated pixels of admitted OCR requests",
+              callback=lambda: [({}, admission.stats()["in_flight_pixels"])])
+metrics.gauge("ocr_admission_waiting_requests", "OCR requests waiting for admission", ("priority",),
+              callback=lambda: [({"priority": priority}, count)
+                                for priority, count in admission.stats()["waiting_by_priority"].items()])
+queue_wait = metrics.histogram(
+    "ocr_queue_wait_seconds", "Time OCR work waited for admission or a pool worker, by priority class",
+    ("queue", "priority"))
+ocr_pool.on_wait = lambda lane, seconds: queue_wait.observe(seconds, queue="pool", priority=lane.priority)
+metrics.counter("ocr_admission_rejections_total", "OCR requests turned away with 429", ("reason",),
+                callback=lambda: [({"reason": reason}, count)
+                                  for reason, count in admission.stats()["rejected"].items()])
+# A miss has gone through every tier, hence tier="all"
+metrics.counter("ocr_cache_requests_total", "OCR cache lookups by cache, answering tier and result",
+                ("cache", "tier", "result"),
+                callback=lambda: [({"cache": name, "tier": tier, "result": result}, cache.stats()[stat])
+                                  for name, cache in (("result", result_cache), ("orientation", orientation_cache))
+                                  if cache is not None  # Built at startup
+                                  for tier, result, stat in (("memory", "hit", "hits"),
+                                                             ("persistent", "hit", "persistent_hits"),
+                                                             ("all", "miss", "misses"))])
+metrics.gauge("server_ready", "1 once this worker has warmed up and takes traffic",
+              callback=lambda: [({}, 1 if readiness["ready"] else 0)])
+
+
+def validate_language(language: str) -> str:
+    """Return a Tesseract language spec with uninstalled languages removed"""
+    resolved, missing = language_registry.resolve(language)
+    if missing:
+        language_fallbacks.inc()
+        logger.warning(f"Language(s) {missing} not installed. Available: {language_registry.available()}")
+        logger.info(f"Using '{resolved}' instead of '{language}'")
+    return resolved
+
+
+def require_database():
+    if db is None:
+        raise HTTPException(status_code=503, detail="No database configured (set MONGO_URL and DB_NAME)")
+
+
+def tesseract_failure(exc: BaseException) -> Optional[str]:
+    """
+    "not_found" or "error" when exc came from pytesseract, else None.
+
+    pytesseract is only imported with the pipeline (or when one of its errors
+    is unpickled from a worker process), so until it is loaded nothing raised
+    can be one of its errors.
+    """
+    pytesseract = sys.modules.get("pytesseract")
+    if pytesseract is None:
+        return None
+    if isinstance(exc, pytesseract.TesseractNotFoundError):
+        return "not_found"
+    if isinstance(exc, pytesseract.TesseractError):
+        return "error"
+    return None
+
+
+def request_lane(default: str) -> Callable[..., Lane]:
+    """Dependency resolving a request's lane, with `default` as the class when no header or key sets one"""
+    def resolve(request: Request, x_priority: Optional[str] = Header(None),
+                x_api_key: Optional[str] = Header(None)) -> Lane:
+        try:
+            return lane_resolver.resolve(x_priority, x_api_key, request.client.host if request.client else None,
+                                         default)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    return resolve
+
+
+interactive_lane = request_lane(INTERACTIVE)
+bulk_lane = request_lane(BULK)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard admin endpoints with ADMIN_TOKEN when one is configured"""
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if admin_token and x_admin_token != admin_token:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
 
 @api_router.get("/available-languages")
 async def get_available_languages():
     """
     Get list of installed Tesseract languages
     """
-    try:
-        import subprocess
-        result = subprocess.run(
-            [pytesseract.pytesseract.tesseract_cmd, '--list-langs'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        available_langs = result.stdout.strip().split('\n')[1:]  # Skip first line (header)
-        return {
-            "languages": available_langs,
-            "count": len(available_langs),
-            "message": "To add more languages, download .traineddata files from https://github.com/tesseract-ocr/tessdata"
-        }
-    except Exception as e:
-        logger.exception("Error getting available languages")
+    available_langs = language_registry.available()
+    if not available_langs:
         return {
             "languages": ["eng"],
             "count": 1,
-            "error": str(e)
+            "error": language_registry.error or ("No languages found" if language_registry.loaded
+                                                 else "Language list not loaded yet")
         }
+    return {
+        "languages": available_langs,
+        "count": len(available_langs),
+        "message": "To add more languages, download .traineddata files from https://github.com/tesseract-ocr/tessdata"
+    }
+
+
+@api_router.post("/admin/languages/refresh", dependencies=[Depends(require_admin)])
+async def refresh_languages():
+    """Re-read the installed language list (e.g. after adding .traineddata files)"""
+    await asyncio.to_thread(language_registry.load)
+    return language_registry.stats()
+
+def record_pipeline_metrics(result: Dict):
+    """Feed the stage timings and page size of a freshly computed result into the metrics"""
+    metadata = result.get("metadata") or {}
+    for stage, ms in (metadata.get("timings_ms") or {}).items():
+        stage_latency.observe(ms / 1000, stage=stage)
+    if "pixels" in metadata:
+        original = metadata.get("original_size")
+        if original:
+            input_pixels.observe(original[0] * original[1], phase="original")
+        input_pixels.observe(metadata["pixels"], phase="normalized")
+    if metadata.get("tesseract_fallback"):
+        tesseract_failures.inc(reason="fallback")
+
+
+async def run_pipeline(fn: Callable, *args, profile_label: Optional[str] = None, lane: Lane = Lane(),
+                       wait_for_space: bool = False, **kwargs) -> Dict:
+    """
+    Run a pipeline function on the OCR pool, queued in the given lane when
+    every worker is busy (see OCRWorkerPool.submit for wait_for_space), and
+    record its metrics.
+
+    With a profile_label the run is wrapped in cProfile on the worker and the
+    dump path comes back under "profile".
+    """
+    try:
+        if profile_label:
+            result = await ocr_pool.submit(run_profiled, profile_dir(), profile_label, fn, *args, lane=lane,
+                                           wait_for_space=wait_for_space, **kwargs)
+        else:
+            result = await ocr_pool.submit(fn, *args, lane=lane, wait_for_space=wait_for_space, **kwargs)
+    except Exception as exc:
+        reason = tesseract_failure(exc)
+        if reason:
+            tesseract_failures.inc(reason=reason)
+        raise
+    record_pipeline_metrics(result)
+    return result
+
+
+def debug_view(result: Dict, request_timings: Dict[str, float], job_start: float, pool_seconds: float,
+               profile_path: Optional[str]) -> Dict:
+    """
+    A fresh result with a per-stage "timings" object in milliseconds.
+
+    Besides the pipeline stages this has the request-level steps (upload read
+    and hash), the time spent waiting for and handing work to a pool worker,
+    and the total for this page.
+    """
+    stages = dict((result.get("metadata") or {}).get("timings_ms") or {})
+    pool_ms = pool_seconds * 1000
+    timings = {
+        **{step: round(seconds * 1000, 2) for step, seconds in request_timings.items()},
+        **stages,
+        "queue_wait": round(max(0.0, pool_ms - sum(stages.values())), 2),
+        "total": round((time.perf_counter() - job_start) * 1000, 2),
+    }
+    view = {**result, "timings": timings}
+    if profile_path:
+        view["profile"] = profile_path
+    return view
+
+
+def check_debug(debug: bool, profile: bool, x_admin_token: Optional[str]) -> bool:
+    """Whether debug output is on for a request; 403 if it was asked for without permission"""
+    if (debug or profile) and not debug_allowed(x_admin_token):
+        raise HTTPException(status_code=403, detail="Debug mode requires the admin token")
+    return debug or profile
+
+
+async def receive_upload(spool: Awaitable[SpooledUpload]) -> SpooledUpload:
+    """Await a spool_upload/spool_chunks call: 413 when over the size limit, timed as upload_read"""
+    try:
+        upload = await spool
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    stage_latency.observe(upload.spool_seconds, stage="upload_read")
+    return upload
+
+
+def check_declared_type(content_type: Optional[str]):
+    """400 for a declared type that is neither a document nor left to sniffing"""
+    if content_type not in (None, OCTET_STREAM) and not is_supported_type(content_type):
+        raise HTTPException(status_code=400, detail="Only image files and PDFs are supported.")
+
+
+# OpenAPI description of the body read by receive_file_upload
+FILE_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}},
+        }}},
+    }
+}
+
 
-@api_router.post("/ocr")
+async def receive_file_upload(request: Request) -> SpooledUpload:
+    """
+    receive_upload for the "file" field of a multipart body, spooled straight
+    off the request stream (see spool_multipart); 400 for a missing file or an
+    unsupported declared type.
+    """
+    spool = spool_multipart(request.stream(), request.headers.get("content-type"), "file", max_upload_bytes(),
+                            check_type=check_declared_type)
+    try:
+        return await receive_upload(spool)
+    except MultipartError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def body_content_type(request: Request) -> Optional[str]:
+    content_type = request.headers.get("content-type")
+    return content_type.split(";")[0].strip().lower() if content_type else None
+
+
+async def hash_upload(file_bytes: bytes) -> str:
+    """Content hash of an upload; large files are hashed off the event loop"""
+    if len(file_bytes) > 1024 * 1024:
+        return await asyncio.to_thread(hash_bytes, file_bytes)
+    return hash_bytes(file_bytes)
+
+
+async def cached_orientation(file_hash: str, page_number: int) -> Optional[Dict]:
+    return await orientation_cache.get(orientation_cache.make_key(file_hash, "orientation", page_number))
+
+
+async def remember_orientation(file_hash: str, page_number: int, known: Optional[Dict], result: Dict):
+    """Cache the orientation a pool job detected, if it had to detect one"""
+    orientation = result.get("metadata", {}).get("orientation")
+    if known is None and orientation is not None:
+        await orientation_cache.set(orientation_cache.make_key(file_hash, "orientation", page_number), orientation)
+
+
+async def run_ocr_job(source: DocumentSource, file_hash: str, content_type: str, language: str,
+                      force_ocr: bool, page_number: int = 0, debug_timings: Optional[Dict[str, float]] = None,
+                      profile: bool = False, lane: Lane = Lane()) -> Dict:
+    """
+    OCR one page on the pool (waiting in the given lane), served from the
+    result cache when possible.
+
+    debug_timings (request-level step timings, seconds) turns on debug mode:
+    the cache is bypassed so the page really runs, and the result carries a
+    "timings" breakdown (see debug_view). profile also captures a cProfile dump.
+    """
+    from ocr_pipeline import ocr_document
+
+    job_start = time.perf_counter()
+    options = {"language": language, "force_ocr": force_ocr}
+    if get_post_processor().version:
+        options["rules"] = get_post_processor().version
+    key = result_cache.make_key(file_hash, "ocr", page_number, **options)
+    if debug_timings is None:
+        cached = await result_cache.get(key)
+        if cached is not None:
+            return cached
+
+    orientation = await cached_orientation(file_hash, page_number)
+    pool_start = time.perf_counter()
+    result = await run_pipeline(ocr_document, source, content_type, language, force_ocr,
+                                page_number=page_number, orientation=orientation, lane=lane,
+                                profile_label=f"ocr-{file_hash[:12]}-p{page_number + 1}" if profile else None)
+    pool_seconds = time.perf_counter() - pool_start
+    profile_path = result.pop("profile", None)
+    await remember_orientation(file_hash, page_number, orientation, result)
+    if cacheable_result(result):
+        await result_cache.set(key, result)
+    if debug_timings is not None:
+        return debug_view(result, debug_timings, job_start, pool_seconds, profile_path)
+    return result
+
+
+async def run_extract_job(source: DocumentSource, file_hash: str, content_type: str, document_type: str,
+                          language: str, force_ocr: bool, page_number: int = 0,
+                          debug_timings: Optional[Dict[str, float]] = None, profile: bool = False,
+                          lane: Lane = Lane(), wait_for_space: bool = False) -> Dict:
+    """
+    Field extraction for one page. Only the OCR part is cached: fields are
+    re-extracted from the cached text each time so newly trained patterns
+    apply without re-running OCR. Zonal (layout template) results map zones
+    to fields directly and are cached whole, keyed by the template version.
+
+    debug_timings, profile and lane work as in run_ocr_job; wait_for_space
+    waits for room in a full pool queue instead of failing (batch items).
+    """
+    from layout_template import get_template_registry
+    from ocr_pipeline import extract_document_fields, extract_fields_from_text
+
+    job_start = time.perf_counter()
+    options = {"language": language, "force_ocr": force_ocr}
+    template = get_template_registry().get(document_type)
+    if template is not None:
+        options["template"] = template.key
+    if get_post_processor().version:
+        options["rules"] = get_post_processor().version
+    key = result_cache.make_key(file_hash, "extract_fields", page_number, **options)
+    cached = await result_cache.get(key) if debug_timings is None else None
+    if cached is not None:
+        if cached.get("engine") == "template":
+            return cached
+        fields = await asyncio.to_thread(extract_fields_from_text, cached["raw_text"], document_type)
+        return {"fields": fields, **cached}
+
+    orientation = await cached_orientation(file_hash, page_number)
+    pool_start = time.perf_counter()
+    result = await run_pipeline(extract_document_fields, source, content_type, document_type, language,
+                                force_ocr, page_number=page_number, orientation=orientation, lane=lane,
+                                wait_for_space=wait_for_space,
+                                profile_label=f"extract-{file_hash[:12]}-p{page_number + 1}" if profile else None)
+    pool_seconds = time.perf_counter() - pool_start
+    profile_path = result.pop("profile", None)
+    await remember_orientation(file_hash, page_number, orientation, result)
+    if cacheable_result(result):
+        await result_cache.set(key, result if result.get("engine") == "template"
+                               else {k: v for k, v in result.items() if k != "fields"})
+    if debug_timings is not None:
+        return debug_view(result, debug_timings, job_start, pool_seconds, profile_path)
+    return result
+
+
+async def process_document(run_page: Callable[[int], Awaitable[Dict]], source: DocumentSource, content_type: str,
+                           pages: Optional[str], output: str):
+    """
+    Run a per-page job on an upload, page by page for PDFs when asked.
+
+    With no page range and JSON output this is a single job (first page of a
+    PDF, as before). Otherwise every selected PDF page becomes its own job,
+    and results are either collected into one JSON body or streamed as
+    NDJSON / Server-Sent Events as each page finishes.
+    """
+    if output not in ("json", *STREAM_MEDIA_TYPES):
+        raise HTTPException(status_code=400, detail=f"Unsupported output format: {output}")
+
+    is_pdf = content_type == "application/pdf"
+    if output == "json" and (pages is None or not is_pdf):
+        return await run_page(0)
+
+    page_count = 1
+    page_numbers = [0]
+    if is_pdf:
+        from pdf_pages import count_pages, parse_page_spec
+
+        page_count = await asyncio.to_thread(count_pages, source)
+        if page_count < 1:
+            raise EmptyDocumentError("PDF is empty")
+        try:
+            page_numbers = parse_page_spec(pages, page_count)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    records = iter_page_results(run_page, page_numbers, window=ocr_pool.max_workers)
+    if output == "json":
+        results = [record async for record in records]
+        results.sort(key=lambda record: record["page"])
+        return {"page_count": page_count, "pages": results}
+
+    return StreamingResponse(
+        encode_stream(records, output, len(page_numbers)),
+        media_type=STREAM_MEDIA_TYPES[output]
+    )
+
+
+async def serve_upload(upload: SpooledUpload, run_page: Callable[[int], Awaitable[Dict]], pages: Optional[str],
+                       output: str, action: str, lane: Lane) -> Any:
+    """
+    process_document on a spooled upload, with pipeline errors mapped to HTTP
+    errors.
+
+    The upload first waits for admission in its lane by the estimated pixel
+    cost of one page and gets a 429 with Retry-After if it cannot be admitted
+    soon. Further pages of a multi-page PDF running beside it are admitted
+    one by one (see PageAdmission). The spool file and the admission are
+    released once the response is done with them: right away for JSON, after
+    the last record for streams.
+    """
+    streaming = False
+    cost = 0
+    try:
+        if not is_supported_type(upload.content_type):
+            raise HTTPException(status_code=400, detail="Only image files and PDFs are supported.")
+        pixels = await asyncio.to_thread(estimate_pixels, upload.path, upload.content_type)
+        start = time.perf_counter()
+        cost = await admission.acquire(pixels, lane)
+        queue_wait.observe(time.perf_counter() - start, queue="admission", priority=lane.priority)
+
+        page_admission = PageAdmission(admission, pixels, lane)
+
+        async def run_admitted_page(page_number: int) -> Dict:
+            return await page_admission.run(run_page, page_number)
+
+        response = await process_document(run_admitted_page, upload.path, upload.content_type, pages, output)
+        if isinstance(response, StreamingResponse):
+            async def finish():
+                upload.cleanup()
+                admission.release(cost)
+
+            response.background = BackgroundTask(finish)
+            streaming = True
+        return response
+    except HTTPException:
+        raise
+    except AdmissionRejected as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+    except OCRPoolFull:
+        raise HTTPException(status_code=503, detail="OCR service is busy, please retry shortly")
+    except (EmptyDocumentError, UnreadableDocumentError) as exc:
+        # Fixed messages: neither carries the decoder's error (or the spool path)
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        if tesseract_failure(exc) == "not_found":
+            logger.error("Tesseract OCR not found")
+            raise HTTPException(
+                status_code=500,
+                detail="Tesseract OCR is not installed. Please install from https://github.com/UB-Mannheim/tesseract/wiki"
+            )
+        # Logged here only: the exception text can name internal paths
+        logger.exception(f"Error during {action}")
+        raise HTTPException(status_code=500, detail=f"{action} failed") from exc
+    finally:
+        if not streaming:
+            upload.cleanup()
+            admission.release(cost)
+
+
+async def ocr_upload(upload: SpooledUpload, language: str, pages: Optional[str], output: str, force_ocr: bool,
+                     debug: bool, profile: bool, lane: Lane) -> Any:
+    debug_timings = {"upload": upload.spool_seconds} if debug else None
+
+    async def run_page(page_number: int) -> Dict:
+        return await run_ocr_job(upload.path, upload.sha256, upload.content_type, language, force_ocr, page_number,
+                                 debug_timings, profile, lane)
+
+    return await serve_upload(upload, run_page, pages, output, "OCR processing", lane)
+
+
+@api_router.post("/ocr", openapi_extra=FILE_UPLOAD_BODY)
 async def perform_ocr(
-    file: UploadFile = File(...),
-    language: str = "eng"
+    request: Request,
+    language: str = "eng",
+    pages: Optional[str] = None,
+    output: str = "json",
+    force_ocr: bool = False,
+    debug: bool = False,
+    profile: bool = False,
+    x_admin_token: Optional[str] = Header(None),
+    lane: Lane = Depends(interactive_lane)
 ):
     """
     Perform OCR on an uploaded image file and return extracted text.
     Uses Tesseract OCR with advanced image preprocessing for better accuracy.
     
     Args:
-        file: Image file to process
+        file: Image file to process (application/octet-stream is sniffed)
         language: Tesseract language code (eng, spa, fra, deu, hin, ara, etc.)
+        pages: PDF page range, 1-based (e.g. "1-5,8" or "all"); enables multi-page mode
+        output: json, or ndjson / sse to stream one record per page as it finishes
+        force_ocr: OCR PDF pages even when they have an embedded text layer
+        debug: bypass the result cache and add a per-stage "timings" object (ms)
+        profile: like debug, and also write a cProfile dump to OCR_PROFILE_DIR
+        x_admin_token: required for debug/profile unless OCR_DEBUG=1
+        lane: interactive unless X-Priority: bulk or the X-API-Key says otherwise
     """
-    if not file.content_type or (not file.content_type.startswith("image/") and file.content_type != "application/pdf"):
-        raise HTTPException(status_code=400, detail="Only image files and PDFs are supported.")
+    debug = check_debug(debug, profile, x_admin_token)
 
-    # Validate language is installed
-    try:
-        import subprocess
-        result = subprocess.run(
-            [pytesseract.pytesseract.tesseract_cmd, '--list-langs'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        available_langs = result.stdout.strip().split('\n')[1:]  # Skip first line (header)
-        
-        if language not in available_langs:
-            logger.warning(f"Language '{language}' not installed. Available: {available_langs}")
-            # Fallback to English
-            language = 'eng'
-            logger.info(f"Falling back to English (eng)")
-    except Exception as e:
-        logger.warning(f"Could not check available languages: {e}. Proceeding with {language}")
+    # Validate language is installed (falls back to English)
+    language = validate_language(language)
 
-    try:
-        file_bytes = await file.read()
-        
-        # Handle PDF or Image
-        if file.content_type == "application/pdf":
-            # Convert PDF to Image
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
-            if doc.page_count < 1:
-                raise HTTPException(status_code=400, detail="PDF is empty")
-            page = doc.load_page(0)
-            pix = page.get_pixmap(dpi=300)
-            original_image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        else:
-            # Open image with PIL
-            original_image = Image.open(BytesIO(file_bytes))
-        
-        # Convert to RGB if needed
-        if original_image.mode != 'RGB':
-            original_image = original_image.convert('RGB')
-        
-        # Upscale image if it's too small (helps with low-resolution scans)
-        width, height = original_image.size
-        min_dimension = 1024  # Target minimum dimension (Optimized for speed, was 2000)
-        if width < min_dimension or height < min_dimension:
-            scale_factor = max(min_dimension / width, min_dimension / height)
-            new_width = int(width * scale_factor)
-            new_height = int(height * scale_factor)
-            original_image = original_image.resize((new_width, new_height), Image.Resampling.BICUBIC)
-            logger.info(f"Upscaled image from {width}x{height} to {new_width}x{new_height}")
-        
-        # Convert to grayscale
-        image = original_image.convert('L')
-        
-        # Apply adaptive thresholding using numpy and PIL
-        import numpy as np
-        img_array = np.array(image)
-        
-        # Skip Gaussian Blur for speed - directly enhance contrast
-        # Enhance contrast significantly
-        enhancer = ImageEnhance.Contrast(image)
-        image_contrast = enhancer.enhance(2.0)
-        
-        # Enhance sharpness
-        enhancer = ImageEnhance.Sharpness(image_contrast)
-        image_sharp = enhancer.enhance(2.0)
-        
-        # Convert to binary (black and white) using adaptive threshold
-        # This helps with varied lighting conditions
-        img_array = np.array(image_sharp)
-        
-        # Apply Otsu's thresholding for automatic threshold selection
-        from PIL import ImageOps
-        threshold_value = 128
-        # Simple binary threshold (values below threshold become black, above become white)
-        binary_image = image_sharp.point(lambda x: 0 if x < threshold_value else 255, '1')
-        
-        # Optimize: Run only one robust mode (PSM 3 - Fully Automatic) for speed
-        # This is 3x faster than trying multiple modes
-        try:
-            custom_config = f'--oem 1 --psm 3'
-            
-            # Run OCR once
-            best_text = pytesseract.image_to_string(binary_image, lang=language, config=custom_config)
-            
-            # Get confidence
-            data = pytesseract.image_to_data(binary_image, lang=language, config=custom_config, output_type=pytesseract.Output.DICT)
-            confidences = [int(conf) for conf in data['conf'] if conf != '-1']
-            best_confidence = sum(confidences) / len(confidences) if confidences else 0
-            
-            logger.info(f"OCR completed with confidence: {best_confidence:.2f}%")
-            
-        except Exception as e:
-            logger.error(f"OCR failed: {str(e)}")
-            # Fallback to raw image if processing failed
-            best_text = pytesseract.image_to_string(image, lang=language, config='--oem 1 --psm 3')
-            best_confidence = 0
-        
-        logger.info(f"OCR completed with confidence: {best_confidence:.2f}%")
-        
-        # Apply post-processing to fix common OCR errors
-        best_text = post_process_ocr_text(best_text)
-        
-    except pytesseract.TesseractNotFoundError:
-        logger.error("Tesseract OCR not found")
-        raise HTTPException(
-            status_code=500,
-            detail="Tesseract OCR is not installed. Please install from https://github.com/UB-Mannheim/tesseract/wiki"
-        )
-    except Exception as exc:
-        logger.exception("Error during OCR processing")
-        raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(exc)}") from exc
-
-    return {"text": best_text, "confidence": round(best_confidence, 2)}
+    upload = await receive_file_upload(request)
+    return await ocr_upload(upload, language, pages, output, force_ocr, debug, profile, lane)
 
 
-def post_process_ocr_text(text: str) -> str:
+@api_router.post("/ocr/raw")
+async def perform_ocr_raw(
+    request: Request,
+    language: str = "eng",
+    pages: Optional[str] = None,
+    output: str = "json",
+    force_ocr: bool = False,
+    debug: bool = False,
+    profile: bool = False,
+    x_admin_token: Optional[str] = Header(None),
+    lane: Lane = Depends(interactive_lane)
+):
     """
-    Post-process OCR text to fix common recognition errors.
+    Same as /api/ocr, with the document as the raw request body instead of a
+    multipart form: the body is streamed straight to disk without form parsing.
+    Content-Type names the document type; application/octet-stream is sniffed.
     """
-    import re
-    
-    # Fix pipe character (|) that should be capital I
-    # Match | when it appears:
-    # - At the start of a sentence (after . ! ? or newline)
-    # - As a standalone word
-    # - Before common contractions like 've, 'll, 'm, 'd
-    text = re.sub(r'(?<=[.!?\n]\s)\|(?=\s)', 'I', text)  # After sentence ending
-    text = re.sub(r'^\|(?=\s)', 'I', text, flags=re.MULTILINE)  # Start of line
-    text = re.sub(r'\|\s', 'I ', text)  # Standalone | followed by space
-    text = re.sub(r'\|\'', 'I\'', text)  # |'ve, |'m, etc.
-    
-    # Fix common word errors
-    common_fixes = {
-        r'\bcan\'t\b': 'can\'t',
-        r'\bdon\'t\b': 'don\'t', 
-        r'\bhave\b': 'have',
-        r'\bwas\b': 'was',
-    }
-    
-    for pattern, replacement in common_fixes.items():
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-    
-    # Remove excessive spaces (more than 1 space)
-    text = re.sub(r' {2,}', ' ', text)
-    
-    # Fix spacing around punctuation
-    text = re.sub(r'\s+([.,!?;:])', r'\1', text)  # Remove space before punctuation
-    text = re.sub(r'([.,!?;:])(?=[A-Za-z])', r'\1 ', text)  # Add space after punctuation if missing
-    
-    return text.strip()
+    check_declared_type(body_content_type(request))
+    debug = check_debug(debug, profile, x_admin_token)
+    language = validate_language(language)
+
+    upload = await receive_upload(spool_chunks(request.stream(), body_content_type(request), max_upload_bytes()))
+    return await ocr_upload(upload, language, pages, output, force_ocr, debug, profile, lane)
+
+
+@api_router.get("/health/live")
+async def liveness():
+    """The process is up and its event loop responds (for restarts, not for routing)"""
+    return {"status": "ok"}
+
+
+@api_router.get("/health/ready")
+async def readiness_check():
+    """200 once this worker has warmed up; 503 while starting, warming up or shutting down"""
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content=readiness)
+    return readiness
+
+
+@api_router.get("/ocr/pool")
+async def get_ocr_pool_stats():
+    """Queue depth, busy workers and completion counters of the OCR pool, and admission state"""
+    return {**ocr_pool.stats(), "admission": admission.stats()}
+
+
+@api_router.get("/ocr/cache")
+async def get_ocr_cache_stats():
+    """Hit/miss/eviction counters of the OCR result and orientation caches"""
+    return {**result_cache.stats(), "orientation": orientation_cache.stats()}
 
 
 class TrainingPattern(BaseModel):
@@ -305,106 +716,285 @@ class TrainingPattern(BaseModel):
 @api_router.get("/training/patterns")
 async def get_training_patterns():
     """Get all field patterns including custom ones"""
-    extractor = FieldExtractor()
-    return extractor.field_keywords
+    return get_field_extractor().field_keywords
 
 @api_router.post("/training/patterns")
 async def add_training_pattern(pattern: TrainingPattern):
     """Add a new keyword pattern for a field"""
-    extractor = FieldExtractor()
+    extractor = get_field_extractor()
     if not pattern.field or not pattern.keyword:
         raise HTTPException(status_code=400, detail="Field and keyword are required")
         
-    success = extractor.save_custom_pattern(pattern.field, pattern.keyword)
+    success = await asyncio.to_thread(extractor.save_custom_pattern, pattern.field, pattern.keyword)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to save pattern")
         
     return {
         "message": f"Successfully trained system to recognize '{pattern.keyword}' as '{pattern.field}'", 
-        "patterns": extractor.field_keywords
+        "patterns": extractor.field_keywords,
+        "version": extractor.version
     }
 
 
-@api_router.post("/extract-fields")
+@api_router.get("/layout-templates")
+async def get_layout_templates():
+    """Document types that are extracted zonally, with their template names"""
+    from layout_template import get_template_registry
+
+    return await asyncio.to_thread(get_template_registry().available)
+
+
+async def extract_upload(upload: SpooledUpload, document_type: str, language: str, pages: Optional[str],
+                         output: str, force_ocr: bool, debug: bool, profile: bool, lane: Lane) -> Any:
+    debug_timings = {"upload": upload.spool_seconds} if debug else None
+
+    async def run_page(page_number: int) -> Dict:
+        return await run_extract_job(upload.path, upload.sha256, upload.content_type, document_type, language,
+                                     force_ocr, page_number, debug_timings, profile, lane)
+
+    return await serve_upload(upload, run_page, pages, output, "Field extraction", lane)
+
+
+@api_router.post("/extract-fields", openapi_extra=FILE_UPLOAD_BODY)
 async def extract_fields(
-    file: UploadFile = File(...),
+    request: Request,
     document_type: str = "general",
-    language: str = "eng"
+    language: str = "eng",
+    pages: Optional[str] = None,
+    output: str = "json",
+    force_ocr: bool = False,
+    debug: bool = False,
+    profile: bool = False,
+    x_admin_token: Optional[str] = Header(None),
+    lane: Lane = Depends(interactive_lane)
 ):
     """
     Extract structured fields from a document image.
     
     Args:
-        file: Image file upload
+        file: Image file upload (application/octet-stream is sniffed)
         document_type: Type of document (id_card, passport, form, general)
         language: Tesseract language code (eng, spa, fra, deu, hin, ara, etc.)
+        pages: PDF page range, 1-based (e.g. "1-5,8" or "all"); enables multi-page mode
+        output: json, or ndjson / sse to stream one record per page as it finishes
+        force_ocr: OCR PDF pages even when they have an embedded text layer
+        debug: bypass the result cache and add a per-stage "timings" object (ms)
+        profile: like debug, and also write a cProfile dump to OCR_PROFILE_DIR
+        x_admin_token: required for debug/profile unless OCR_DEBUG=1
+        lane: interactive unless X-Priority: bulk or the X-API-Key says
+            otherwise; intake scripts should send X-Priority: bulk
     
     Returns:
         Extracted fields with confidence scores
     """
-    if not file.content_type or (not file.content_type.startswith("image/") and file.content_type != "application/pdf"):
-        raise HTTPException(status_code=400, detail="Only image files and PDFs are supported.")
+    debug = check_debug(debug, profile, x_admin_token)
+
+    language = validate_language(language)
+
+    upload = await receive_file_upload(request)
+    return await extract_upload(upload, document_type, language, pages, output, force_ocr, debug, profile, lane)
+
+
+@api_router.post("/extract-fields/raw")
+async def extract_fields_raw(
+    request: Request,
+    document_type: str = "general",
+    language: str = "eng",
+    pages: Optional[str] = None,
+    output: str = "json",
+    force_ocr: bool = False,
+    debug: bool = False,
+    profile: bool = False,
+    x_admin_token: Optional[str] = Header(None),
+    lane: Lane = Depends(interactive_lane)
+):
+    """
+    Same as /api/extract-fields, with the document as the raw request body
+    (see /api/ocr/raw).
+    """
+    check_declared_type(body_content_type(request))
+    debug = check_debug(debug, profile, x_admin_token)
+    language = validate_language(language)
+
+    upload = await receive_upload(spool_chunks(request.stream(), body_content_type(request), max_upload_bytes()))
+    return await extract_upload(upload, document_type, language, pages, output, force_ocr, debug, profile, lane)
+
+
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 500))
+BATCH_MAX_ITEM_BYTES = int(os.environ.get("BATCH_MAX_ITEM_BYTES", 50 * 1024 * 1024))
+# Whole batch: the request body, and all documents together (ZIP members uncompressed)
+BATCH_MAX_BYTES = int(os.environ.get("BATCH_MAX_BYTES", 1024 * 1024 * 1024))
+
+
+@api_router.post("/extract-fields/batch")
+async def extract_fields_batch(
+    files: List[UploadFile] = File(...),
+    document_type: str = "general",
+    language: str = "eng",
+    overrides: Optional[str] = Form(None),
+    force_ocr: bool = False,
+    lane: Lane = Depends(bulk_lane)
+):
+    """
+    Extract fields from many documents in one request.
+    
+    Args:
+        files: Image/PDF uploads and/or ZIP archives of them
+        document_type: Default document type for every item
+        language: Default Tesseract language for every item
+        overrides: JSON object keyed by filename, e.g. {"a.png": {"document_type": "passport", "language": "hin"}}
+        force_ocr: OCR PDF pages even when they have an embedded text layer
+        lane: bulk unless X-Priority / X-API-Key raise it
     
+    Returns:
+        NDJSON stream with one record per document (first page of PDFs) in
+        completion order, then a summary record. Items wait for admission
+        and pool capacity in the bulk lane rather than failing when the
+        service is busy; the batch is capped at BATCH_MAX_BYTES (413).
+    """
     try:
-        # First, perform OCR to get text
-        file_bytes = await file.read()
-        
-        # Handle PDF or Image
-        if file.content_type == "application/pdf":
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
-            if doc.page_count < 1:
-                raise HTTPException(status_code=400, detail="PDF is empty")
-            page = doc.load_page(0)
-            pix = page.get_pixmap(dpi=300)
-            original_image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        overrides_by_name = json.loads(overrides) if overrides else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="overrides must be a JSON object")
+    if not isinstance(overrides_by_name, dict):
+        raise HTTPException(status_code=400, detail="overrides must be a JSON object")
+
+    language = validate_language(language)
+
+    try:
+        items = await asyncio.to_thread(
+            collect_batch_items,
+            [(f.filename, f.content_type, f.file) for f in files],
+            BATCH_MAX_ITEMS, BATCH_MAX_ITEM_BYTES, BATCH_MAX_BYTES
+        )
+    except BatchTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except BatchError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    async def run_item(item: BatchItem) -> Dict:
+        item_overrides = overrides_by_name.get(item.filename) or {}
+        record = {
+            "index": item.index,
+            "filename": item.filename,
+            "document_type": item_overrides.get("document_type", document_type),
+        }
+        try:
+            record["language"] = validate_language(item_overrides.get("language", language))
+            if not is_supported_type(item.content_type):
+                raise HTTPException(status_code=400, detail="Only image files and PDFs are supported.")
+            file_bytes = await asyncio.to_thread(item.read)
+            file_hash = await hash_upload(file_bytes)
+            pixels = await asyncio.to_thread(estimate_pixels, file_bytes, item.content_type)
+            start = time.perf_counter()
+            cost = await admission.acquire(pixels, lane, patient=True)
+            queue_wait.observe(time.perf_counter() - start, queue="admission", priority=lane.priority)
+            try:
+                result = await run_extract_job(file_bytes, file_hash, item.content_type, record["document_type"],
+                                               record["language"], force_ocr, lane=lane, wait_for_space=True)
+            finally:
+                admission.release(cost)
+        except HTTPException as exc:
+            record["error"] = exc.detail
+        except Exception as exc:
+            if not isinstance(exc, (OCRPoolFull, EmptyDocumentError, UnreadableDocumentError)):
+                logger.exception(f"Error during batch field extraction of {item.filename}")
+            record["error"] = error_message(exc)
         else:
-            original_image = Image.open(BytesIO(file_bytes))
-        
-        if original_image.mode != 'RGB':
-            original_image = original_image.convert('RGB')
-        
-        # Upscale if needed (Optimized)
-        width, height = original_image.size
-        min_dimension = 1024 # Reduced from 2000
-        if width < min_dimension or height < min_dimension:
-            scale_factor = max(min_dimension / width, min_dimension / height)
-            new_width = int(width * scale_factor)
-            new_height = int(height * scale_factor)
-            original_image = original_image.resize((new_width, new_height), Image.Resampling.BICUBIC)
-        
-        # Convert to grayscale and enhance
-        image = original_image.convert('L')
-        
-        # Optimized enhancements (No blur)
-        from PIL import ImageEnhance
-        
-        enhancer = ImageEnhance.Contrast(image)
-        image_contrast = enhancer.enhance(2.0)
-        
-        enhancer = ImageEnhance.Sharpness(image_contrast)
-        image_sharp = enhancer.enhance(2.0)
-        
-        # Perform OCR with specified language
-        custom_config = r'--oem 1 --psm 6'
-        raw_text = pytesseract.image_to_string(image_sharp, lang=language, config=custom_config)
-        
-        # Post-process text
-        processed_text = post_process_ocr_text(raw_text)
-        
-        # Extract structured fields
-        extractor = FieldExtractor()
-        fields = extractor.extract_all_fields(processed_text, document_type)
-        
-        logger.info(f"Extracted {len(fields)} fields from {document_type}")
-        
-        return {
-            "fields": fields,
-            "raw_text": processed_text
+            record.update(result)
+        return record
+
+    records = iter_completed(run_item, items, window=ocr_pool.max_workers)
+    return StreamingResponse(
+        encode_stream(records, "ndjson", len(items), unit="items"),
+        media_type=STREAM_MEDIA_TYPES["ndjson"]
+    )
+
+
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+
+
+@api_router.post("/jobs", status_code=202, openapi_extra=FILE_UPLOAD_BODY)
+async def submit_job(
+    request: Request,
+    kind: str = "ocr",
+    document_type: str = "general",
+    language: str = "eng",
+    pages: Optional[str] = None,
+    force_ocr: bool = False
+):
+    """
+    Queue OCR or field extraction and return immediately.
+    
+    Args:
+        file: Image file or PDF
+        kind: ocr or extract_fields
+        document_type: Type of document, for extract_fields
+        language: Tesseract language code
+        pages: PDF page range, 1-based (e.g. "1-5,8" or "all"); first page only when omitted
+        force_ocr: OCR PDF pages even when they have an embedded text layer
+    
+    Returns:
+        {"job_id": ..., "status": "queued"}; poll GET /api/jobs/{job_id} for the result
+    """
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unsupported job kind: {kind}")
+    language = validate_language(language)
+
+    upload = await receive_file_upload(request)
+    try:
+        if not is_supported_type(upload.content_type):
+            raise HTTPException(status_code=400, detail="Only image files and PDFs are supported.")
+        if not upload.size:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+        params = {
+            "content_type": upload.content_type,
+            "document_type": document_type,
+            "language": language,
+            "force_ocr": force_ocr,
+            "page_numbers": None,
         }
-        
-    except Exception as exc:
-        logger.exception("Error during field extraction")
-        raise HTTPException(status_code=500, detail=f"Field extraction failed: {str(exc)}") from exc
+        if pages is not None and upload.content_type == "application/pdf":
+            from pdf_pages import count_pages, parse_page_spec
+
+            try:
+                page_count = await asyncio.to_thread(count_pages, upload.path)
+                params["page_numbers"] = parse_page_spec(pages, page_count)
+            except ValueError as exc:  # Including UnreadableDocumentError
+                raise HTTPException(status_code=400, detail=str(exc))
+            params["page_count"] = page_count
+
+        job = new_job(kind, params, JOB_MAX_ATTEMPTS)
+        try:
+            job_id = await job_store.enqueue(job, upload.path)
+        except Exception as exc:
+            logger.exception("Could not queue OCR job")
+            raise HTTPException(status_code=503, detail="Job queue is unavailable") from exc
+        return {"job_id": job_id, "status": job["status"]}
+    finally:
+        upload.cleanup()
+
+
+@api_router.get("/jobs/stats")
+async def get_job_stats():
+    """Number of jobs in each state"""
+    return {"store": job_store.name, "jobs": await job_store.counts()}
+
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, progress and (once finished) the result or error of a job"""
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_view(job)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
 
 
 # Include the router in the main app
@@ -442,6 +1032,10 @@ if build_dir.exists():
 else:
     logger.warning("Frontend build directory not found. Run 'npm run build' in frontend folder.")
 
+# Oversized uploads are refused from their Content-Length before the body is read;
+# batches have their own, larger limit
+app.add_middleware(UploadLimitMiddleware, max_bytes=max_upload_bytes(),
+                   path_limits={"/api/extract-fields/batch": BATCH_MAX_BYTES})
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -449,11 +1043,119 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, requests=http_requests, latency=http_latency)
+
+
+
+
+
+def connect_database():
+    """
+    Create the MongoDB client when MONGO_URL is set (DB_NAME is then required).
+    Motor connects on first use, so an unreachable server does not hold up startup.
+    """
+    global client, db
+    mongo_url = os.environ.get('MONGO_URL')
+    if not mongo_url:
+        logger.info("MONGO_URL not set; running without a database (in-memory jobs and caches)")
+        return
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ['DB_NAME']]
+
+
+async def start_services():
+    """
+    Everything startup needs before the first request is served. Slow or
+    network-bound steps (loading the OCR stack, listing languages, index
+    creation) run afterwards in warm_up, behind /api/health/ready.
+    """
+    global result_cache, orientation_cache, job_store, warmup_task, language_watch_task
+    start = time.perf_counter()
+    connect_database()
+    result_cache = OCRResultCache.from_env(PIPELINE_VERSION, db=db)
+    orientation_cache = OCRResultCache.from_env(PIPELINE_VERSION, db=db)
+    job_store = job_store_from_env(db)
+    ocr_pool.start()
+    start_job_queue()
+    readiness["startup_seconds"] = round(time.perf_counter() - start, 3)
+    warmup_task = asyncio.create_task(warm_up())
+    language_watch_task = asyncio.create_task(watch_languages())
+
+
+async def watch_languages():
+    """Pick up added or removed .traineddata files without ever listing languages on a request"""
+    while True:
+        await asyncio.sleep(language_registry.check_interval)
+        try:
+            await asyncio.to_thread(language_registry.refresh_if_changed)
+        except Exception:
+            logger.exception("Language list refresh failed")
+
+
+async def warm_up():
+    """
+    Prepare this worker in the background, then mark it ready: set up the
+    persistent cache and job store tiers, import the OCR pipeline and list
+    the installed languages, then (unless OCR_WARMUP=0) run the warm-up
+    passes from warmup.py: field extraction state is built, and a synthetic
+    page is OCR'd per OCR_WARMUP_LANGUAGES entry, the first language once
+    per pool worker.
+
+    A missing Tesseract keeps the worker unready; any other failure is
+    logged and the worker serves cold.
+    """
+    start = time.perf_counter()
+    readiness.update(state="warming_up")
+    await result_cache.setup()
+    await orientation_cache.setup()
+    try:
+        await job_store.setup()
+    except Exception as e:
+        logger.warning(f"Job store ({job_store.name}) setup failed: {e}")
+
+    try:
+        warmup = await asyncio.to_thread(importlib.import_module, "warmup")
+        await asyncio.to_thread(language_registry.load)
+        if os.environ.get("OCR_WARMUP", "1") == "1":
+            languages = list(dict.fromkeys(language_registry.resolve(spec)[0] for spec in warmup.warmup_languages()))
+            readiness.update(languages=languages)
+            await asyncio.to_thread(warmup.warm_extraction, languages)
+            page = warmup.synthetic_page()
+            runs = [languages[0]] * ocr_pool.max_workers + languages[1:] if languages else []
+            await asyncio.gather(*(ocr_pool.submit(warmup.warm_pipeline, page, language,
+                                                   lane=Lane(INTERACTIVE, "warmup"))
+                                   for language in runs))
+    except Exception as exc:
+        if tesseract_failure(exc) == "not_found":
+            readiness.update(state="tesseract_missing")
+            logger.error("Warm-up failed: Tesseract OCR not found; this worker stays unready")
+            return
+        logger.exception("Warm-up failed; serving without it")
+    seconds = time.perf_counter() - start
+    readiness.update(ready=True, state="ready", warmup_seconds=round(seconds, 3))
+    logger.info(f"Warm-up done in {seconds:.2f}s ({', '.join(readiness.get('languages', []))}); ready")
 
 
+def start_job_queue():
+    global embedded_job_worker, embedded_job_task
+    default = "1" if job_store.name == "memory" else "0"
+    if os.environ.get("JOB_EMBEDDED_WORKER", default) == "1":
+        from job_worker import JobWorker
 
+        embedded_job_worker = JobWorker.from_env(job_store, ocr_pool)
+        embedded_job_task = asyncio.create_task(embedded_job_worker.run())
 
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+async def stop_services():
+    readiness.update(ready=False, state="stopping")
+    for task in (warmup_task, language_watch_task):
+        if task is not None and not task.done():
+            task.cancel()
+    if embedded_job_worker is not None:
+        embedded_job_worker.stop()
+        await embedded_job_task
+    if client is not None:
+        client.close()
+    ocr_pool.shutdown()
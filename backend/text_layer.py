@@ -0,0 +1,72 @@
+"""
+Text Layer Module
+Reads the embedded text of born-digital PDF pages so they can skip OCR
+"""
+
+import logging
+from typing import Dict, Optional
+
+import fitz  # PyMuPDF
+
+from pdf_pages import open_pdf
+from uploads import DocumentSource
+
+logger = logging.getLogger(__name__)
+
+# A page needs at least this many words before we trust its text layer
+MIN_WORDS = 3
+
+# Share of non-space characters that must be letters or digits; scanned PDFs
+# with a broken font encoding tend to produce symbol soup instead
+MIN_ALNUM_RATIO = 0.5
+
+# Share of U+FFFD / control characters above which the text is considered garbage
+MAX_GARBAGE_RATIO = 0.02
+
+
+def is_trustworthy_text(text: str) -> bool:
+    """Heuristic check that extracted text is real text, not an encoding artefact"""
+    chars = [c for c in text if not c.isspace()]
+    if not chars:
+        return False
+    alnum = sum(1 for c in chars if c.isalnum())
+    garbage = sum(1 for c in chars if c == '\ufffd' or (ord(c) < 32))
+    return alnum / len(chars) >= MIN_ALNUM_RATIO and garbage / len(chars) <= MAX_GARBAGE_RATIO
+
+
+def read_page_text_layer(page: "fitz.Page") -> Optional[Dict]:
+    """
+    Text and word boxes from a page's text layer.
+
+    Returns:
+        {"text": ..., "words": [{"text": ..., "bbox": [x0, y0, x1, y1]}, ...]}
+        with bbox in PDF points, or None if the page is image-only or its
+        text looks suspect and should be OCR'd instead.
+    """
+    words = page.get_text("words")
+    if len(words) < MIN_WORDS:
+        return None
+
+    text = page.get_text("text").strip()
+    if not is_trustworthy_text(text):
+        logger.info(f"Ignoring suspect text layer on page {page.number + 1}")
+        return None
+
+    return {
+        "text": text,
+        "words": [
+            {"text": w[4], "bbox": [round(w[0], 2), round(w[1], 2), round(w[2], 2), round(w[3], 2)]}
+            for w in words
+        ],
+    }
+
+
+def read_text_layer(source: DocumentSource, page_number: int = 0) -> Optional[Dict]:
+    """read_page_text_layer for one page (0-based) of a PDF given as bytes or a path"""
+    doc = open_pdf(source)
+    try:
+        if page_number >= doc.page_count:
+            return None
+        return read_page_text_layer(doc.load_page(page_number))
+    finally:
+        doc.close()
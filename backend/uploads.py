@@ -0,0 +1,312 @@
+"""
+Uploads Module
+Spools request bodies to size-capped temp files so documents are never held whole in memory
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import deque
+from io import BytesIO
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Optional, Tuple, Union
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# A document as the pipeline takes it: raw bytes, or the path of a file on
+# disk (spooled uploads). Paths keep PDFs out of memory, since MuPDF and PIL
+# read only the parts they need, and are cheap to hand to process workers.
+DocumentSource = Union[bytes, str]
+
+CHUNK_SIZE = 1024 * 1024
+
+# Multipart framing and the other form fields on top of the file itself
+MULTIPART_SLACK = 64 * 1024
+
+OCTET_STREAM = "application/octet-stream"
+
+# Leading bytes -> content type, for clients that send application/octet-stream
+_MAGIC = (
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+)
+
+
+class UploadTooLarge(ValueError):
+    """Raised when a request body exceeds the upload size limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+        self.max_bytes = max_bytes
+
+
+def max_upload_bytes() -> int:
+    """OCR_MAX_UPLOAD_BYTES, the largest accepted document (default 200 MB)"""
+    return int(os.environ.get("OCR_MAX_UPLOAD_BYTES", 200 * 1024 * 1024))
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Content type from a document's first bytes, or None if unrecognized"""
+    for magic, content_type in _MAGIC:
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def open_source(source: DocumentSource) -> Union[str, BinaryIO]:
+    """Something PIL.Image.open accepts, without copying in-memory bytes"""
+    return source if isinstance(source, str) else BytesIO(source)
+
+
+class SpooledUpload:
+    """
+    An upload written to a temp file, with its size and SHA-256 computed on
+    the way in (the same hash ocr_cache.hash_bytes gives the bytes).
+
+    The file lives in OCR_SPOOL_DIR (the system temp directory by default;
+    point it at real disk if /tmp is a tmpfs) until cleanup() is called.
+    """
+
+    def __init__(self, path: str, size: int, sha256: str, content_type: Optional[str], spool_seconds: float = 0.0):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.content_type = content_type
+        self.spool_seconds = spool_seconds
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _write_chunk(fileobj: BinaryIO, hasher, chunk: bytes):
+    fileobj.write(chunk)
+    hasher.update(chunk)
+
+
+async def spool_chunks(chunks: AsyncIterator[bytes], content_type: Optional[str], max_bytes: int) -> SpooledUpload:
+    """
+    Write a stream of body chunks to a temp file, hashing as it goes.
+
+    A declared type of application/octet-stream (or none) is replaced by the
+    type sniffed from the first bytes.
+
+    Raises:
+        UploadTooLarge: as soon as more than max_bytes have arrived
+    """
+    start = time.perf_counter()
+    spool_dir = os.environ.get("OCR_SPOOL_DIR") or None
+    fd, path = tempfile.mkstemp(prefix="ocr-upload-", dir=spool_dir)
+    hasher = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                if len(head) < 16:
+                    head += chunk[:16]
+                # Disk write and hash off the event loop, a chunk at a time
+                await asyncio.to_thread(_write_chunk, f, hasher, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    if not content_type or content_type == OCTET_STREAM:
+        content_type = sniff_content_type(head) or content_type
+    return SpooledUpload(path, size, hasher.hexdigest(), content_type, time.perf_counter() - start)
+
+
+class MultipartError(ValueError):
+    """Raised for a malformed multipart body, or one without the expected file field"""
+
+
+class _MultipartFileReader:
+    """
+    Pulls the data of one file field out of a multipart/form-data stream as
+    it arrives; parts before it are skipped, and the body is not read past it.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], boundary: bytes, field: str):
+        self._chunks = chunks.__aiter__()
+        self._field = field
+        self._events = deque()  # ("part", headers) / ("data", bytes) / ("end", None)
+        self._headers = {}
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._headers.clear,
+            "on_header_field": lambda data, start, end: self._header_field.extend(data[start:end]),
+            "on_header_value": lambda data, start, end: self._header_value.extend(data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": lambda: self._events.append(("part", dict(self._headers))),
+            "on_part_data": lambda data, start, end: self._events.append(("data", bytes(data[start:end]))),
+            "on_part_end": lambda: self._events.append(("end", None)),
+        })
+
+    def _on_header_end(self):
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    async def _next_event(self) -> Optional[Tuple[str, object]]:
+        """The next parser event, reading more of the body as needed; None at its end"""
+        while not self._events:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return None
+            try:
+                self._parser.write(chunk)
+            except ValueError as exc:
+                raise MultipartError(f"Malformed multipart body: {exc}")
+        return self._events.popleft()
+
+    async def find_file(self) -> Optional[str]:
+        """Skip to the file field; its declared content type"""
+        while True:
+            event = await self._next_event()
+            if event is None:
+                raise MultipartError(f"No file uploaded in field '{self._field}'")
+            kind, headers = event
+            if kind != "part":
+                continue
+            _, options = parse_options_header(headers.get(b"content-disposition", b""))
+            if options.get(b"name") == self._field.encode() and b"filename" in options:
+                content_type = headers.get(b"content-type")
+                return content_type.decode("latin-1").strip() if content_type else None
+
+    async def data(self) -> AsyncIterator[bytes]:
+        """The file field's data, after find_file"""
+        while True:
+            event = await self._next_event()
+            if event is None:
+                raise MultipartError("Incomplete multipart body")
+            kind, value = event
+            if kind == "end":
+                return
+            yield value
+
+
+async def spool_multipart(chunks: AsyncIterator[bytes], content_type_header: Optional[str], field: str,
+                          max_bytes: int, check_type: Optional[Callable[[Optional[str]], None]] = None
+                          ) -> SpooledUpload:
+    """
+    spool_chunks for the file field of a multipart/form-data body, parsed
+    straight off the request stream.
+
+    FastAPI's File() parameters would have Starlette spool the part to a temp
+    file of its own first, so the document would be written twice and only
+    size-checked once all of it had arrived. check_type, if given, sees the
+    field's declared content type before any of it is written, and raises to
+    refuse it.
+
+    Raises:
+        MultipartError: not multipart, malformed, or no such file field
+        UploadTooLarge: as soon as more than max_bytes of the file have arrived
+    """
+    media_type, params = parse_options_header(content_type_header or "")
+    if media_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise MultipartError("Expected a multipart/form-data body")
+    reader = _MultipartFileReader(chunks, params[b"boundary"], field)
+    declared_type = await reader.find_file()
+    if check_type is not None:
+        check_type(declared_type)
+    return await spool_chunks(reader.data(), declared_type, max_bytes)
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware answering 413 for oversized request bodies: from the
+    Content-Length header alone, before any of the body is received, or, for
+    bodies without one (chunked), as soon as more than the limit has been
+    received. The app's own response (a parse error, usually) is then dropped
+    in favour of the 413.
+
+    path_limits overrides max_bytes for individual paths (e.g. batches).
+    """
+
+    def __init__(self, app, max_bytes: int, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = dict(path_limits or {})
+
+    @staticmethod
+    async def _reject(send, max_bytes: int):
+        body = json.dumps({"detail": str(UploadTooLarge(max_bytes))}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.path_limits.get(scope["path"], self.max_bytes)
+        limit = max_bytes + MULTIPART_SLACK
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, max_bytes)
+            return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    too_large = True
+                    raise UploadTooLarge(max_bytes)
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if too_large and not response_started:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not too_large or response_started:
+                raise
+        if too_large and not response_started:
+            await self._reject(send, max_bytes)
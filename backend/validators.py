@@ -0,0 +1,127 @@
+"""
+Validators Module
+Memoized date and phone parsing for field extraction, with fast paths for the common shapes
+"""
+
+import logging
+import os
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Optional
+
+from dateutil import parser as date_parser
+
+# Optional phonenumbers import
+try:
+    import phonenumbers
+    PHONENUMBERS_AVAILABLE = True
+except ImportError:
+    PHONENUMBERS_AVAILABLE = False
+    logging.warning("phonenumbers library not installed, phone validation will be limited")
+
+logger = logging.getLogger(__name__)
+
+# A document's dates and phone numbers are usually seen several times per
+# extraction (field pattern, fallback scan, confidence check); the caches
+# only need to span one document, but are shared across requests
+CACHE_SIZE = 4096
+
+# Numeric dates, the shapes the extractor's date patterns produce:
+#   d/m/y, m/d/y with 2 or 4 digit years, and y/m/d, with "-" or "/"
+DAY_MONTH_YEAR = re.compile(r"(\d{1,2})([-/])(\d{1,2})\2(\d{4}|\d{2})")
+YEAR_MONTH_DAY = re.compile(r"(\d{4})([-/])(\d{1,2})\2(\d{1,2})")
+
+
+def _full_year(year: int) -> int:
+    """Two-digit year within 50 years of today, as dateutil resolves it"""
+    this_year = date.today().year
+    year += this_year // 100 * 100
+    if year >= this_year + 50:
+        year -= 100
+    elif year < this_year - 50:
+        year += 100
+    return year
+
+
+def _fast_date(text: str) -> Optional[date]:
+    """
+    The date dateutil would read from a plain numeric date, or None when the
+    text has another shape or is not a valid date (left to dateutil).
+
+    Like dateutil's defaults, a/b/y is month first unless a cannot be a month.
+    """
+    match = DAY_MONTH_YEAR.fullmatch(text)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(3)), match.group(4)
+        if first > 31 or second > 31:
+            return None
+        month, day = (second, first) if first > 12 else (first, second)
+        year = int(year) if len(year) == 4 else _full_year(int(year))
+    else:
+        match = YEAR_MONTH_DAY.fullmatch(text)
+        if not match:
+            return None
+        year, month, day = int(match.group(1)), int(match.group(3)), int(match.group(4))
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_date(text: str) -> Optional[str]:
+    """
+    A date found in text as YYYY-MM-DD, or None if none can be read.
+
+    Numeric dates take the fast path; anything else goes through dateutil's
+    fuzzy parser.
+    """
+    parsed = _fast_date(text.strip())
+    if parsed is None:
+        try:
+            parsed = date_parser.parse(text, fuzzy=True)
+        except (ValueError, OverflowError):
+            return None
+    return parsed.strftime('%Y-%m-%d')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def is_date(text: str) -> bool:
+    """Whether the whole text reads as a date (strict, unlike normalize_date)"""
+    if _fast_date(text.strip()) is not None:
+        return True
+    try:
+        date_parser.parse(text)
+    except (ValueError, OverflowError):
+        return False
+    return True
+
+
+def default_phone_region() -> Optional[str]:
+    """
+    PHONE_DEFAULT_REGION, the ISO country code (e.g. "IN") assumed for
+    numbers written without a +country prefix. Unset, only numbers with a
+    country code can be validated.
+    """
+    return os.environ.get("PHONE_DEFAULT_REGION") or None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_phone(candidate: str, region: Optional[str] = None) -> Optional[str]:
+    """
+    A valid phone number in international format, or None if the candidate
+    is not one (or phonenumbers is not installed).
+    """
+    if not PHONENUMBERS_AVAILABLE:
+        return None
+    # Without a region only "+<country code>" numbers can parse at all
+    if region is None and not candidate.lstrip().startswith('+'):
+        return None
+    try:
+        parsed = phonenumbers.parse(candidate, region)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(parsed):
+        return None
+    return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
@@ -0,0 +1,10 @@
+"""
+Test configuration: the backend modules are imported flat, as server.py
+and job_worker.py import them when run from backend/
+"""
+
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
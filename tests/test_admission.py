@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, PageAdmission, estimate_pixels
+from scheduling import BULK, INTERACTIVE, Lane
+
+PAGE = 100
+
+
+def controller(capacity=2 * PAGE, max_queue=2, max_wait=5.0, **kwargs):
+    return AdmissionController(capacity, max_queue, max_wait, **kwargs)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_admits_within_capacity():
+    async def scenario():
+        admission = controller()
+        first = await admission.acquire(PAGE)
+        second = await admission.acquire(PAGE)
+        stats = admission.stats()
+        admission.release(first)
+        admission.release(second)
+        return stats, admission.stats()
+
+    during, after = asyncio.run(scenario())
+    assert during["in_flight_pixels"] == 2 * PAGE and during["admitted"] == 2
+    assert after["in_flight_pixels"] == 0 and after["active_requests"] == 0
+
+
+def test_cost_clamped_to_min_and_capacity():
+    admission = controller(min_cost=30)
+    assert admission.cost(10) == 30
+    assert admission.cost(10_000) == 2 * PAGE
+
+
+def test_queue_full_rejected_with_retry_after_from_max_wait():
+    async def scenario():
+        admission = controller(max_queue=1, max_wait=7.5)
+        await admission.acquire(2 * PAGE)
+        waiter = asyncio.create_task(admission.acquire(PAGE))
+        await settle()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire(PAGE)
+        waiter.cancel()
+        return rejected.value, admission.stats()
+
+    rejected, stats = asyncio.run(scenario())
+    # Nothing has finished yet, so there is no drain rate to go by
+    assert rejected.retry_after == 8
+    assert rejected.reason == "queue full"
+    assert stats["rejected"]["queue_full"] == 1
+
+
+def test_retry_after_from_drain_rate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("admission.time.monotonic", lambda: now[0])
+    admission = controller(capacity=4 * PAGE, max_retry_after=60)
+    admission._grant(4 * PAGE)
+    for _ in range(4):
+        admission.release(PAGE)
+        admission._grant(PAGE)
+        now[0] += 2.0
+    # 4 pages finished over the last 8 s (50 px/s); the pool is full and
+    # one more page (100 px) must drain before this request fits
+    assert admission.drain_rate() == pytest.approx(50.0)
+    assert admission.retry_after(PAGE) == 2
+    assert admission.retry_after(10 * PAGE) == 20
+    assert admission.retry_after(1000 * PAGE) == 60
+
+
+def test_wait_times_out():
+    async def scenario():
+        admission = controller(max_wait=0.05)
+        await admission.acquire(2 * PAGE)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire(PAGE)
+        return rejected.value, admission.stats()
+
+    rejected, stats = asyncio.run(scenario())
+    assert rejected.reason == "timed out waiting"
+    assert stats["rejected"]["timeout"] == 1
+    assert stats["waiting_requests"] == 0
+
+
+def test_patient_callers_wait_past_full_queue_and_max_wait():
+    async def scenario():
+        admission = controller(max_queue=0, max_wait=0.01)
+        cost = await admission.acquire(2 * PAGE)
+        waiter = asyncio.create_task(admission.acquire(PAGE, patient=True))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        admission.release(cost)
+        return await waiter
+
+    assert asyncio.run(scenario()) == PAGE
+
+
+def test_interactive_admitted_before_bulk():
+    async def scenario():
+        admission = controller()
+        cost = await admission.acquire(2 * PAGE)
+        order = []
+
+        async def request(lane, name):
+            await admission.acquire(2 * PAGE, lane)
+            order.append(name)
+            admission.release(2 * PAGE)
+
+        tasks = [asyncio.create_task(request(Lane(BULK, "intake"), "bulk"))]
+        await settle()
+        tasks.append(asyncio.create_task(request(Lane(INTERACTIVE, "portal"), "interactive")))
+        await settle()
+        admission.release(cost)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "bulk"]
+
+
+def test_page_admission_holds_one_page_between_pages():
+    async def scenario():
+        admission = controller(capacity=3 * PAGE)
+        held = await admission.acquire(PAGE)
+        pages = PageAdmission(admission, PAGE)
+        in_flight = []
+        release_pages = asyncio.Event()
+
+        async def run_page(page_number):
+            in_flight.append(admission.stats()["in_flight_pixels"])
+            await release_pages.wait()
+            return page_number
+
+        # Three pages side by side: the request's own page plus two of their own
+        tasks = [asyncio.create_task(pages.run(run_page, n)) for n in range(3)]
+        await settle()
+        assert admission.stats()["in_flight_pixels"] == 3 * PAGE
+
+        # A fourth page waits for capacity instead of overcommitting
+        fourth = asyncio.create_task(pages.run(run_page, 3))
+        await settle()
+        assert not fourth.done() and admission.stats()["waiting_requests"] == 1
+
+        release_pages.set()
+        results = await asyncio.gather(*tasks, fourth)
+        # Between pages only the request's own page is held
+        after = admission.stats()["in_flight_pixels"]
+        admission.release(held)
+        return results, after, max(in_flight)
+
+    results, after, peak = asyncio.run(scenario())
+    assert results == [0, 1, 2, 3]
+    assert after == PAGE
+    assert peak <= 3 * PAGE
+
+
+def test_page_admission_lets_other_requests_in_between_pages():
+    async def scenario():
+        admission = controller(capacity=2 * PAGE, max_wait=0.05)
+        held = await admission.acquire(PAGE)
+        pages = PageAdmission(admission, PAGE)
+
+        async def run_page(page_number):
+            await asyncio.sleep(0)
+            return page_number
+
+        for page_number in range(10):
+            await pages.run(run_page, page_number)
+        # A long stream between pages leaves room for another upload
+        other = await admission.acquire(PAGE)
+        admission.release(other)
+        admission.release(held)
+        return admission.stats()["in_flight_pixels"]
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_estimate_pixels_counts_one_pdf_page(monkeypatch):
+    fitz = pytest.importorskip("fitz")
+    monkeypatch.setenv("OCR_PDF_MAX_DPI", "144")
+    monkeypatch.setenv("OCR_MAX_PIXELS", str(10**9))
+    doc = fitz.open()
+    for _ in range(200):
+        doc.new_page(width=612, height=792)
+    data = doc.tobytes()
+    doc.close()
+    assert estimate_pixels(data, "application/pdf") == 612 * 792 * 4
@@ -0,0 +1,51 @@
+import io
+import zipfile
+
+import pytest
+
+from batch_items import BatchError, BatchTooLarge, collect_batch_items, is_supported_type
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_expands_archives_and_skips_metadata():
+    archive = make_zip({"scans/a.png": b"a" * 10, "__MACOSX/._a.png": b"x", "scans/.hidden": b"x",
+                        "notes.txt": b"n"})
+    items = collect_batch_items([("one.png", "image/png", io.BytesIO(b"1")),
+                                 ("docs.zip", "application/zip", archive)], 10, 100)
+    assert [(item.index, item.filename, item.content_type) for item in items] == [
+        (0, "one.png", "image/png"), (1, "scans/a.png", "image/png"), (2, "notes.txt", "text/plain")]
+    assert items[1].read() == b"a" * 10
+    assert items[0].read() == b"1"
+
+
+def test_item_count_and_member_size_limits():
+    uploads = [(f"{n}.png", "image/png", io.BytesIO(b"x")) for n in range(3)]
+    with pytest.raises(BatchError):
+        collect_batch_items(uploads, 2, 100)
+    with pytest.raises(BatchError):
+        collect_batch_items([("big.zip", None, make_zip({"big.png": b"x" * 101}))], 10, 100)
+    with pytest.raises(BatchError):
+        collect_batch_items([("bad.zip", None, io.BytesIO(b"not a zip"))], 10, 100)
+
+
+def test_total_size_limit_counts_uncompressed_members():
+    archive = make_zip({"a.png": b"\0" * 600, "b.png": b"\0" * 600})  # Compresses to far less
+    with pytest.raises(BatchTooLarge):
+        collect_batch_items([("docs.zip", None, archive)], 10, 1000, max_total_bytes=1000)
+    uploads = [("a.png", "image/png", io.BytesIO(b"x" * 600)), ("b.png", "image/png", io.BytesIO(b"x" * 600))]
+    with pytest.raises(BatchTooLarge):
+        collect_batch_items(uploads, 10, 1000, max_total_bytes=1000)
+    assert len(collect_batch_items(uploads, 10, 1000, max_total_bytes=1200)) == 2
+
+
+def test_supported_types():
+    assert is_supported_type("image/png") and is_supported_type("application/pdf")
+    assert not is_supported_type(None) and not is_supported_type("text/plain")
@@ -0,0 +1,51 @@
+import pytest
+
+import field_extractor
+from field_extractor import FieldExtractor
+
+
+@pytest.fixture
+def patterns_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(field_extractor, "PATTERN_CHECK_INTERVAL", 0.0)
+    return str(tmp_path / "custom_patterns.json")
+
+
+def test_saved_pattern_is_used_and_versioned(patterns_path):
+    extractor = FieldExtractor(patterns_path)
+    assert extractor.extract_all_fields("Enrol Code: E-77") == {}
+    assert extractor.save_custom_pattern("roll_no", "Enrol Code")
+    assert extractor.version == 2
+    assert "enrol code" in extractor.field_keywords["roll_no"]
+    assert extractor.extract_all_fields("Enrol Code: E-77") == {"roll_no": "E-77"}
+
+
+def test_other_process_changes_are_picked_up(patterns_path):
+    reader = FieldExtractor(patterns_path)
+    writer = FieldExtractor(patterns_path)
+    assert writer.save_custom_pattern("roll_no", "ticket")
+    assert "ticket" in reader.field_keywords["roll_no"]
+    assert reader.extract_all_fields("Ticket: 991") == {"roll_no": "991"}
+
+
+def test_field_keywords_is_a_copy(patterns_path):
+    extractor = FieldExtractor(patterns_path)
+    extractor.field_keywords["name"].append("changed")
+    assert "changed" not in extractor.field_keywords["name"]
+
+
+def test_one_extraction_uses_one_pattern_state(patterns_path, monkeypatch):
+    extractor = FieldExtractor(patterns_path)
+    states = []
+    original = FieldExtractor._map_field_name
+
+    def recording_map(self, field_name, state):
+        states.append(state.version)
+        if len(states) == 1:
+            # Another request trains a pattern mid-extraction
+            self.save_custom_pattern("roll_no", "ticket")
+        return original(self, field_name, state)
+
+    monkeypatch.setattr(FieldExtractor, "_map_field_name", recording_map)
+    extractor.extract_all_fields("Ticket: 991\nCity: Pune\nTotal: 12", "form")
+    assert len(states) > 1
+    assert set(states) == {1}
@@ -0,0 +1,207 @@
+import asyncio
+import threading
+from datetime import timedelta
+
+import pytest
+
+from job_worker import JobWorker
+from jobs import DEAD, FAILED, RUNNING, SUCCEEDED, InMemoryJobStore, new_job, public_view, retry_delay
+from ocr_pool import OCRWorkerPool
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def queued_store(count=1, max_attempts=3, **kwargs):
+    store = InMemoryJobStore(**kwargs)
+    ids = []
+    for _ in range(count):
+        job = new_job("ocr", {"content_type": "image/png", "language": "eng", "force_ocr": False}, max_attempts)
+        ids.append(await store.enqueue(job, b"document"))
+    return store, ids
+
+
+def test_claims_are_exclusive_and_in_creation_order():
+    async def scenario():
+        store, ids = await queued_store(2)
+        first = await store.claim("w1", 60)
+        second = await store.claim("w2", 60)
+        return ids, first, second, await store.claim("w3", 60)
+
+    ids, first, second, none = run(scenario())
+    assert [first["_id"], second["_id"]] == ids
+    assert first["status"] == RUNNING and first["attempts"] == 1 and first["worker_id"] == "w1"
+    assert none is None
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_locked_out():
+    async def scenario():
+        store, (job_id,) = await queued_store()
+        job = await store.claim("w1", 60)
+        store._jobs[job_id]["lease_expires_at"] -= timedelta(seconds=120)  # w1 stopped heartbeating
+        taken = await store.claim("w2", 60)
+        return (taken, await store.heartbeat(job_id, "w1", 60), await store.finish(job, "w1", SUCCEEDED),
+                await store.finish(taken, "w2", SUCCEEDED, result={"text": "ok"}), await store.get(job_id))
+
+    taken, heartbeat, stale_finish, finish, final = run(scenario())
+    assert taken["worker_id"] == "w2" and taken["attempts"] == 2
+    assert not heartbeat and not stale_finish and finish
+    assert final["status"] == SUCCEEDED and final["result"] == {"text": "ok"}
+
+
+def test_requeue_waits_for_its_delay():
+    async def scenario():
+        store, (job_id,) = await queued_store()
+        job = await store.claim("w1", 60)
+        await store.requeue(job, "w1", "boom", delay_seconds=30)
+        early = await store.claim("w1", 60)
+        store._jobs[job_id]["available_at"] -= timedelta(seconds=31)
+        return early, await store.claim("w1", 60)
+
+    early, later = run(scenario())
+    assert early is None
+    assert later["attempts"] == 2 and later["error"] == "boom"
+
+
+def test_finished_jobs_expire_after_ttl():
+    async def scenario():
+        store, (done_id, running_id) = await queued_store(2, ttl_seconds=60)
+        job = await store.claim("w1", 60)
+        await store.claim("w1", 60)
+        await store.finish(job, "w1", SUCCEEDED, result={"text": "ok"})
+        kept = await store.get(done_id)
+        # Only the finished job ages out; running jobs are never purged
+        store._finished[done_id] -= timedelta(seconds=61)
+        return kept, await store.get(done_id), await store.get(running_id), await store.counts()
+
+    kept, expired, running, counts = run(scenario())
+    assert kept["result"] == {"text": "ok"}
+    assert expired is None
+    assert running["status"] == RUNNING
+    assert counts == {RUNNING: 1}
+
+
+def test_finished_jobs_capped_oldest_first():
+    async def scenario():
+        store, ids = await queued_store(4, max_finished=2)
+        for _ in ids:
+            job = await store.claim("w1", 60)
+            await store.finish(job, "w1", SUCCEEDED, result={"text": job["_id"]})
+        return ids, [await store.get(job_id) for job_id in ids], store._files
+
+    ids, jobs, files = run(scenario())
+    assert jobs[:2] == [None, None]
+    assert [job["result"]["text"] for job in jobs[2:]] == ids[2:]
+    assert files == {}
+
+
+def test_retry_delay_backs_off_exponentially():
+    assert [retry_delay(n, 5) for n in (1, 2, 3, 4)] == [5, 10, 20, 40]
+    assert retry_delay(0, 5) == 5
+
+
+class ScriptedWorker(JobWorker):
+    """JobWorker whose _execute raises or returns from a script instead of running OCR"""
+
+    def __init__(self, store, outcomes):
+        super().__init__(store, OCRWorkerPool(max_workers=1), worker_id="w", retry_base_seconds=0)
+        self.outcomes = list(outcomes)
+
+    async def _execute(self, job):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+async def run_until_idle(worker, store):
+    while True:
+        job = await store.claim(worker.worker_id, worker.lease_seconds)
+        if job is None:
+            return
+        await worker.process(job)
+
+
+@pytest.mark.parametrize("outcomes, status, attempts", [
+    ([{"text": "ok"}], SUCCEEDED, 1),
+    ([RuntimeError("tesseract crashed"), {"text": "ok"}], SUCCEEDED, 2),
+    ([ValueError("bad page range")], FAILED, 1),
+    ([RuntimeError("a"), RuntimeError("b"), RuntimeError("c")], DEAD, 3),
+])
+def test_worker_retries_then_settles(outcomes, status, attempts):
+    async def scenario():
+        store, (job_id,) = await queued_store(max_attempts=3)
+        await run_until_idle(ScriptedWorker(store, outcomes), store)
+        return await store.get(job_id), await store.counts()
+
+    job, counts = run(scenario())
+    assert job["status"] == status
+    assert job["attempts"] == attempts
+    assert counts == {status: 1}
+    assert public_view(job)["job_id"] == job["_id"]
+
+
+def test_job_that_keeps_losing_its_lease_goes_dead():
+    async def scenario():
+        store, (job_id,) = await queued_store(max_attempts=2)
+        for _ in range(2):
+            await store.claim("crashing", 60)
+            store._jobs[job_id]["lease_expires_at"] -= timedelta(seconds=120)
+        worker = ScriptedWorker(store, [{"text": "never run"}])
+        await run_until_idle(worker, store)
+        return await store.get(job_id), worker.outcomes
+
+    job, outcomes = run(scenario())
+    assert job["status"] == DEAD and job["attempts"] == 3
+    assert outcomes == [{"text": "never run"}]
+
+
+def test_busy_pool_does_not_cost_attempts(monkeypatch):
+    import ocr_pipeline
+
+    monkeypatch.setattr(ocr_pipeline, "ocr_document", lambda *args, page_number, **kwargs: {"text": str(page_number)})
+
+    async def scenario():
+        pool = OCRWorkerPool(max_workers=1, max_queue=0)
+        store = InMemoryJobStore()
+        params = {"content_type": "application/pdf", "language": "eng", "force_ocr": False,
+                  "page_numbers": [0, 1, 2], "page_count": 3}
+        job_id = await store.enqueue(new_job("ocr", params, 3), b"%PDF")
+        # Every worker busy and no room to queue: pages must wait, not fail
+        release = threading.Event()
+        blocker = asyncio.ensure_future(pool.submit(release.wait))
+        await asyncio.sleep(0.01)
+        worker = JobWorker(store, pool, worker_id="w")
+        running = asyncio.ensure_future(run_until_idle(worker, store))
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(blocker, running)
+        pool.shutdown()
+        return await store.get(job_id)
+
+    job = run(scenario())
+    assert job["status"] == SUCCEEDED and job["attempts"] == 1
+    assert [page.get("error") for page in job["result"]["pages"]] == [None, None, None]
+    assert [page["text"] for page in job["result"]["pages"]] == ["0", "1", "2"]
+
+
+@pytest.mark.parametrize("content_type", ["image/png", "application/pdf"])
+def test_corrupt_upload_fails_on_first_attempt(content_type):
+    async def scenario():
+        store = InMemoryJobStore()
+        params = {"content_type": content_type, "language": "eng", "force_ocr": False, "page_numbers": None}
+        job_id = await store.enqueue(new_job("ocr", params, 3), b"definitely not a document")
+        pool = OCRWorkerPool(max_workers=1)
+        await run_until_idle(JobWorker(store, pool, worker_id="w"), store)
+        pool.shutdown()
+        return await store.get(job_id)
+
+    job = run(scenario())
+    assert job["status"] == FAILED and job["attempts"] == 1
+    assert "/" not in job["error"]
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        new_job("translate", {}, 3)
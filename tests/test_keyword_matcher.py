@@ -0,0 +1,70 @@
+import random
+import re
+
+from field_extractor import DEFAULT_KEYWORDS
+from keyword_matcher import KeywordIndex
+
+
+def legacy_labeled_values(field_keywords, text):
+    """The per-keyword regex loop KeywordIndex.labeled_values replaced"""
+    fields = {}
+    for field_name, keywords in field_keywords.items():
+        for keyword in keywords:
+            pattern = re.compile(r'(?:^|\n)\s*' + re.escape(keyword) + r'[:\.\-]?\s+(.+)', re.IGNORECASE)
+            match = pattern.search(text)
+            if match and match.group(1).strip():
+                fields[field_name] = match.group(1).strip()
+                break
+    return fields
+
+
+def legacy_map_field_name(field_keywords, name):
+    for field, keywords in field_keywords.items():
+        if any(keyword in name for keyword in keywords):
+            return field
+    return None
+
+
+def random_document(rng, keywords):
+    lines = []
+    for _ in range(rng.randint(1, 25)):
+        label = rng.choice(keywords)
+        if rng.random() < 0.3:
+            label = label.upper()
+        value = " ".join(rng.choice(("John", "12/05/2001", "24/94076", "", "x", "B+")) for _ in range(3))
+        lines.append(rng.choice(("", " ", "\t")) + label + rng.choice((":", ".", "-", "", "::")) +
+                     rng.choice((" ", "  ", "")) + value)
+    return rng.choice(("\n", "\n\n")).join(lines)
+
+
+def test_labeled_values_match_the_regex_loop():
+    rng = random.Random(7)
+    index = KeywordIndex(DEFAULT_KEYWORDS)
+    keywords = [keyword for kws in DEFAULT_KEYWORDS.values() for keyword in kws]
+    for _ in range(500):
+        text = random_document(rng, keywords)
+        assert index.labeled_values(text) == legacy_labeled_values(DEFAULT_KEYWORDS, text), text
+
+
+def test_map_field_name_matches_the_substring_scan():
+    rng = random.Random(11)
+    index = KeywordIndex(DEFAULT_KEYWORDS)
+    keywords = [keyword for kws in DEFAULT_KEYWORDS.values() for keyword in kws]
+    names = ["", "zzz", "qq qq"] + keywords
+    for _ in range(500):
+        names.append(" ".join(rng.choice(keywords + ["xx", "of", "no"]) for _ in range(rng.randint(1, 3))))
+    for name in names:
+        assert index.map_field_name(name) == legacy_map_field_name(DEFAULT_KEYWORDS, name), name
+
+
+def test_priority_follows_field_and_keyword_order():
+    index = KeywordIndex({"first": ["name"], "second": ["full name", "name"]})
+    assert index.labeled_values("Full Name: Ada\nName: Grace") == {"first": "Grace", "second": "Ada"}
+    assert index.map_field_name("full name") == "first"
+
+
+def test_labels_need_a_value_after_them():
+    index = KeywordIndex({"name": ["name"]})
+    assert index.labeled_values("name:") == {}
+    assert index.labeled_values("surname: Lovelace") == {}
+    assert index.labeled_values("  NAME- Ada ") == {"name": "Ada"}
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+pytesseract = pytest.importorskip("pytesseract")
+
+from language_registry import LanguageRegistry
+
+
+@pytest.fixture
+def fake_tesseract(tmp_path, monkeypatch):
+    """A tesseract stand-in whose --list-langs reports the .traineddata files in tmp_path/tessdata"""
+    tessdata = tmp_path / "tessdata"
+    tessdata.mkdir()
+    (tessdata / "eng.traineddata").write_bytes(b"")
+    calls = tmp_path / "calls"
+    script = tmp_path / "tesseract"
+    script.write_text(
+        "#!/bin/sh\n"
+        f"echo x >> '{calls}'\n"
+        f"echo 'List of available languages in \"{tessdata}/\" (n):'\n"
+        f"ls '{tessdata}' | sed 's/.traineddata$//'\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setattr(pytesseract.pytesseract, "tesseract_cmd", str(script))
+
+    def call_count():
+        return len(calls.read_text().splitlines()) if calls.exists() else 0
+
+    return tessdata, call_count
+
+
+def test_lookups_before_load_pass_through_without_running_tesseract(fake_tesseract):
+    _, call_count = fake_tesseract
+    registry = LanguageRegistry()
+    assert registry.resolve("eng+xyz") == ("eng+xyz", [])
+    assert registry.available() == []
+    assert not registry.loaded
+    assert call_count() == 0
+
+
+def test_resolve_drops_missing_languages(fake_tesseract):
+    registry = LanguageRegistry()
+    registry.load()
+    assert registry.available() == ["eng"]
+    assert registry.resolve("eng+xyz") == ("eng", ["xyz"])
+    assert registry.resolve("xyz") == ("eng", ["xyz"])
+
+
+def test_refresh_only_reloads_when_tessdata_changes(fake_tesseract):
+    tessdata, call_count = fake_tesseract
+    registry = LanguageRegistry()
+    assert registry.refresh_if_changed()
+    assert not registry.refresh_if_changed()
+    assert call_count() == 1
+
+    (tessdata / "hin.traineddata").write_bytes(b"")
+    stat = os.stat(tessdata)
+    os.utime(tessdata, (stat.st_atime, stat.st_mtime + 10))
+    assert registry.resolve("hin") == ("eng", ["hin"])  # Lookups serve the old snapshot
+    assert registry.refresh_if_changed()
+    assert registry.resolve("hin") == ("hin", [])
+    assert call_count() == 2
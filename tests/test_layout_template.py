@@ -0,0 +1,136 @@
+import json
+import os
+
+import pytest
+from PIL import Image
+
+import layout_template
+from layout_template import MIN_ZONE_HEIGHT, TemplateRegistry, Zone, crop_zone, ocr_zones, parse_template
+
+
+def template_json(document_type="id_card", zones=None, **extra):
+    zones = zones if zones is not None else [{"field": "roll_no", "box": [0.3, 0.4, 0.7, 0.5]}]
+    return json.dumps({"document_type": document_type, "zones": zones, **extra}).encode()
+
+
+def test_parse_template():
+    raw = template_json(name="school_id_v1", zones=[
+        {"field": "roll_no", "box": [0.3, 0.4, 0.7, 0.5], "psm": 8, "whitelist": "0123456789/",
+         "pattern": r"(\d{2}/\d{5})"},
+        {"field": "name", "box": ["0", "0", "1", "0.1"]},
+    ])
+    template = parse_template(raw, "templates/school.json")
+    assert template.name == "school_id_v1" and template.document_type == "id_card"
+    roll_no, name = template.zones
+    assert roll_no.psm == 8 and roll_no.whitelist == "0123456789/" and roll_no.pattern.search("24/94076")
+    assert name == Zone("name", (0.0, 0.0, 1.0, 0.1))
+    assert template.key.startswith("school_id_v1:")
+    # The key follows the content, so an edited template misses old cache entries
+    assert parse_template(raw.replace(b"0.7", b"0.8")).key != template.key
+
+
+def test_name_defaults_to_file_stem():
+    assert parse_template(template_json(), "templates/admit_card.json").name == "admit_card"
+
+
+@pytest.mark.parametrize("raw, message", [
+    (b"{not json", "not a layout template"),
+    (b"[]", "not a layout template"),
+    (json.dumps({"zones": []}).encode(), "not a layout template"),
+    (template_json(zones=[]), "no zones"),
+    (template_json(zones=[{"box": [0, 0, 1, 1]}]), "zone 0 is invalid"),
+    (template_json(zones=[{"field": "a", "box": [0, 0, 1]}]), "zone 0 is invalid"),
+    (template_json(zones=[{"field": "a", "box": [0, 0, 1, 1], "psm": "x"}]), "zone 0 is invalid"),
+    (template_json(zones=[{"field": "a", "box": [0, 0, 1, 1], "pattern": "("}]), "zone 0 is invalid"),
+    (template_json(zones=[{"field": "a", "box": [0.5, 0, 0.4, 1]}]), "box must be fractions"),
+    (template_json(zones=[{"field": "a", "box": [0, 0, 1.2, 1]}]), "box must be fractions"),
+    (template_json(zones=[{"field": "a", "box": [0, -0.1, 1, 1]}]), "box must be fractions"),
+])
+def test_parse_template_rejects(raw, message):
+    with pytest.raises(ValueError, match=message):
+        parse_template(raw, "bad.json")
+
+
+def write(path, raw):
+    path.write_bytes(raw)
+    # A new mtime even on filesystems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_registry_lookup_and_reload(tmp_path):
+    write(tmp_path / "id.json", template_json("id_card", name="id_v1"))
+    write(tmp_path / "broken.json", b"{not json")
+    write(tmp_path / "notes.txt", template_json("receipt"))
+    (tmp_path / "examples").mkdir()
+    write(tmp_path / "examples" / "marks.json", template_json("marksheet"))
+
+    registry = TemplateRegistry(tmp_path, check_interval=0)
+    assert registry.available() == {"id_card": "id_v1"}
+    assert registry.get("id_card").name == "id_v1"
+    assert registry.get("marksheet") is None
+
+    write(tmp_path / "id.json", template_json("id_card", name="id_v2"))
+    write(tmp_path / "marks.json", template_json("marksheet"))
+    assert registry.available() == {"id_card": "id_v2", "marksheet": "marks"}
+
+    (tmp_path / "marks.json").unlink()
+    assert registry.get("marksheet") is None
+
+
+def test_registry_keeps_first_template_per_document_type(tmp_path):
+    write(tmp_path / "a.json", template_json("id_card", name="first"))
+    write(tmp_path / "b.json", template_json("id_card", name="second"))
+    assert TemplateRegistry(tmp_path).get("id_card").name == "first"
+
+
+def test_registry_checks_at_most_every_interval(tmp_path):
+    registry = TemplateRegistry(tmp_path, check_interval=3600)
+    assert registry.get("id_card") is None
+    write(tmp_path / "id.json", template_json("id_card"))
+    assert registry.get("id_card") is None
+
+
+def test_missing_directory_has_no_templates(tmp_path):
+    assert TemplateRegistry(tmp_path / "missing").available() == {}
+
+
+def test_crop_zone_cuts_the_fraction_of_the_page():
+    image = Image.new("L", (1000, 2000))
+    crop = crop_zone(image, Zone("a", (0.1, 0.25, 0.5, 0.5)))
+    assert crop.size == (400, 500)
+
+
+def test_crop_zone_at_the_page_edge_stays_inside():
+    image = Image.new("L", (999, 1001))
+    image.putpixel((998, 1000), 255)
+    crop = crop_zone(image, Zone("a", (0.5, 0.9, 1.0, 1.0)))
+    assert crop.size == (499, 100)  # From round(499.5) = 500
+    assert crop.getpixel((498, 99)) == 255
+
+
+def test_short_zone_upscaled():
+    image = Image.new("L", (1000, 1000))
+    crop = crop_zone(image, Zone("a", (0.0, 0.0, 0.5, 0.02)))
+    assert crop.size == (round(500 * MIN_ZONE_HEIGHT / 20), MIN_ZONE_HEIGHT)
+
+
+def test_ocr_zones_applies_patterns(monkeypatch):
+    texts = {"name": "Name:  Alice\nSmith", "roll_no": "Roll No 24/94076", "dob": "unreadable"}
+
+    def run_tesseract(image, language, config):
+        field = "name" if "--psm 6" in config else "roll_no" if "whitelist" in config else "dob"
+        return {"text": texts[field], "confidence": {"name": 90, "roll_no": 80, "dob": 10}[field]}
+
+    monkeypatch.setattr(layout_template, "run_tesseract", run_tesseract)
+    template = parse_template(template_json(zones=[
+        {"field": "name", "box": [0, 0, 1, 0.2], "psm": 6},
+        {"field": "roll_no", "box": [0, 0.2, 1, 0.4], "whitelist": "0123456789/", "pattern": r"(\d{2}/\d{5})"},
+        {"field": "dob", "box": [0, 0.4, 1, 0.6], "pattern": r"\d{2}/\d{2}/\d{4}"},
+    ]), "school.json")
+
+    result = ocr_zones(Image.new("L", (200, 200), 255), template, "eng")
+    assert result["fields"] == {"name": "Name: Alice Smith", "roll_no": "24/94076"}
+    assert result["raw_text"] == "name: Name: Alice Smith\nroll_no: 24/94076"
+    assert result["confidence"] == 85.0 and result["template"] == "school"
+    assert [zone["value"] for zone in result["zones"]] == ["Name: Alice Smith", "24/94076", ""]
@@ -0,0 +1,63 @@
+import pytest
+
+from metrics import MetricsRegistry
+
+
+def test_help_and_type_lines_precede_samples():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests served", ("route",))
+    registry.gauge("ready", "1 when ready", callback=lambda: [({}, 1)])
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests served",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a"} 3',
+        "# HELP ready 1 when ready",
+        "# TYPE ready gauge",
+        "ready 1",
+    ]
+    assert registry.render().endswith("\n")
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    counter = registry.counter("odd_total", "Odd labels", ("value",))
+    counter.inc(value='back\\slash "quoted"\nnewline')
+    assert registry.render().splitlines()[-1] == r'odd_total{value="back\\slash \"quoted\"\nnewline"} 1'
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, route="/a")
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',  # le is inclusive
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 2.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_gauge_moves_both_ways():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("in_flight", "In flight")
+    gauge.inc(3)
+    gauge.dec()
+    assert registry.render().splitlines()[-1] == "in_flight 2"
+    gauge.set(0.5)
+    assert registry.render().splitlines()[-1] == "in_flight 0.5"
+
+
+def test_wrong_labels_rejected():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ("route",))
+    with pytest.raises(ValueError):
+        counter.inc(path="/a")
+    callback_counter = registry.counter("bad_total", "Bad callback", ("reason",), callback=lambda: [({}, 1)])
+    with pytest.raises(ValueError):
+        callback_counter.samples()
@@ -0,0 +1,121 @@
+import gc
+import io
+import warnings
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+pytest.importorskip("pytesseract")
+fitz = pytest.importorskip("fitz")
+
+import ocr_pipeline
+from normalization import estimate_text_height, jpeg_analysis_draft
+from ocr_pipeline import load_upright_image
+
+LINE_HEIGHT = 38
+UPRIGHT = {"rotate": 0, "skew": 0.0, "osd_confidence": None}
+
+
+def text_page(width=1240, height=1754) -> Image.Image:
+    """A portrait page of 'words' (black boxes) on lines LINE_HEIGHT px tall"""
+    page = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    for top in range(100, height - 100, LINE_HEIGHT + 30):
+        for left in range(100, width - 160, 80):
+            draw.rectangle([left, top, left + 59, top + LINE_HEIGHT - 1], fill=0)
+    return page
+
+
+def encode(image: Image.Image, fmt: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def test_text_height_of_upright_page():
+    assert estimate_text_height(np.asarray(text_page())) == LINE_HEIGHT
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "JPEG"])
+def test_sideways_page_measured_after_rotation(monkeypatch, fmt):
+    detected = []
+
+    def detect(image, mode=None):
+        detected.append(image.size)
+        return {"rotate": 90, "skew": 0.0, "osd_confidence": 9.0}
+
+    monkeypatch.setattr(ocr_pipeline, "detect_orientation", detect)
+    sideways = text_page().transpose(Image.Transpose.ROTATE_90)
+    image, metadata = load_upright_image(encode(sideways, fmt), "image/" + fmt.lower())
+
+    # Detection saw the small analysis copy, not an upscaled page
+    assert max(detected[0]) <= 1754
+    assert metadata["orientation"]["rotate"] == 90
+    assert metadata["text_height"] == pytest.approx(LINE_HEIGHT, abs=3)
+    assert metadata["scale"] == 1.0
+    assert image.size == (1240, 1754)
+
+
+def test_cached_orientation_skips_detection(monkeypatch):
+    monkeypatch.setattr(ocr_pipeline, "detect_orientation", lambda *args, **kwargs: pytest.fail("detected"))
+    sideways = text_page().transpose(Image.Transpose.ROTATE_270)
+    orientation = {"rotate": 270, "skew": 0.0, "osd_confidence": 9.0}
+    image, metadata = load_upright_image(encode(sideways, "PNG"), "image/png", orientation=orientation)
+    assert metadata["orientation"] is orientation
+    assert image.size == (1240, 1754)
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "JPEG"])
+def test_exif_orientation_applied(monkeypatch, fmt):
+    monkeypatch.setattr(ocr_pipeline, "detect_orientation", lambda image, mode=None: dict(UPRIGHT))
+    stored = text_page().transpose(Image.Transpose.ROTATE_90)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Stored sideways: rotate 90 degrees clockwise to view
+    image, metadata = load_upright_image(encode(stored, fmt, exif=exif.tobytes()), "image/" + fmt.lower())
+    assert image.size == (1240, 1754)
+    assert metadata["text_height"] == pytest.approx(LINE_HEIGHT, abs=3)
+
+
+def test_jpeg_analysis_draft_is_reduced():
+    page = text_page(4000, 3000)
+    draft, factor = jpeg_analysis_draft(Image.open(io.BytesIO(encode(page, "JPEG"))))
+    assert draft.mode == 'L'
+    assert max(draft.size) < 4000
+    assert factor * max(draft.size) == 4000
+
+
+def test_sideways_pdf_page_rendered_for_upright_text(monkeypatch):
+    monkeypatch.setattr(ocr_pipeline, "detect_orientation",
+                        lambda image, mode=None: {"rotate": 90, "skew": 0.0, "osd_confidence": 9.0})
+    sideways = text_page().transpose(Image.Transpose.ROTATE_90)
+    doc = fitz.open()
+    page = doc.new_page(width=842, height=595)
+    page.insert_image(page.rect, stream=encode(sideways, "PNG"))
+    data = doc.tobytes()
+    doc.close()
+
+    image, metadata = load_upright_image(data, "application/pdf")
+    # 38 px lines on a 1754 px page are ~18 pt, rendered at ~40 px
+    assert metadata["text_height"] == pytest.approx(40, abs=4)
+    assert image.size[0] < image.size[1]
+
+
+@pytest.mark.parametrize("fmt, params", [
+    ("PNG", {}),
+    ("JPEG", {}),
+    ("TIFF", {"save_all": True}),  # Multi-frame: PIL keeps the file open after load()
+])
+def test_image_files_are_closed(monkeypatch, tmp_path, fmt, params):
+    monkeypatch.setattr(ocr_pipeline, "detect_orientation", lambda image, mode=None: dict(UPRIGHT))
+    page = text_page()
+    if params:
+        params["append_images"] = [page]
+    path = tmp_path / f"page.{fmt.lower()}"
+    path.write_bytes(encode(page, fmt, **params))
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        load_upright_image(str(path), "image/" + fmt.lower())
+        gc.collect()
+    assert not [warning for warning in caught if issubclass(warning.category, ResourceWarning)]
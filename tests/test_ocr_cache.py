@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+
+from ocr_cache import DiskCacheStore, LRUCache, OCRResultCache, cacheable_result
+
+
+def test_lru_tracks_bytes_and_evicts_oldest():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", 1, 4)
+    cache.set("b", 2, 4)
+    assert cache.get("a") == 1  # a is now the most recent
+    cache.set("c", 3, 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.size_bytes == 8
+    assert cache.evictions == 1
+
+
+def test_lru_replacing_a_key_does_not_double_count():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", 1, 6)
+    cache.set("a", 2, 3)
+    assert cache.size_bytes == 3
+    assert len(cache) == 1
+    assert cache.get("a") == 2
+
+
+def test_lru_skips_values_larger_than_the_cache_and_caps_items():
+    cache = LRUCache(max_bytes=10, max_items=2)
+    cache.set("huge", 0, 11)
+    assert cache.get("huge") is None and cache.size_bytes == 0
+    for key in "abc":
+        cache.set(key, key, 1)
+    assert len(cache) == 2 and cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_keys_depend_on_options_and_pipeline_version():
+    v1, v2 = OCRResultCache("1"), OCRResultCache("2")
+    key = v1.make_key("hash", "ocr", 0, language="eng", force_ocr=False)
+    assert key == v1.make_key("hash", "ocr", 0, force_ocr=False, language="eng")
+    assert key != v1.make_key("hash", "ocr", 0, language="hin", force_ocr=False)
+    assert key != v1.make_key("hash", "ocr", 1, language="eng", force_ocr=False)
+    assert key != v2.make_key("hash", "ocr", 0, language="eng", force_ocr=False)
+
+
+def test_get_returns_copies_and_counts():
+    async def scenario():
+        cache = OCRResultCache("1")
+        await cache.set("k", {"text": "hello"})
+        value = await cache.get("k")
+        value["fields"] = {}
+        return await cache.get("k"), await cache.get("missing"), cache.stats()
+
+    value, missing, stats = asyncio.run(scenario())
+    assert value == {"text": "hello"}
+    assert missing is None
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_disk_tier_survives_a_new_cache_and_expires(tmp_path):
+    async def scenario():
+        first = OCRResultCache("1", store=DiskCacheStore(str(tmp_path), ttl_seconds=60))
+        await first.set("k", {"text": "hello"})
+        second = OCRResultCache("1", store=DiskCacheStore(str(tmp_path), ttl_seconds=60))
+        found = await second.get("k")
+
+        old = time.time() - 120
+        os.utime(tmp_path / "k.json", (old, old))
+        third = OCRResultCache("1", store=DiskCacheStore(str(tmp_path), ttl_seconds=60))
+        return found, second.stats(), await third.get("k"), third.stats()
+
+    found, stats, expired, expired_stats = asyncio.run(scenario())
+    assert found == {"text": "hello"}
+    assert stats["persistent_hits"] == 1
+    assert expired is None
+    assert expired_stats["expired"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    async def scenario():
+        cache = OCRResultCache("1", enabled=False)
+        await cache.set("k", {"text": "hello"})
+        return await cache.get("k")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_only_successful_results_are_cacheable():
+    assert cacheable_result({"engine": "tesseract", "confidence": 87.5, "metadata": {}})
+    assert cacheable_result({"engine": "text_layer", "confidence": 100.0})
+    assert cacheable_result({"engine": "template", "fields": {"name": "x"}})
+    assert not cacheable_result({"engine": "tesseract", "confidence": 0, "metadata": {}})
+    assert not cacheable_result({"engine": "tesseract", "confidence": 40.0,
+                                 "metadata": {"tesseract_fallback": True}})
+    assert not cacheable_result({"engine": "template", "error": "zone failed"})
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+
+import pytest
+
+from ocr_pool import OCRPoolFull, OCRWorkerPool
+from scheduling import BULK, INTERACTIVE, Lane
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_submit_returns_result_and_counts():
+    async def scenario():
+        pool = OCRWorkerPool(max_workers=2, max_queue=1)
+        try:
+            assert await pool.submit(pow, 2, 10) == 1024
+            with pytest.raises(ZeroDivisionError):
+                await pool.submit(divmod, 1, 0)
+            return pool.stats()
+        finally:
+            pool.shutdown()
+
+    stats = run(scenario())
+    assert stats["completed"] == 1
+    assert stats["failed"] == 1
+    assert stats["busy_workers"] == 0
+
+
+def test_rejects_when_queue_full():
+    async def scenario():
+        pool = OCRWorkerPool(max_workers=1, max_queue=1)
+        gate = threading.Event()
+        try:
+            running = asyncio.ensure_future(pool.submit(gate.wait))
+            await asyncio.sleep(0.05)
+            queued = asyncio.ensure_future(pool.submit(lambda: "queued"))
+            await asyncio.sleep(0)
+            with pytest.raises(OCRPoolFull):
+                await pool.submit(lambda: "overflow")
+            gate.set()
+            return await running, await queued, pool.stats()
+        finally:
+            gate.set()
+            pool.shutdown()
+
+    running, queued, stats = run(scenario())
+    assert running is True
+    assert queued == "queued"
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_interactive_jumps_waiting_bulk_work():
+    async def scenario():
+        pool = OCRWorkerPool(max_workers=1, max_queue=10)
+        gate = threading.Event()
+        order = []
+        try:
+            blocker = asyncio.ensure_future(pool.submit(gate.wait))
+            await asyncio.sleep(0.05)
+            jobs = [asyncio.ensure_future(pool.submit(order.append, name, lane=lane))
+                    for name, lane in (("bulk-1", Lane(BULK, "a")), ("bulk-2", Lane(BULK, "a")),
+                                       ("interactive", Lane(INTERACTIVE, "b")))]
+            await asyncio.sleep(0)
+            gate.set()
+            await asyncio.gather(blocker, *jobs)
+            return order
+        finally:
+            gate.set()
+            pool.shutdown()
+
+    assert run(scenario()) == ["interactive", "bulk-1", "bulk-2"]
+
+
+def test_cancelled_waiter_frees_its_place():
+    async def scenario():
+        pool = OCRWorkerPool(max_workers=1, max_queue=1)
+        gate = threading.Event()
+        try:
+            blocker = asyncio.ensure_future(pool.submit(gate.wait))
+            await asyncio.sleep(0.05)
+            waiter = asyncio.ensure_future(pool.submit(lambda: "never"))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            replacement = asyncio.ensure_future(pool.submit(lambda: "ran"))
+            await asyncio.sleep(0)
+            gate.set()
+            await blocker
+            return await replacement, pool.stats()
+        finally:
+            gate.set()
+            pool.shutdown()
+
+    result, stats = run(scenario())
+    assert result == "ran"
+    assert stats["busy_workers"] == 0
+    assert stats["rejected"] == 0
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        OCRWorkerPool(kind="fiber")
+
+
+def test_wait_for_space_queues_instead_of_failing():
+    async def scenario():
+        pool = OCRWorkerPool(max_workers=1, max_queue=1)
+        gate = threading.Event()
+        try:
+            blocker = asyncio.ensure_future(pool.submit(gate.wait))
+            await asyncio.sleep(0.05)
+            jobs = [asyncio.ensure_future(pool.submit(lambda n=n: n, lane=Lane(BULK, "batch"), wait_for_space=True))
+                    for n in range(5)]
+            await asyncio.sleep(0)
+            depth = pool.stats()["queue_depth"]
+            gate.set()
+            await blocker
+            return depth, await asyncio.gather(*jobs), pool.stats()
+        finally:
+            gate.set()
+            pool.shutdown()
+
+    depth, results, stats = run(scenario())
+    assert depth == 1
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    assert stats["rejected"] == 0
@@ -0,0 +1,63 @@
+import pytest
+
+from ocr_result import build_ocr_result
+
+COLUMNS = ("level", "page_num", "block_num", "par_num", "line_num", "word_num", "conf", "text")
+
+
+def tesseract_data(*rows):
+    """image_to_data DICT output from (level, block, par, line, conf, text) rows on page 1"""
+    data = {column: [] for column in COLUMNS}
+    for word_num, (level, block, par, line, conf, text) in enumerate(rows):
+        for column, value in zip(COLUMNS, (level, 1, block, par, line, word_num, conf, text)):
+            data[column].append(value)
+    return data
+
+
+def test_lines_and_paragraphs_rebuilt():
+    data = tesseract_data(
+        (1, 0, 0, 0, -1, ""),  # Page, block, paragraph and line rows carry no text
+        (2, 1, 0, 0, -1, ""),
+        (4, 1, 1, 1, -1, ""),
+        (5, 1, 1, 1, 90, "Name:"),
+        (5, 1, 1, 1, 80, "John"),
+        (5, 1, 1, 2, 70, "Doe"),
+        (5, 1, 2, 1, 60, "Second"),
+        (5, 1, 2, 1, 50, " "),  # Whitespace-only words are dropped
+        (5, 2, 1, 1, 40, "Block"),
+    )
+    result = build_ocr_result(data)
+    assert result["text"] == "Name: John\nDoe\n\nSecond\n\nBlock"
+    assert [line["text"] for line in result["line_confidences"]] == ["Name: John", "Doe", "Second", "Block"]
+    assert [line["confidence"] for line in result["line_confidences"]] == [85, 70, 60, 40]
+
+
+def test_mean_and_median_confidence():
+    data = tesseract_data(
+        (5, 1, 1, 1, 90, "a"),
+        (5, 1, 1, 1, 30, "b"),
+        (5, 1, 1, 1, 96.5, "c"),
+        (5, 1, 1, 2, 40, "d"),
+    )
+    result = build_ocr_result(data)
+    assert result["confidence"] == pytest.approx(64.125)
+    assert result["median_confidence"] == pytest.approx(65.0)
+    assert result["line_confidences"][0]["confidence"] == pytest.approx(72.17)
+
+
+def test_unscored_words_kept_in_text_but_not_in_confidences():
+    data = tesseract_data(
+        (5, 1, 1, 1, 80, "scored"),
+        (5, 1, 1, 1, -1, "unscored"),
+        (5, 1, 1, 2, "-1", "alone"),  # Older pytesseract returns strings
+    )
+    result = build_ocr_result(data)
+    assert result["text"] == "scored unscored\nalone"
+    assert result["confidence"] == 80 and result["median_confidence"] == 80
+    assert result["line_confidences"] == [{"text": "scored unscored", "confidence": 80.0},
+                                          {"text": "alone", "confidence": 0}]
+
+
+def test_no_words():
+    result = build_ocr_result(tesseract_data((1, 0, 0, 0, -1, ""), (5, 1, 1, 1, -1, "")))
+    assert result == {"text": "", "confidence": 0, "median_confidence": 0, "line_confidences": []}
@@ -0,0 +1,42 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from pdf_pages import count_pages, parse_page_spec
+
+
+@pytest.mark.parametrize("spec, expected", [
+    (None, [0, 1, 2, 3, 4]),
+    ("all", [0, 1, 2, 3, 4]),
+    (" ALL ", [0, 1, 2, 3, 4]),
+    ("", [0, 1, 2, 3, 4]),
+    ("2", [1]),
+    ("1-3", [0, 1, 2]),
+    ("4-", [3, 4]),
+    ("-2", [0, 1]),
+    ("5,1,3", [0, 2, 4]),
+    ("1-2,2-3", [0, 1, 2]),
+    ("3-99", [2, 3, 4]),
+    ("1,,2", [0, 1]),
+])
+def test_parse_page_spec(spec, expected):
+    assert parse_page_spec(spec, 5) == expected
+
+
+@pytest.mark.parametrize("spec", ["0", "3-1", "a", "1-b", "6", "7-9"])
+def test_parse_page_spec_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_page_spec(spec, 5)
+
+
+def test_count_pages_from_bytes_and_path(tmp_path):
+    doc = fitz.open()
+    for _ in range(3):
+        doc.new_page()
+    data = doc.tobytes()
+    doc.close()
+    path = tmp_path / "three.pdf"
+    path.write_bytes(data)
+
+    assert count_pages(data) == 3
+    assert count_pages(str(path)) == 3
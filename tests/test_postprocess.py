@@ -0,0 +1,88 @@
+import json
+import os
+import random
+
+import pytest
+
+from benchmarks.postprocess import legacy_post_process, synthetic_page
+from postprocess import PostProcessor, parse_rules
+
+
+@pytest.fixture
+def processor():
+    return PostProcessor(rules_file=None)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_legacy_post_process(processor, seed):
+    # The legacy common fixes lowercased "Have", "WAS"..., hence the casefold
+    text = synthetic_page(random.Random(seed), lines=200)
+    assert processor.process(text, "eng").lower() == legacy_post_process(text).lower()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("| saw it", "I saw it"),
+    ("then |'ve gone", "then I've gone"),
+    ("a|b", "a|b"),
+    ("word .", "word."),
+    ("word , next", "word, next"),
+    ("end.Next", "end. Next"),
+    ("label :value", "label: value"),
+    ("two  spaces   here", "two spaces here"),
+    ("  padded  ", "padded"),
+])
+def test_rules(processor, text, expected):
+    assert processor.process(text, "eng") == expected
+
+
+def test_pipe_fix_only_for_latin_script(processor):
+    assert processor.process("| नाम .", "hin") == "| नाम."
+    assert processor.process("| saw", "hin+eng") == "I saw"
+
+
+def write_rules(path, rules):
+    path.write_text(json.dumps({"rules": rules}), encoding="utf-8")
+    # Make sure the reload sees a new mtime even on coarse filesystems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_custom_rules_by_language(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    write_rules(rules_file, [
+        {"pattern": r"\b0(?=[A-Z])", "replacement": "O", "languages": ["eng"]},
+        {"pattern": "^rn", "replacement": "m", "ignore_case": True},
+    ])
+    processor = PostProcessor(rules_file, check_interval=0)
+    assert processor.process("0CR\nRNa", "eng") == "OCR\nma"
+    assert processor.process("0CR\nrna", "fra") == "0CR\nma"
+    assert processor.version
+
+
+def test_custom_rules_reloaded_and_broken_file_kept(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    write_rules(rules_file, [{"pattern": "foo", "replacement": "bar"}])
+    processor = PostProcessor(rules_file, check_interval=0)
+    assert processor.process("foo") == "bar"
+    version = processor.version
+
+    write_rules(rules_file, [{"pattern": "foo", "replacement": "baz"}])
+    assert processor.process("foo") == "baz"
+    assert processor.version != version
+
+    rules_file.write_text("{not json", encoding="utf-8")
+    assert processor.process("foo") == "baz"
+
+    rules_file.unlink()
+    assert processor.process("foo") == "foo"
+    assert processor.version == ""
+
+
+@pytest.mark.parametrize("data", [
+    b"{not json",
+    b'{"rules": [{"replacement": "x"}]}',
+    b'{"rules": [{"pattern": "("}]}',
+])
+def test_parse_rules_rejects(data):
+    with pytest.raises(ValueError):
+        parse_rules(data)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from preprocessing import (binarize, niblack_threshold, otsu_threshold, preprocess, sauvola_threshold,
+                           stretch_contrast)
+
+
+def window_mean_std(gray, window):
+    """Reference local mean / std, one clipped window at a time"""
+    radius = window // 2
+    mean = np.zeros(gray.shape)
+    std = np.zeros(gray.shape)
+    for y in range(gray.shape[0]):
+        for x in range(gray.shape[1]):
+            patch = gray[max(y - radius, 0):y + radius + 1, max(x - radius, 0):x + radius + 1].astype(np.float64)
+            mean[y, x] = patch.mean()
+            std[y, x] = patch.std()
+    return mean, std
+
+
+def bimodal(dark=50, light=200):
+    gray = np.full((40, 60), light, dtype=np.uint8)
+    gray[10:30, 5:25] = dark
+    return gray
+
+
+def test_otsu_splits_a_bimodal_histogram():
+    gray = bimodal()
+    threshold = otsu_threshold(gray)
+    # Any cut between the two levels is optimal; the middle of them is taken
+    assert threshold == 125
+    assert set(binarize(gray.copy(), "otsu")[10:30, 5:25].ravel()) == {0}
+    assert binarize(gray, "otsu").sum() == 255 * (40 * 60 - 20 * 20)
+
+
+@pytest.mark.parametrize("level", [0, 128, 255])
+def test_uniform_page_stays_white(level):
+    gray = np.full((20, 30), level, dtype=np.uint8)
+    assert otsu_threshold(gray) == 0
+    for method in ("otsu", "sauvola", "niblack"):
+        assert (binarize(gray.copy(), method) == 255).all()
+
+    binary, _ = preprocess(Image.fromarray(gray), "otsu")
+    assert (np.asarray(binary) == 255).all()
+
+
+@pytest.mark.parametrize("shape, window", [((30, 20), 7), ((5, 9), 25), ((16, 16), 1)])
+def test_local_thresholds_match_reference(shape, window):
+    gray = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    mean, std = window_mean_std(gray, window)
+    np.testing.assert_allclose(sauvola_threshold(gray, window, k=0.3, dynamic_range=100.0),
+                               mean * (1 + 0.3 * (std / 100.0 - 1)), atol=1e-9)
+    np.testing.assert_allclose(niblack_threshold(gray, window, k=-0.4), mean - 0.4 * std, atol=1e-9)
+
+
+def test_sauvola_marks_ink_on_uneven_paper():
+    # Paper brightening from left to right, with a darker stroke on each side
+    gray = np.tile(np.linspace(120, 240, 80).astype(np.uint8), (40, 1))
+    gray[18:22, 5:15] -= 60
+    gray[18:22, 65:75] -= 60
+    binary = binarize(gray, "sauvola", window=15)
+    assert (binary[18:22, 5:15] == 0).all() and (binary[18:22, 65:75] == 0).all()
+    assert (binary[:10] == 255).all()
+
+
+def gray_levels(level):
+    return np.unravel_index(np.arange((level - 60) * 10, (level - 59) * 10), (50, 20))
+
+
+def test_stretch_contrast_maps_percentiles_to_full_range():
+    gray = np.repeat(np.arange(60, 160, dtype=np.uint8), 10).reshape(50, 20)
+    stretched = stretch_contrast(gray)
+    assert stretched is gray  # In place
+    # Ten pixels per level: the 1st percentile is level 60, the 99th level 158
+    assert (stretched[gray_levels(60)] == 0).all()
+    assert (stretched[gray_levels(158)] == 255).all() and (stretched[gray_levels(159)] == 255).all()
+    assert (np.diff(stretched.ravel().astype(int)) >= 0).all()
+
+
+def test_stretch_contrast_leaves_flat_image():
+    gray = np.full((10, 10), 90, dtype=np.uint8)
+    assert (stretch_contrast(gray) == 90).all()
+
+
+def test_unknown_method_rejected():
+    with pytest.raises(ValueError):
+        preprocess(Image.new("L", (4, 4)), "adaptive")
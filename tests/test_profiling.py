@@ -0,0 +1,56 @@
+import os
+import pstats
+
+import pytest
+
+from profiling import debug_allowed, profile_dir, run_profiled
+
+
+@pytest.mark.parametrize("ocr_debug, admin_token, header, allowed", [
+    ("1", None, None, True),
+    (None, "secret", "secret", True),
+    (None, "secret", "wrong", False),
+    (None, "secret", None, False),
+    (None, None, None, False),  # No token configured does not open debug mode
+    (None, "", "", False),
+    ("0", None, None, False),
+])
+def test_debug_allowed(monkeypatch, ocr_debug, admin_token, header, allowed):
+    for name, value in (("OCR_DEBUG", ocr_debug), ("ADMIN_TOKEN", admin_token)):
+        if value is None:
+            monkeypatch.delenv(name, raising=False)
+        else:
+            monkeypatch.setenv(name, value)
+    assert debug_allowed(header) is allowed
+
+
+def test_profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("OCR_PROFILE_DIR", str(tmp_path))
+    assert profile_dir() == str(tmp_path)
+    monkeypatch.delenv("OCR_PROFILE_DIR")
+    assert os.path.basename(profile_dir()) == "ocr-profiles"
+
+
+def work(n, scale=1):
+    return {"total": sum(range(n)) * scale}
+
+
+def test_run_profiled_returns_result_and_dump(tmp_path):
+    directory = tmp_path / "profiles"
+    result = run_profiled(str(directory), "ocr-abc/../p 1", work, 1000, scale=2)
+
+    assert result["total"] == 499500 * 2
+    path = result["profile"]
+    assert os.path.dirname(path) == str(directory)
+    assert path.endswith(".prof") and "ocr-abc_.._p_1" in os.path.basename(path)
+    stats = pstats.Stats(path)
+    assert any(function == "work" for _, _, function in stats.stats)
+
+
+def test_run_profiled_failure_writes_nothing(tmp_path):
+    def broken():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        run_profiled(str(tmp_path), "broken", broken)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,109 @@
+import pytest
+
+from scheduling import BULK, INTERACTIVE, FairQueue, Lane, LaneResolver, parse_api_keys
+
+
+def drain(queue):
+    items = []
+    while True:
+        entry = queue.pop()
+        if entry is None:
+            return items
+        items.append(entry[4])
+
+
+def test_interactive_before_bulk():
+    queue = FairQueue()
+    queue.push(Lane(BULK, "intake"), 1, "bulk-1")
+    queue.push(Lane(INTERACTIVE, "portal"), 100, "interactive-1")
+    queue.push(Lane(BULK, "intake"), 1, "bulk-2")
+    queue.push(Lane(INTERACTIVE, "portal"), 100, "interactive-2")
+    assert drain(queue) == ["interactive-1", "interactive-2", "bulk-1", "bulk-2"]
+
+
+def test_backlog_does_not_starve_another_client():
+    queue = FairQueue()
+    for n in range(100):
+        queue.push(Lane(BULK, "backlog"), 1, f"backlog-{n}")
+    queue.push(Lane(BULK, "other"), 1, "other")
+    # The newcomer waits about one item, not the whole backlog
+    assert drain(queue).index("other") <= 1
+
+
+def test_weights_share_the_class():
+    queue = FairQueue()
+    for n in range(30):
+        queue.push(Lane(BULK, "heavy", 2.0), 1, "heavy")
+        queue.push(Lane(BULK, "light", 1.0), 1, "light")
+    first = drain(queue)[:30]
+    assert first.count("heavy") == 20
+    assert first.count("light") == 10
+
+
+def test_costs_count_against_a_client():
+    queue = FairQueue()
+    queue.push(Lane(BULK, "big"), 10, "big-1")
+    queue.push(Lane(BULK, "big"), 10, "big-2")
+    for n in range(5):
+        queue.push(Lane(BULK, "small"), 1, f"small-{n}")
+    assert drain(queue) == ["small-0", "small-1", "small-2", "small-3", "small-4", "big-1", "big-2"]
+
+
+def test_discard_and_counts():
+    queue = FairQueue()
+    first = queue.push(Lane(INTERACTIVE, "a"), 5, "first")
+    queue.push(Lane(INTERACTIVE, "b"), 7, "second")
+    queue.push(Lane(BULK, "c"), 11, "third")
+    assert len(queue) == 3
+    assert queue.counts() == {INTERACTIVE: 2, BULK: 1}
+    assert queue.cost_at_or_above(INTERACTIVE) == 12
+    assert queue.cost_at_or_above(BULK) == 23
+
+    queue.discard(first)
+    queue.discard(first)  # A second discard is a no-op
+    assert len(queue) == 2
+    assert queue.cost_at_or_above(INTERACTIVE) == 7
+    assert queue.peek()[4] == "second"
+    assert drain(queue) == ["second", "third"]
+    assert len(queue) == 0 and queue.peek() is None
+
+
+def test_idle_client_restarts_from_class_clock():
+    queue = FairQueue()
+    for n in range(3):
+        queue.push(Lane(BULK, "early"), 1, f"early-{n}")
+    drain(queue)
+    # Having been served earlier earns no credit (or debt) later on
+    queue.push(Lane(BULK, "busy"), 1, "busy-0")
+    queue.push(Lane(BULK, "busy"), 1, "busy-1")
+    queue.push(Lane(BULK, "early"), 1, "early-again")
+    assert drain(queue) == ["busy-0", "early-again", "busy-1"]
+
+
+def test_parse_api_keys():
+    assert parse_api_keys(" k1=bulk, k2=interactive:2 ,,") == {"k1": (BULK, 1.0), "k2": (INTERACTIVE, 2.0)}
+    assert parse_api_keys("") == {}
+
+
+@pytest.mark.parametrize("spec", ["k1=urgent", "k1=bulk:fast", "k1"])
+def test_parse_api_keys_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_api_keys(spec)
+
+
+def test_lane_resolver():
+    resolver = LaneResolver({"secret": (INTERACTIVE, 2.0), "intake": (BULK, 1.0)})
+
+    assert resolver.resolve(None, None, "10.0.0.1") == Lane(INTERACTIVE, "10.0.0.1")
+    assert resolver.resolve(" Bulk ", None, None) == Lane(BULK, "anonymous")
+    assert resolver.resolve(None, "unknown", "10.0.0.1", default=BULK) == Lane(BULK, "10.0.0.1")
+
+    lane = resolver.resolve(None, "secret", "10.0.0.1")
+    assert lane.priority == INTERACTIVE and lane.weight == 2.0
+    assert lane.client.startswith("key-") and "secret" not in lane.client
+    # A key may lower its class but never raise it
+    assert resolver.resolve("bulk", "secret", None).priority == BULK
+    assert resolver.resolve("interactive", "intake", None).priority == BULK
+
+    with pytest.raises(ValueError):
+        resolver.resolve("urgent", None, None)
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv("OCR_WARMUP", "0")
+    monkeypatch.setenv("OCR_SPOOL_DIR", str(tmp_path))
+    monkeypatch.delenv("MONGO_URL", raising=False)
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.mark.parametrize("path, filename, content_type", [
+    ("/api/ocr", "a.png", "image/png"),
+    ("/api/ocr", "a.jpg", "image/jpeg"),
+    ("/api/ocr", "a.pdf", "application/pdf"),
+    ("/api/ocr?pages=all", "a.pdf", "application/pdf"),
+    ("/api/extract-fields", "a.png", "image/png"),
+    ("/api/extract-fields", "a.pdf", "application/pdf"),
+    ("/api/jobs?pages=all", "a.pdf", "application/pdf"),
+])
+def test_unreadable_upload_is_a_400_without_internals(client, tmp_path, path, filename, content_type):
+    response = client.post(path, files={"file": (filename, b"not really a document", content_type)})
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail.startswith("The file could not be read as")
+    assert str(tmp_path) not in detail and "ocr-upload" not in detail
+
+
+def test_unexpected_error_is_a_500_without_its_message(client, monkeypatch):
+    import ocr_pipeline
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("cannot open /tmp/ocr-upload-secret")
+
+    monkeypatch.setattr(ocr_pipeline, "ocr_document", broken)
+    response = client.post("/api/ocr", files={"file": ("a.png", b"\x89PNG\r\n\x1a\n", "image/png")})
+    assert response.status_code == 500
+    assert "secret" not in response.text
+
+
+def test_metrics_report_cache_lookups_per_tier(client):
+    server.result_cache.persistent_hits += 2
+    lines = client.get("/metrics").text.splitlines()
+    assert 'ocr_cache_requests_total{cache="result",tier="persistent",result="hit"} 2' in lines
+    assert 'ocr_cache_requests_total{cache="result",tier="memory",result="hit"} 0' in lines
+    assert 'ocr_cache_requests_total{cache="orientation",tier="all",result="miss"} 0' in lines
+
+
+def text_pdf():
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Name: Alice Smith\nTotal: 55")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_debug_and_profile_need_the_admin_token(client, monkeypatch, tmp_path):
+    monkeypatch.delenv("OCR_DEBUG", raising=False)
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setenv("OCR_PROFILE_DIR", str(tmp_path / "profiles"))
+    files = {"file": ("a.pdf", text_pdf(), "application/pdf")}
+
+    for query in ("debug=true", "profile=true"):
+        assert client.post(f"/api/ocr?{query}", files=files).status_code == 403
+        assert client.post(f"/api/ocr?{query}", files=files, headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    response = client.post("/api/ocr?profile=true", files=files, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["engine"] == "text_layer"
+    assert body["timings"]["total"] > 0
+    assert os.path.dirname(body["profile"]) == str(tmp_path / "profiles") and os.path.exists(body["profile"])
+
+    plain = client.post("/api/ocr", files=files).json()
+    assert "timings" not in plain and "profile" not in plain
+
+
+def wait_for_readiness(client, status_code, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/api/health/ready")
+        if response.status_code == status_code or time.monotonic() > deadline:
+            return response
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def warmup(monkeypatch, tmp_path):
+    """Turn the warm-up on, with warmup.py's steps stubbed out by each test"""
+    import warmup
+
+    monkeypatch.setenv("OCR_WARMUP", "1")
+    monkeypatch.setenv("OCR_WARMUP_LANGUAGES", "eng")
+    monkeypatch.setenv("OCR_SPOOL_DIR", str(tmp_path))
+    monkeypatch.delenv("MONGO_URL", raising=False)
+    monkeypatch.setattr(warmup, "warm_pipeline", lambda page, language: {"language": language})
+    return warmup
+
+
+def test_ready_only_after_warm_up(warmup, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(warmup, "warm_extraction", lambda languages: release.wait(5))
+
+    with TestClient(server.app) as client:
+        response = client.get("/api/health/ready")
+        assert response.status_code == 503
+        assert response.json()["state"] == "warming_up"
+        assert client.get("/api/health/live").status_code == 200
+
+        release.set()
+        response = wait_for_readiness(client, 200)
+        assert response.status_code == 200
+        assert response.json()["state"] == "ready" and response.json()["languages"] == ["eng"]
+        assert "server_ready 1" in client.get("/metrics").text.splitlines()
+    assert server.readiness["ready"] is False  # Unready again once shut down
+
+
+def test_failed_warm_up_still_ends_ready(warmup, monkeypatch):
+
+    def broken(languages):
+        raise RuntimeError("pattern file is corrupt")
+
+    monkeypatch.setattr(warmup, "warm_extraction", broken)
+    with TestClient(server.app) as client:
+        response = wait_for_readiness(client, 200)
+        assert response.status_code == 200 and response.json()["state"] == "ready"
+
+
+def test_missing_tesseract_keeps_the_worker_unready(warmup, monkeypatch):
+    pytesseract = pytest.importorskip("pytesseract")
+
+    def no_tesseract(page, language):
+        raise pytesseract.TesseractNotFoundError()
+
+    monkeypatch.setattr(warmup, "warm_pipeline", no_tesseract)
+    with TestClient(server.app) as client:
+        response = wait_for_readiness(client, 200, timeout=0.5)
+        assert response.status_code == 503 and response.json()["state"] == "tesseract_missing"
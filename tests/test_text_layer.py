@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("pytesseract")
+fitz = pytest.importorskip("fitz")
+
+import ocr_pipeline  # noqa: E402
+from text_layer import is_trustworthy_text, read_text_layer  # noqa: E402
+
+
+def pdf_with(*texts):
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page(width=612, height=792)
+        if text:
+            page.insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.mark.parametrize("text, trusted", [
+    ("Name: Alice Smith\nDOB: 01/02/2000", True),
+    ("नाम: आलिस", True),
+    ("", False),
+    ("   \n ", False),
+    ("§¶ †‡ •• ~~ ^^ §§ ¶¶ a1", False),  # Symbol soup from a broken font encoding
+    ("Name �� Alice � Smith", False),
+    ("Name:\x01Alice\x02Smith", False),
+])
+def test_is_trustworthy_text(text, trusted):
+    assert is_trustworthy_text(text) is trusted
+
+
+def test_real_text_layer_read_with_word_boxes():
+    layer = read_text_layer(pdf_with("Name: Alice Smith\nTotal: 55"))
+    assert layer["text"] == "Name: Alice Smith\nTotal: 55"
+    assert [word["text"] for word in layer["words"]] == ["Name:", "Alice", "Smith", "Total:", "55"]
+    x0, y0, x1, y1 = layer["words"][0]["bbox"]
+    assert 70 < x0 < x1 and y0 < 72 < y1
+
+
+@pytest.mark.parametrize("text", [None, "Two words", "§¶ †‡ •• ~~ ^^ §§"])
+def test_unusable_text_layer_is_none(text):
+    assert read_text_layer(pdf_with(text)) is None
+
+
+def test_text_layer_of_other_pages_and_paths(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(pdf_with(None, "Page two has text"))
+    assert read_text_layer(str(path), 0) is None
+    assert read_text_layer(str(path), 1)["text"] == "Page two has text"
+    assert read_text_layer(str(path), 5) is None
+
+
+class OCRCalled(Exception):
+    pass
+
+
+@pytest.fixture
+def ocr_spy(monkeypatch):
+    def load_upright_image(*args, **kwargs):
+        raise OCRCalled()
+
+    monkeypatch.setattr(ocr_pipeline, "load_upright_image", load_upright_image)
+
+
+def test_text_layer_skips_ocr(ocr_spy):
+    result = ocr_pipeline.ocr_document(pdf_with("Name: Alice Smith"), "application/pdf", "eng")
+    assert result["engine"] == "text_layer" and result["confidence"] == 100.0
+    assert result["text"] == "Name: Alice Smith"
+
+
+@pytest.mark.parametrize("text, force_ocr", [
+    (None, False),  # Scanned page: no text layer
+    ("§¶ †‡ •• ~~ ^^ §§", False),  # Garbage text layer
+    ("Name: Alice Smith", True),
+])
+def test_falls_back_to_ocr(ocr_spy, text, force_ocr):
+    with pytest.raises(OCRCalled):
+        ocr_pipeline.ocr_document(pdf_with(text), "application/pdf", "eng", force_ocr=force_ocr)
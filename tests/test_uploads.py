@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from uploads import MULTIPART_SLACK, MultipartError, UploadLimitMiddleware, UploadTooLarge, spool_multipart
+
+LIMIT = 256 * 1024
+PNG = b"\x89PNG\r\n\x1a\n" + os.urandom(4000)
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("OCR_SPOOL_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_app(received):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        data = await file.read()
+        received.append(len(data))
+        return {"size": len(data)}
+
+    app.add_middleware(UploadLimitMiddleware, max_bytes=LIMIT, path_limits={"/big": LIMIT * 4})
+    return app
+
+
+def multipart(payload: bytes, boundary: str = "xyz") -> bytes:
+    return (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n"
+            f"Content-Type: image/png\r\n\r\n").encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+
+
+def chunked(body: bytes, size: int = 64 * 1024):
+    for offset in range(0, len(body), size):
+        yield body[offset:offset + size]
+
+
+def test_declared_length_over_limit_rejected_before_the_app():
+    received = []
+    client = TestClient(make_app(received))
+    response = client.post("/upload", files={"file": ("a.png", b"x" * (LIMIT + MULTIPART_SLACK + 1))})
+    assert response.status_code == 413
+    assert received == []
+
+
+def test_chunked_body_over_limit_rejected_while_received():
+    received = []
+    client = TestClient(make_app(received))
+    body = multipart(b"x" * (LIMIT + MULTIPART_SLACK + 1))
+    response = client.post("/upload", content=chunked(body),
+                           headers={"Content-Type": "multipart/form-data; boundary=xyz"})
+    assert response.status_code == 413
+    assert response.json() == {"detail": str(UploadTooLarge(LIMIT))}
+    assert response.headers["connection"] == "close"
+    assert received == []
+
+
+def test_chunked_body_under_limit_passes():
+    received = []
+    client = TestClient(make_app(received))
+    response = client.post("/upload", content=chunked(multipart(b"x" * 1000)),
+                           headers={"Content-Type": "multipart/form-data; boundary=xyz"})
+    assert response.status_code == 200
+    assert received == [1000]
+
+
+async def stream(body: bytes, size: int = 1000):
+    for offset in range(0, len(body), size):
+        yield body[offset:offset + size]
+
+
+def spool(body: bytes, max_bytes: int = LIMIT, **kwargs):
+    return asyncio.run(spool_multipart(stream(body), "multipart/form-data; boundary=xyz", "file", max_bytes,
+                                       **kwargs))
+
+
+def form(*parts: bytes) -> bytes:
+    return b"".join(b"--xyz\r\n" + part + b"\r\n" for part in parts) + b"--xyz--\r\n"
+
+
+def file_part(data: bytes, content_type: str = "application/octet-stream", name: str = "file") -> bytes:
+    return (f"Content-Disposition: form-data; name=\"{name}\"; filename=\"a.png\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n").encode() + data
+
+
+def test_spool_multipart_writes_the_file_field_once(spool_dir):
+    body = form(b"Content-Disposition: form-data; name=\"note\"\r\n\r\nhello", file_part(PNG))
+    upload = spool(body)
+    try:
+        assert os.path.dirname(upload.path) == str(spool_dir)
+        assert upload.read() == PNG
+        assert upload.size == len(PNG)
+        assert upload.sha256 == hashlib.sha256(PNG).hexdigest()
+        assert upload.content_type == "image/png"  # Sniffed from application/octet-stream
+    finally:
+        upload.cleanup()
+
+
+def test_spool_multipart_checks_declared_type_before_writing(spool_dir):
+    declared = []
+
+    def check_type(content_type):
+        declared.append(content_type)
+        raise RuntimeError("refused")
+
+    with pytest.raises(RuntimeError):
+        spool(form(file_part(PNG, "text/plain")), check_type=check_type)
+    assert declared == ["text/plain"]
+    assert os.listdir(spool_dir) == []
+
+
+@pytest.mark.parametrize("body", [
+    form(file_part(PNG, name="other")),
+    form(b"Content-Disposition: form-data; name=\"file\"\r\n\r\nnot a file"),
+    form(file_part(PNG))[:-200],
+])
+def test_spool_multipart_rejects(spool_dir, body):
+    with pytest.raises(MultipartError):
+        spool(body)
+    assert os.listdir(spool_dir) == []
+
+
+def test_spool_multipart_over_limit(spool_dir):
+    with pytest.raises(UploadTooLarge):
+        spool(form(file_part(PNG)), max_bytes=100)
+    assert os.listdir(spool_dir) == []
+
+
+def test_spool_multipart_needs_multipart():
+    with pytest.raises(MultipartError):
+        asyncio.run(spool_multipart(stream(PNG), "image/png", "file", LIMIT))
@@ -0,0 +1,71 @@
+import itertools
+
+import pytest
+from dateutil import parser as date_parser
+
+from validators import format_phone, is_date, normalize_date
+
+NUMBERS = (0, 1, 2, 9, 10, 11, 12, 13, 28, 29, 30, 31, 32)
+YEARS = ("00", "01", "49", "50", "51", "75", "99", "1999", "2001", "2024")
+
+
+def dateutil_normalize(text):
+    try:
+        return date_parser.parse(text, fuzzy=True).strftime('%Y-%m-%d')
+    except (ValueError, OverflowError):
+        return None
+
+
+def dateutil_is_date(text):
+    try:
+        date_parser.parse(text)
+    except (ValueError, OverflowError):
+        return False
+    return True
+
+
+def numeric_dates():
+    for first, second, year, separator in itertools.product(NUMBERS, NUMBERS, YEARS, "/-"):
+        yield f"{first}{separator}{second:02d}{separator}{year}"
+        if len(year) == 4:
+            yield f"{year}{separator}{first:02d}{separator}{second}"
+
+
+def test_numeric_dates_match_dateutil():
+    mismatches = [
+        text for text in numeric_dates()
+        if (normalize_date(text), is_date(text)) != (dateutil_normalize(text), dateutil_is_date(text))
+    ]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("text", [
+    " 12/05/2001 ",
+    "DOB: 12 May 2001",
+    "born on 2001-05-12 in Pune",
+    "May 5, 99",
+    "12.05.2001",
+    "no date here",
+    "",
+])
+def test_other_dates_go_to_dateutil(text):
+    assert normalize_date(text) == dateutil_normalize(text)
+    assert is_date(text) == dateutil_is_date(text)
+
+
+def test_numeric_date_fast_path_values():
+    assert normalize_date("13/05/2001") == "2001-05-13"  # Day first only when it cannot be a month
+    assert normalize_date("05/13/2001") == "2001-05-13"
+    assert normalize_date("2001-5-6") == "2001-05-06"
+    assert normalize_date("31/02/2001") is None
+    assert not is_date("31/02/2001")
+
+
+def test_format_phone():
+    pytest.importorskip("phonenumbers")
+    assert format_phone("+91 98765 43210") == "+91 98765 43210"
+    assert format_phone("+919876543210") == "+91 98765 43210"
+    assert format_phone("98765 43210") is None  # No region, no country code
+    assert format_phone("98765 43210", "IN") == "+91 98765 43210"
+    assert format_phone("+91 12345") is None
+    assert format_phone("not a phone", "IN") is None